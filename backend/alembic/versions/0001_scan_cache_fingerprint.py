@@ -0,0 +1,32 @@
+"""scan cache: content fingerprint and (url, created_at desc) index
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 10:00:00.000000
+
+Statements are idempotent so the migration also applies cleanly to databases
+created by tools/init_db.py, which already builds the current models.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE scans ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_scans_url_created_at ON scans (url, created_at DESC)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_scans_url_created_at")
+    op.execute("ALTER TABLE scans DROP COLUMN IF EXISTS content_hash")
@@ -0,0 +1,29 @@
+"""scans: per-chunk fingerprints and claims for incremental rescans
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 16:00:00.000000
+
+Idempotent, like 0001, so it also applies to databases built by tools/init_db.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE scans ADD COLUMN IF NOT EXISTS chunks JSONB")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE scans DROP COLUMN IF EXISTS chunks")
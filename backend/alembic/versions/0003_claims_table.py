@@ -0,0 +1,48 @@
+"""claims: one row per verified claim, indexed by category, risk and time
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 18:00:00.000000
+
+Idempotent, like 0001, so it also applies to databases built by tools/init_db.py.
+Existing scans are copied into the table by tools/backfill_claims.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS claims (
+            id UUID PRIMARY KEY,
+            scan_id UUID NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+            claim_text VARCHAR NOT NULL,
+            category VARCHAR NOT NULL,
+            risk_level VARCHAR NOT NULL,
+            explanation VARCHAR,
+            confidence FLOAT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_claims_scan_id ON claims (scan_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_claims_created_at ON claims (created_at)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_claims_category_risk_created_at "
+        "ON claims (category, risk_level, created_at DESC)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_claims_risk_created_at ON claims (risk_level, created_at DESC)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE IF EXISTS claims")
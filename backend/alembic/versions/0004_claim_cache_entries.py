@@ -0,0 +1,40 @@
+"""claim_cache_entries: shared cache of verified claims per chunk
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 19:00:00.000000
+
+Idempotent, like 0001, so it also applies to databases built by tools/init_db.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS claim_cache_entries (
+            key VARCHAR PRIMARY KEY,
+            model VARCHAR NOT NULL,
+            prompt_version VARCHAR NOT NULL,
+            claims JSONB,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            expires_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_claim_cache_entries_created_at ON claim_cache_entries (created_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_claim_cache_entries_expires_at ON claim_cache_entries (expires_at)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE IF EXISTS claim_cache_entries")
@@ -0,0 +1,51 @@
+"""scan_jobs: background scan job queue with leases
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 20:00:00.000000
+
+Idempotent, like 0001, so it also applies to databases built by tools/init_db.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS scan_jobs (
+            id UUID PRIMARY KEY,
+            status VARCHAR NOT NULL,
+            payload JSONB,
+            progress JSONB,
+            attempts INTEGER NOT NULL,
+            max_attempts INTEGER NOT NULL,
+            error VARCHAR,
+            run_after TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            lease_expires_at TIMESTAMP WITHOUT TIME ZONE,
+            lease_token UUID,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            scan_id UUID REFERENCES scans (id)
+        )
+    """)
+    # Tables created before lease tokens were added
+    op.execute("ALTER TABLE scan_jobs ADD COLUMN IF NOT EXISTS lease_token UUID")
+    # Claiming only needs the composite index; tables built by init_db also got single-column ones
+    op.execute("DROP INDEX IF EXISTS ix_scan_jobs_status")
+    op.execute("DROP INDEX IF EXISTS ix_scan_jobs_run_after")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_scan_jobs_status_run_after ON scan_jobs (status, run_after)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE IF EXISTS scan_jobs")
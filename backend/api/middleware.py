@@ -0,0 +1,37 @@
+from services.metrics import ScanTrace, current_trace
+
+class TimingHeadersMiddleware:
+    """Adds Server-Timing and LLM token headers to every HTTP response.
+
+    Pure ASGI (no BaseHTTPMiddleware) so streaming responses are not buffered.
+    Headers go out with the response start, so for streaming endpoints they only
+    cover the work done before the first byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = ScanTrace()
+        token = current_trace.set(trace)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.extend([
+                    (b"server-timing", trace.server_timing().encode("latin-1")),
+                    (b"x-llm-calls", str(int(trace.total("llm_calls"))).encode()),
+                    (b"x-llm-prompt-tokens", str(int(trace.total("prompt_tokens"))).encode()),
+                    (b"x-llm-completion-tokens", str(int(trace.total("completion_tokens"))).encode()),
+                ])
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_trace.reset(token)
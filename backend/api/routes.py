@@ -1,62 +1,127 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from api.schemas import PageScanRequest, TextScanRequest, ScanResponse, ScanResult, Claim, ScanChunkRequest, ScanAggregateRequest
-from services.ai_pipeline import run_page_scan, run_text_scan, process_chunk, analyze_aggregated_results
-from db.models import User, Scan
-from db.session import get_session
-from uuid import uuid4
+from api.schemas import PageScanRequest, TextScanRequest, ScanResponse, ScanResult, Claim, ScanChunkRequest, ScanAggregateRequest, ScanJobResponse, BatchScanRequest, BatchScanItemResult
+from services.ai_pipeline import run_page_scan, collect_page_scan, run_text_scan, process_chunk, analyze_aggregated_results, stream_page_scan, summarize_with_llm, verify_batcher
+from db.models import User, Scan, ScanJob
+from db.session import get_session, async_session_factory
+from uuid import UUID, uuid4
 from datetime import datetime, timedelta
-from api.utils import normalize_url
+from api.utils import normalize_url, format_sse, format_ndjson, scan_response_json, scan_etag, etag_matches
+from services.claim_cache import claim_cache
+from services.claim_memory import claim_memory
+from services.llm_scheduler import llm_scheduler, llm_priority, Priority
+from services.llm_router import route_stats
+from services.jobs import enqueue_scan_job
+from services.coalescing import scan_flight, content_fingerprint, advisory_lock, SingleFlight
+from services.scan_store import store_scan, store_scans
+from services.scan_cache import lookup_cached_scan, lookup_cached_scans, lookup_scan, load_previous_scan, candidates_fingerprint, is_fresh, is_partial, max_cache_age
+from core.config import settings
+from core.logging import get_logger
+
+logger = get_logger("routes")
 
 router = APIRouter()
 
+def _stored_scan_response(row, if_none_match: Optional[str]) -> Response:
+    """A stored scan as pre-serialized JSON with a weak ETag, or 304 when the
+    client already has this version (If-None-Match). The body may be compressed,
+    so caches must key it on Accept-Encoding too."""
+    etag = scan_etag(row.id, row.result_json)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=scan_response_json(row.id, row.result_json, row.created_at),
+        media_type="application/json",
+        headers=headers,
+    )
+
 @router.post("/scan/page", response_model=ScanResponse)
 async def scan_page(
     request: PageScanRequest, 
-    session: AsyncSession = Depends(get_session)
+    if_none_match: Optional[str] = Header(default=None)
 ):
     # Check for cache if not forcing refresh
     if not request.force_refresh:
-        # Normalize URL (basic)
-        normalized_url = normalize_url(request.url)
-        
-        statement = select(Scan).where(Scan.url == normalized_url).order_by(Scan.created_at.desc())
-        result = await session.execute(statement)
-        cached_scan = result.scalars().first()
+        # Latest scan for the URL, unless the page content changed or it is too old.
+        # Short-lived session: it must not hold a pooled connection through the pipeline run.
+        async with async_session_factory() as session:
+            cached_scan = await lookup_cached_scan(
+                session, normalize_url(request.url), candidates_fingerprint(request.candidates)
+            )
         
         if cached_scan:
-            # Check age (optional, e.g. 24 hours)
-            # if (datetime.utcnow() - cached_scan.created_at) < timedelta(hours=24):
-            return ScanResponse(
-                scan_id=cached_scan.id,
-                result=cached_scan.result,
-                created_at=cached_scan.created_at,
-                is_cached=True
-            )
+            return _stored_scan_response(cached_scan, if_none_match)
     
     # If we only wanted to check cache, and found nothing
     if request.only_check_cache:
         raise HTTPException(status_code=404, detail="No cached scan found")
 
-    # 1. Orchestrate AI Pipeline
-    # TODO: Pass force_refresh to pipeline if needed
-    result_data: ScanResult = await run_page_scan(
+    # 1 + 2. Run the pipeline and store the scan. Concurrent requests for the same
+    # URL and content wait on a single run instead of each starting their own.
+    if settings.COALESCE_MODE == "off":
+        return await _run_and_store_page_scan(request)
+
+    key = f"{normalize_url(request.url)}:{content_fingerprint(request.candidates)}"
+    lock_key = key if settings.COALESCE_MODE == "advisory" else None
+    return await scan_flight.do(key, lambda: _run_and_store_page_scan(request, lock_key))
+
+async def _run_and_store_page_scan(request: PageScanRequest, lock_key: str = None) -> ScanResponse:
+    """Pipeline + storage for /scan/page. With lock_key, runs under a Postgres
+    advisory lock so only one worker process scans the same page at a time."""
+    if lock_key is None:
+        return await _scan_and_store(request)
+
+    waiting_since = datetime.utcnow()
+    async with advisory_lock(lock_key):
+        # Another worker may have finished the same scan (same page content) while we waited for the lock
+        async with async_session_factory() as session:
+            statement = (
+                select(Scan)
+                .where(
+                    Scan.url == normalize_url(request.url),
+                    Scan.content_hash == candidates_fingerprint(request.candidates),
+                    Scan.created_at >= waiting_since,
+                )
+                .order_by(Scan.created_at.desc())
+                .limit(1)
+            )
+            result = await session.execute(statement)
+            fresh_scan = result.scalars().first()
+        if fresh_scan and not is_partial(fresh_scan.result):
+            return ScanResponse(
+                scan_id=fresh_scan.id,
+                result=fresh_scan.result,
+                created_at=fresh_scan.created_at,
+                is_cached=True
+            )
+        return await _scan_and_store(request)
+
+async def _scan_and_store(request: PageScanRequest) -> ScanResponse:
+    # 1. Orchestrate AI Pipeline (reusing the claims of chunks unchanged since the last scan)
+    previous = await load_previous_scan(normalize_url(request.url))
+    scan_data = await collect_page_scan(
         candidates=request.candidates,
         metadata=request.metadata,
-        indicators=request.indicators
+        indicators=request.indicators,
+        previous=previous
     )
+    result_data: ScanResult = scan_data["result"]
     
-    # 2. Store in Supabase
-    new_scan = Scan(
-        url=normalize_url(request.url),
-        result=result_data.model_dump(), # Convert Pydantic model to dict
-        score=None, #/ TODO: Calculate score
-        user_id=None #/ TODO: Link to user if auth enabled
-    )
-    session.add(new_scan)
-    await session.commit()
-    await session.refresh(new_scan)
+    # 2. Store in Supabase (own session: the run may outlive the request that started it)
+    async with async_session_factory() as session:
+        new_scan = await store_scan(
+            session,
+            url=normalize_url(request.url),
+            result=result_data.model_dump(), # Convert Pydantic model to dict
+            content_hash=candidates_fingerprint(request.candidates),
+            chunks=scan_data["chunks"],
+            user_id=None #/ TODO: Link to user if auth enabled
+        )
     
     return ScanResponse(
         scan_id=new_scan.id,
@@ -65,6 +130,232 @@ async def scan_page(
         is_cached=False
     )
 
+@router.post("/scan/page/stream")
+async def scan_page_stream(request: PageScanRequest):
+    """
+    Streaming variant of /scan/page (text/event-stream).
+    Events: extraction, chunk (one per finished chunk, with its verified claims),
+    aggregation, then result (a ScanResponse). Errors end the stream with an error event.
+    """
+    async def event_stream():
+        # Sessions are short-lived: none holds a pooled connection through the pipeline run
+        if not request.force_refresh:
+            async with async_session_factory() as session:
+                cached_scan = await lookup_cached_scan(
+                    session, normalize_url(request.url), candidates_fingerprint(request.candidates)
+                )
+            if cached_scan:
+                body = scan_response_json(cached_scan.id, cached_scan.result_json, cached_scan.created_at)
+                yield f"event: result\ndata: {body.decode('utf-8')}\n\n"
+                return
+
+        if request.only_check_cache:
+            yield format_sse("error", {"status_code": 404, "detail": "No cached scan found"})
+            return
+
+        try:
+            async for scan_event in stream_page_scan(
+                candidates=request.candidates,
+                metadata=request.metadata,
+                indicators=request.indicators,
+                previous=await load_previous_scan(normalize_url(request.url))
+            ):
+                if scan_event["event"] != "result":
+                    yield format_sse(scan_event["event"], scan_event["data"])
+                    continue
+
+                result_data: ScanResult = scan_event["data"]["result"]
+                async with async_session_factory() as session:
+                    new_scan = await store_scan(
+                        session,
+                        url=normalize_url(request.url),
+                        result=result_data.model_dump(),
+                        content_hash=candidates_fingerprint(request.candidates),
+                        chunks=scan_event["data"]["chunks"],
+                        user_id=None
+                    )
+
+                yield format_sse("result", ScanResponse(
+                    scan_id=new_scan.id,
+                    result=result_data,
+                    created_at=new_scan.created_at,
+                    is_cached=False
+                ))
+        except Exception as e:
+            logger.warning(f"Stream Scan Error: {e}")
+            yield format_sse("error", {"status_code": 500, "detail": "Scan failed"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/scan/jobs", response_model=ScanJobResponse, status_code=202)
+async def create_scan_job(
+    request: PageScanRequest,
+    session: AsyncSession = Depends(get_session)
+):
+    # Enqueue a page scan; poll GET /scan/jobs/{job_id} for progress and the result
+    try:
+        job = await enqueue_scan_job(session, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ScanJobResponse(
+        job_id=job.id,
+        status=job.status,
+        progress=job.progress,
+        attempts=job.attempts
+    )
+
+@router.get("/scan/jobs/{job_id}", response_model=ScanJobResponse)
+async def get_scan_job(
+    job_id: UUID,
+    session: AsyncSession = Depends(get_session)
+):
+    job = await session.get(ScanJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    result = None
+    if job.status in ("succeeded", "partial") and job.scan_id:
+        scan = await session.get(Scan, job.scan_id)
+        if scan:
+            result = ScanResponse(
+                scan_id=scan.id,
+                result=scan.result,
+                created_at=scan.created_at,
+                is_cached=False
+            )
+
+    return ScanJobResponse(
+        job_id=job.id,
+        status=job.status,
+        progress=job.progress,
+        attempts=job.attempts,
+        error=job.error,
+        result=result
+    )
+
+@router.post("/scan/batch")
+async def scan_batch(request: BatchScanRequest):
+    """
+    Scans many pages/texts in one request. Results stream back as NDJSON: one
+    BatchScanItemResult per line in completion order, then a summary line.
+    - Cache hits for page items are resolved with one query for all URLs
+    - Misses share a concurrency limit (BATCH_MAX_CONCURRENCY) and run as batch-priority LLM work;
+      identical items within the batch are scanned once
+    - New page scans are stored with a single bulk insert after the last item
+    """
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BATCH_MAX_ITEMS} items per batch")
+
+    items = request.items
+
+    def item_candidates(item) -> list:
+        return item.candidates if item.candidates is not None else [item.text]
+
+    async def lines():
+        llm_priority.set(Priority.BATCH)
+        counts = {"cached": 0, "scanned": 0, "errors": 0}
+
+        # 1. Bulk cache lookup (page items with a URL only, like /scan/page)
+        cacheable = {
+            i: normalize_url(item.url)
+            for i, item in enumerate(items)
+            if item.url and item.candidates is not None and not item.force_refresh
+        }
+        try:
+            async with async_session_factory() as session:
+                cached = await lookup_cached_scans(session, list(cacheable.values()))
+        except Exception as e:
+            logger.warning(f"Batch Cache Lookup Error: {e}")
+            cached = {}
+
+        pending = []
+        for i, item in enumerate(items):
+            if not item.candidates and not item.text:
+                counts["errors"] += 1
+                yield format_ndjson(BatchScanItemResult(index=i, id=item.id, status="error", error="Item has no candidates or text"))
+                continue
+            row = cached.get(cacheable.get(i))
+            if row and is_fresh(row.created_at, row.content_hash, candidates_fingerprint(item.candidates), max_cache_age()):
+                counts["cached"] += 1
+                yield format_ndjson(BatchScanItemResult(index=i, id=item.id, status="ok", response=ScanResponse(
+                    scan_id=row.id,
+                    result=row.result,
+                    created_at=row.created_at,
+                    is_cached=True
+                )))
+                continue
+            pending.append(i)
+
+        # 2. Misses, under one shared concurrency limit
+        semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+        flight = SingleFlight()
+
+        async def scan(i: int):
+            item = items[i]
+            candidates = item_candidates(item)
+
+            async def run():
+                async with semaphore:
+                    return await run_page_scan(candidates=candidates, metadata=item.metadata, indicators=item.indicators)
+
+            try:
+                key = f"{normalize_url(item.url) or ''}:{content_fingerprint(candidates)}"
+                return i, await flight.do(key, run), None
+            except Exception as e:
+                logger.warning(f"Batch Item Error ({i}): {e}")
+                return i, None, str(e)
+
+        tasks = [asyncio.create_task(scan(i)) for i in pending]
+        new_scans = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                i, result_data, error = await next_done
+                item = items[i]
+                if error is not None:
+                    counts["errors"] += 1
+                    yield format_ndjson(BatchScanItemResult(index=i, id=item.id, status="error", error=error))
+                    continue
+
+                counts["scanned"] += 1
+                scan_id, created_at = uuid4(), datetime.utcnow()
+                if item.url and item.candidates is not None:
+                    new_scans.append(dict(
+                        id=scan_id,
+                        url=normalize_url(item.url),
+                        result=result_data.model_dump(),
+                        score=result_data.trust_score,
+                        content_hash=candidates_fingerprint(item.candidates),
+                        created_at=created_at,
+                        user_id=None
+                    ))
+                yield format_ndjson(BatchScanItemResult(index=i, id=item.id, status="ok", response=ScanResponse(
+                    scan_id=scan_id,
+                    result=result_data,
+                    created_at=created_at,
+                    is_cached=False
+                )))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # 3. One bulk insert for every new page scan (and one for their claims)
+        summary = {"done": True, "items": len(items), **counts, "stored": 0}
+        if new_scans:
+            try:
+                async with async_session_factory() as session:
+                    await store_scans(session, new_scans)
+                summary["stored"] = len(new_scans)
+            except Exception as e:
+                logger.warning(f"Batch Store Error: {e}")
+                summary["store_error"] = str(e)
+        yield format_ndjson(summary)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.post("/scan/text", response_model=ScanResponse)
 async def scan_text(request: TextScanRequest):
     result: ScanResult = await run_text_scan(request.text)
@@ -79,6 +370,8 @@ async def scan_text(request: TextScanRequest):
 
 @router.post("/scan/chunk")
 async def scan_chunk_endpoint(request: ScanChunkRequest):
+    # Client-driven chunk traffic is batch work: interactive page scans go first
+    llm_priority.set(Priority.BATCH)
     # Process a single chunk: Identify & Verify
     # We use the pipeline's modular functions directly
     claims = await process_chunk(request.chunk)
@@ -102,15 +395,13 @@ async def scan_aggregate_endpoint(
     url = request.metadata.get("url", "https://aggregated-result.com")
     normalized_url = normalize_url(url)
     
-    new_scan = Scan(
+    new_scan = await store_scan(
+        session,
         url=normalized_url,
         result=result_data.model_dump(),
         score=result_data.trust_score,
         user_id=None 
     )
-    session.add(new_scan)
-    await session.commit()
-    await session.refresh(new_scan)
     
     return ScanResponse(
         scan_id=new_scan.id,
@@ -119,6 +410,60 @@ async def scan_aggregate_endpoint(
         is_cached=False
     )
 
+@router.get("/scan/{scan_id}", response_model=ScanResponse)
+async def get_scan(
+    scan_id: UUID,
+    session: AsyncSession = Depends(get_session),
+    if_none_match: Optional[str] = Header(default=None)
+):
+    # A stored scan by id; revalidate with If-None-Match to get 304 when unchanged
+    row = await lookup_scan(session, scan_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    return _stored_scan_response(row, if_none_match)
+
+@router.post("/scan/{scan_id}/summary", response_model=ScanResponse)
+async def scan_summary_endpoint(
+    scan_id: UUID,
+    session: AsyncSession = Depends(get_session)
+):
+    # Scores are computed locally; this upgrades the templated summary with an LLM one on demand
+    scan = await session.get(Scan, scan_id)
+    if not scan:
+        raise HTTPException(status_code=404, detail="Scan not found")
+
+    result_data = ScanResult(**scan.result)
+    result_data.summary = await summarize_with_llm(result_data)
+    scan.result = result_data.model_dump()
+    await session.commit()
+
+    return ScanResponse(
+        scan_id=scan.id,
+        result=result_data,
+        created_at=scan.created_at,
+        is_cached=True
+    )
+
+@router.get("/cache/stats")
+async def cache_stats():
+    # Hit/miss counters for the chunk claim cache (each hit skips identify + verify LLM calls)
+    # and the semantic claim memory (each hit skips verifying one claim)
+    return {
+        "claim_cache": claim_cache.snapshot(),
+        "claim_memory": claim_memory.snapshot(),
+        "scan_coalescing": scan_flight.snapshot(),
+    }
+
+@router.get("/llm/stats")
+async def llm_stats():
+    # Scheduler queue depth, wait times, retries and token usage; verify batch sizes;
+    # latency, tokens and cost per route/model
+    return {
+        "scheduler": llm_scheduler.snapshot(),
+        "verify_batcher": verify_batcher.snapshot(),
+        "routes": route_stats.snapshot(),
+    }
+
 @router.post("/users/register")
 async def register_user(
     anonymous_id: str,
@@ -17,6 +17,9 @@ class ScanResult(BaseModel):
     trust_score: int = Field(..., description="0-100 score, where 100 is highly credible and 0 is a scam.")
     summary: str = Field(..., description="A short, one-sentence commentary explaining the score.")
     claims: List[Claim]
+    # Set when the scan deadline expired first: the result leaves out these chunks (page order)
+    partial: bool = False
+    missing_chunks: List[int] = []
 
 # --- Requests ---
 
@@ -32,6 +35,18 @@ class TextScanRequest(BaseModel):
     text: str
     url: Optional[str] = None
 
+class BatchScanItem(BaseModel):
+    id: Optional[str] = Field(default=None, description="Client correlation id, echoed back in the result line.")
+    url: Optional[str] = None
+    candidates: Optional[List[str]] = None # Page item
+    text: Optional[str] = None # Text item (used when candidates is not set)
+    metadata: Dict[str, str] = {}
+    indicators: List[str] = []
+    force_refresh: bool = False
+
+class BatchScanRequest(BaseModel):
+    items: List[BatchScanItem]
+
 # --- Responses ---
 
 class ScanChunkRequest(BaseModel):
@@ -49,3 +64,18 @@ class ScanResponse(BaseModel):
     result: ScanResult
     created_at: datetime
     is_cached: bool = False
+
+class ScanJobResponse(BaseModel):
+    job_id: UUID
+    status: str = Field(..., description="queued, running, succeeded, partial (stored with missing chunks after the last attempt) or dead (retries exhausted).")
+    progress: Dict[str, Any] = {}
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Optional[ScanResponse] = None
+
+class BatchScanItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str = Field(..., description="ok or error")
+    response: Optional[ScanResponse] = None
+    error: Optional[str] = None
@@ -1,4 +1,12 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Optional, Union
 from urllib.parse import urlparse, urlunparse
+from uuid import UUID
+
+import orjson
+from fastapi.encoders import jsonable_encoder
 
 def normalize_url(url: str) -> str:
     """
@@ -31,3 +39,45 @@ def normalize_url(url: str) -> str:
     except Exception:
         # Fallback if parsing fails
         return url.rstrip('/')
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Formats one Server-Sent Events message.
+    - data is JSON-encoded (Pydantic models, UUIDs and datetimes included)
+    - JSON never contains raw newlines, so a single data: line is enough
+    """
+    payload = json.dumps(jsonable_encoder(data))
+    return f"event: {event}\ndata: {payload}\n\n"
+
+def format_ndjson(data: Any) -> str:
+    """Formats one newline-delimited JSON line."""
+    return json.dumps(jsonable_encoder(data)) + "\n"
+
+def scan_response_json(scan_id: UUID, result_json: Union[str, bytes], created_at: datetime, is_cached: bool = True) -> bytes:
+    """
+    ScanResponse body for a stored scan, built around the stored result JSON.
+    - result_json is the JSONB column as text, spliced in as is: no decode,
+      no Pydantic validation, no re-encode
+    - The envelope fields are serialized the same way as ScanResponse
+    """
+    if isinstance(result_json, str):
+        result_json = result_json.encode("utf-8")
+    envelope = orjson.dumps({"scan_id": scan_id, "created_at": created_at, "is_cached": is_cached})
+    return b'{"result":' + result_json + b"," + envelope[1:]
+
+def scan_etag(scan_id: UUID, result_json: Union[str, bytes]) -> str:
+    """Weak ETag for a stored scan: its id plus a digest of the result, which
+    changes when the result is updated in place (e.g. /scan/{id}/summary).
+    Weak because the same tag covers the identity and compressed bodies."""
+    if isinstance(result_json, str):
+        result_json = result_json.encode("utf-8")
+    return f'W/"{scan_id}-{hashlib.sha256(result_json).hexdigest()[:16]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 prescribes for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
@@ -1,4 +1,5 @@
 import os
+from typing import Any, Dict, List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,13 +11,197 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str
     DATABASE_URL: str
     
+    # Database pool. DB_PGBOUNCER_MODE: "auto" (transaction pooler detected by
+    # port 6543), "transaction" or "session" (prepared-statement caches kept)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_PGBOUNCER_MODE: str = "auto"
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Advisory locks (COALESCE_MODE="advisory") use their own small pool of
+    # session-mode connections; DB_LOCK_DATABASE_URL defaults to DATABASE_URL
+    # on the session pooler port when DATABASE_URL is the transaction pooler
+    DB_LOCK_DATABASE_URL: str = ""
+    DB_LOCK_POOL_SIZE: int = 5
+    
     # AI / LLM
     OPENAI_API_KEY: str
     LLM_BASE_URL: str = "https://api.perplexity.ai"
     LLM_MODEL: str = "sonar-pro"
+    # Per call, excluding time queued in the scheduler; keep it below CHUNK_DEADLINE_SECONDS
+    LLM_TIMEOUT_SECONDS: float = 20.0
+
+    # Per-stage routing (services/llm_router.py): stage -> {"model", "base_url",
+    # "timeout", "fallbacks"}; unlisted stages use the settings above.
+    # LLM_PRICES: model -> [USD per 1M prompt tokens, USD per 1M completion tokens]
+    # Claims verified below LLM_ESCALATION_CONFIDENCE are re-verified on the
+    # "escalation" route (default target unless routed; 0 = off)
+    LLM_ROUTES: Dict[str, Dict[str, Any]] = {}
+    LLM_PRICES: Dict[str, List[float]] = {}
+    LLM_ESCALATION_CONFIDENCE: float = 0.0
+
+    # Deadlines (0 = none): per chunk (pre-filter to verified claims) and per
+    # page scan. Chunks not done by then are left out of a partial ScanResult.
+    # Off by default: they include scheduler queueing, so at LLM_REQUESTS_PER_MINUTE
+    # a long page can wait minutes for its calls. Size them from the rate limit
+    # (a chunk makes 2+ calls) and above LLM_TIMEOUT_SECONDS.
+    CHUNK_DEADLINE_SECONDS: float = 0.0
+    SCAN_DEADLINE_SECONDS: float = 0.0
+
+    # Hedged LLM calls: a duplicate request once a call on one of these stages
+    # outlives the route's recent latency percentile (at least the min delay,
+    # after enough samples), for at most HEDGE_MAX_RATIO of calls
+    HEDGE_ENABLED: bool = True
+    HEDGE_STAGES: List[str] = ["identify", "verify", "single_pass"]
+    HEDGE_PERCENTILE: float = 0.95
+    HEDGE_MIN_SAMPLES: int = 20
+    HEDGE_MIN_DELAY_SECONDS: float = 0.5
+    HEDGE_MAX_RATIO: float = 0.1
+
+    # Structured output for stage responses: "json_schema", "json_object" or "off".
+    # Malformed items get one repair call with just the broken JSON (max chars)
+    STRUCTURED_OUTPUT_MODE: str = "json_schema"
+    JSON_REPAIR_ENABLED: bool = True
+    JSON_REPAIR_MAX_CHARS: int = 8000
+
+    # LLM backend: "openai" (the provider) or "fake" (deterministic offline
+    # stand-in for tests/benchmarks; latency in ms, error/429 rates per call,
+    # optional JSON file of canned responses per stage)
+    LLM_BACKEND: str = "openai"
+    FAKE_LLM_LATENCY_MS: float = 200.0
+    FAKE_LLM_LATENCY_DISTRIBUTION: str = "lognormal"
+    FAKE_LLM_LATENCY_JITTER: float = 0.3
+    FAKE_LLM_ERROR_RATE: float = 0.0
+    FAKE_LLM_RATE_LIMIT_RATE: float = 0.0
+    FAKE_LLM_SEED: int = 0
+    FAKE_LLM_RESPONSES_FILE: str = ""
+
+    # LLM scheduler (process-wide limits in front of the provider; 0 disables a budget)
+    LLM_MAX_IN_FLIGHT: int = 8
+    LLM_REQUESTS_PER_MINUTE: int = 50
+    LLM_TOKENS_PER_MINUTE: int = 0
+    LLM_EXPECTED_COMPLETION_TOKENS: int = 500
+    LLM_MAX_RETRIES: int = 3
+    LLM_BACKOFF_BASE_SECONDS: float = 1.0
+    LLM_BACKOFF_MAX_SECONDS: float = 30.0
+
+    # Content extraction: "local" (heuristics only), "auto" (local, LLM fallback
+    # when confidence is low) or "llm" (always an LLM pass)
+    EXTRACTION_MODE: str = "auto"
+    EXTRACTION_MIN_CONFIDENCE: float = 0.5
+
+    # Per-chunk pipeline: "two_stage" (identify, then verify) or "single_pass"
+    PIPELINE_MODE: str = "two_stage"
+
+    # Local claim-signal pre-filter before the LLM: "off", "shadow" (send every
+    # chunk, count and log the chunks "chunk" would have wrongly skipped), "chunk"
+    # (skip chunks with no sentence scoring >= threshold) or "sentences" (also
+    # send only the promising sentences plus N neighbours). Shadow until its
+    # recall is measured on real pages. See tools/eval_prefilter.py
+    PREFILTER_MODE: str = "shadow"
+    PREFILTER_THRESHOLD: float = 0.5
+    PREFILTER_CONTEXT_SENTENCES: int = 1
+
+    # Verify batching: identified claims from many chunks/scans share verify calls,
+    # each chunk sending only the sentences around its claims. A batch is sent at
+    # the token or item limit, or after the wait deadline
+    VERIFY_BATCHING_ENABLED: bool = True
+    VERIFY_BATCH_MAX_TOKENS: int = 6000
+    VERIFY_BATCH_MAX_ITEMS: int = 16
+    VERIFY_BATCH_MAX_WAIT_MS: float = 50.0
+    VERIFY_CONTEXT_SENTENCES: int = 2
+
+    # Page aggregation: "local" (deterministic score + templated summary) or "llm"
+    AGGREGATION_MODE: str = "local"
+
+    # Chunking: token budget per chunk (per-model overrides), sentence overlap,
+    # and token counter ("estimate" or "tiktoken")
+    CHUNK_TOKEN_BUDGET: int = 5000
+    CHUNK_TOKEN_BUDGETS: Dict[str, int] = {}
+    CHUNK_OVERLAP_TOKENS: int = 100
+    CHUNK_TOKENIZER: str = "estimate"
+
+    # /scan/page cache: scans with unchanged content are always reused; this age
+    # limit applies when content can't be compared (0 = no limit)
+    SCAN_CACHE_MAX_AGE_HOURS: float = 24.0
+
+    # Rescans reuse the claims of chunks unchanged since the page's last scan
+    INCREMENTAL_SCANS_ENABLED: bool = True
+
+    # /scan/page request coalescing: "off", "local" (in-process single flight) or
+    # "advisory" (also serialized across processes with a Postgres advisory lock)
+    COALESCE_MODE: str = "local"
+    COALESCE_LOCK_POLL_SECONDS: float = 0.2
+
+    # /scan/batch
+    BATCH_MAX_ITEMS: int = 500
+    BATCH_MAX_CONCURRENCY: int = 8
+
+    # Background scan jobs (in-process asyncio workers polling the scan_jobs table)
+    JOB_WORKERS: int = 2
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_LEASE_SECONDS: int = 300
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_RETRY_DELAY_SECONDS: float = 10.0
+    # Page deadline for background jobs (0 = none); SCAN_DEADLINE_SECONDS is for interactive scans
+    JOB_SCAN_DEADLINE_SECONDS: float = 0.0
+
+    # Claim cache (identify/verify results keyed by chunk content)
+    CLAIM_CACHE_ENABLED: bool = True
+    CLAIM_CACHE_MEMORY_SIZE: int = 2048
+    CLAIM_CACHE_DB_ENABLED: bool = True
+    CLAIM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    CLAIM_CACHE_DB_MAX_ROWS: int = 100000
+
+    # Semantic claim memory: verified claims are embedded, and a new claim at
+    # cosine similarity >= threshold reuses the stored verdict (two-stage mode).
+    # Embeddings: "local" (feature hashing, offline) or "openai" (EMBEDDING_*).
+    # Off by default: the local embedder only matches rewordings that share most
+    # of their words, so real hit rates need "openai" embeddings.
+    # CLAIM_MEMORY_PATH: file prefix to persist the index ("" = memory only)
+    CLAIM_MEMORY_ENABLED: bool = False
+    CLAIM_MEMORY_EMBEDDINGS: str = "local"
+    CLAIM_MEMORY_THRESHOLD: float = 0.9
+    CLAIM_MEMORY_MAX_ENTRIES: int = 50000
+    CLAIM_MEMORY_TTL_SECONDS: int = 30 * 24 * 3600
+    CLAIM_MEMORY_PATH: str = ""
+    EMBEDDING_BASE_URL: str = "https://api.openai.com/v1"
+    EMBEDDING_API_KEY: str = ""
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+
+    # Logging ("json" or "text") and per-response Server-Timing / token headers
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    TIMING_HEADERS_ENABLED: bool = False
+
+    # Response compression: "gzip", "br" (needs brotli-asgi) or "off";
+    # bodies smaller than the minimum are sent as is
+    COMPRESSION: str = "gzip"
+    COMPRESSION_MIN_SIZE: int = 1000
+
+    # Production server (serve.py). WEB_CONCURRENCY: worker processes (0 = one
+    # per CPU); each has its own clients, DB pool, job workers, caches and LLM
+    # scheduler. LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE are server-wide
+    # and split evenly across the workers.
+    # On shutdown, in-flight scans get SHUTDOWN_DRAIN_SECONDS to finish.
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_CONCURRENCY: int = 1
+    KEEPALIVE_TIMEOUT_SECONDS: int = 5
+    SHUTDOWN_DRAIN_SECONDS: float = 30.0
+    # Connections opened at startup so the first requests skip the TCP/TLS handshake
+    DB_WARMUP_CONNECTIONS: int = 2
     
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 settings = Settings()
+
+
+def web_workers() -> int:
+    """Worker processes the server runs (WEB_CONCURRENCY, 0 = one per CPU)."""
+    return settings.WEB_CONCURRENCY or os.cpu_count() or 1
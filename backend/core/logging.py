@@ -0,0 +1,62 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+
+from core.config import settings
+
+# Structured, non-blocking logging.
+#
+# Loggers put records on an in-memory queue (QueueHandler); a background
+# thread (QueueListener) formats and writes them, so the event loop never
+# blocks on stderr. Extra fields passed with `extra={...}` become JSON keys.
+
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging() -> None:
+    """Routes the "liespy" logger tree through a queue to stderr. Idempotent."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if settings.LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(levelname)-5.5s [%(name)s] %(message)s"))
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger("liespy")
+    root.setLevel(settings.LOG_LEVEL.upper())
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the "liespy" namespace, e.g. get_logger("pipeline")."""
+    return logging.getLogger(f"liespy.{name}")
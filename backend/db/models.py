@@ -2,7 +2,7 @@ from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 from uuid import UUID, uuid4
-from sqlalchemy import Column
+from sqlalchemy import Column, Index, text
 from sqlalchemy.dialects.postgresql import JSONB
 
 class User(SQLModel, table=True):
@@ -17,12 +17,72 @@ class User(SQLModel, table=True):
 
 class Scan(SQLModel, table=True):
     __tablename__ = "scans"
+    __table_args__ = (
+        # Cache lookups: latest scan for a URL
+        Index("ix_scans_url_created_at", "url", text("created_at DESC")),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     url: str = Field(index=True)
     result: dict = Field(default={}, sa_column=Column(JSONB))
     score: Optional[float] = Field(default=None)
+    # Fingerprint of the candidates the scan was run on (services.coalescing.content_fingerprint)
+    content_hash: Optional[str] = Field(default=None, max_length=64)
+    # Per-chunk fingerprints and verified claims, reused by incremental rescans
+    chunks: Optional[list] = Field(default=None, sa_column=Column(JSONB))
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     user_id: Optional[UUID] = Field(default=None, foreign_key="users.id")
     user: Optional[User] = Relationship(back_populates="scans")
+
+class ClaimRecord(SQLModel, table=True):
+    """One verified claim of a scan, copied out of Scan.result for querying."""
+    __tablename__ = "claims"
+    __table_args__ = (
+        # Analytics: claims by category / risk over time
+        Index("ix_claims_category_risk_created_at", "category", "risk_level", text("created_at DESC")),
+        Index("ix_claims_risk_created_at", "risk_level", text("created_at DESC")),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    scan_id: UUID = Field(foreign_key="scans.id", ondelete="CASCADE", index=True)
+    claim_text: str
+    category: str  # lowercased, e.g. "health"
+    risk_level: str  # "low" | "medium" | "high"
+    explanation: Optional[str] = Field(default=None)
+    confidence: Optional[float] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+class ClaimCacheEntry(SQLModel, table=True):
+    __tablename__ = "claim_cache_entries"
+
+    key: str = Field(primary_key=True)
+    model: str
+    prompt_version: str
+    claims: list = Field(default=[], sa_column=Column(JSONB))
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    expires_at: datetime = Field(index=True)
+
+class ScanJob(SQLModel, table=True):
+    __tablename__ = "scan_jobs"
+    __table_args__ = (
+        # Claiming: runnable jobs of a status, oldest run_after first
+        Index("ix_scan_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    # queued -> running -> succeeded | queued (retry) | dead (retries exhausted)
+    status: str = Field(default="queued")
+    payload: dict = Field(default={}, sa_column=Column(JSONB))
+    progress: dict = Field(default={}, sa_column=Column(JSONB))
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    error: Optional[str] = Field(default=None)
+    run_after: datetime = Field(default_factory=datetime.utcnow)
+    lease_expires_at: Optional[datetime] = Field(default=None)
+    # New for every claim: a worker only writes to the job while it matches
+    lease_token: Optional[UUID] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    scan_id: Optional[UUID] = Field(default=None, foreign_key="scans.id")
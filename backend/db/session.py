@@ -1,18 +1,117 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from sqlmodel import SQLModel
+import asyncio
+from functools import lru_cache
+from typing import Any, Dict
+from urllib.parse import urlparse
+from uuid import uuid4
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from core.config import settings
 
-engine = create_async_engine(
-    settings.DATABASE_URL, 
-    echo=True, 
-    future=True,
-    connect_args={"statement_cache_size": 0}
-)
+# Supabase's pooler listens on 6543 in transaction mode and 5432 in session mode.
+TRANSACTION_POOLER_PORT = 6543
+SESSION_POOLER_PORT = 5432
+
+
+def uses_transaction_pooler(database_url: str, mode: str) -> bool:
+    """Whether the connection goes through a transaction-mode pooler.
+    mode: "transaction", "session" or "auto" (detect from the port)."""
+    if mode == "transaction":
+        return True
+    if mode == "session":
+        return False
+    try:
+        return urlparse(database_url).port == TRANSACTION_POOLER_PORT
+    except ValueError:
+        return False
+
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """create_async_engine keyword arguments from settings.
+
+    Behind a transaction pooler, consecutive statements may run on different
+    server connections, so named prepared statements cannot be reused or even
+    safely named twice: asyncpg's statement cache and SQLAlchemy's prepared
+    statement cache are disabled and every statement gets a unique name.
+    With a direct or session-mode connection both caches stay on.
+    """
+    options: Dict[str, Any] = {
+        "echo": settings.DB_ECHO,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if database_url.startswith("postgresql+asyncpg"):
+        if uses_transaction_pooler(database_url, settings.DB_PGBOUNCER_MODE):
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        else:
+            options["connect_args"] = {
+                "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+                "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            }
+    return options
+
+
+# Built at import but connects lazily; every server worker process imports the
+# app on its own, so each has its own pool.
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+
+# One factory per process; sessions are cheap, building a sessionmaker per request is not.
+async_session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def lock_database_url(database_url: str) -> str:
+    """URL for session-level advisory locks: DB_LOCK_DATABASE_URL, else
+    database_url moved from the transaction pooler to the session pooler port
+    (a session lock must stay on one server connection)."""
+    if settings.DB_LOCK_DATABASE_URL:
+        return settings.DB_LOCK_DATABASE_URL
+    if not uses_transaction_pooler(database_url, settings.DB_PGBOUNCER_MODE):
+        return database_url
+    parsed = urlparse(database_url)
+    if parsed.port != TRANSACTION_POOLER_PORT:
+        return database_url
+    netloc = parsed.netloc[:-len(str(TRANSACTION_POOLER_PORT))] + str(SESSION_POOLER_PORT)
+    return parsed._replace(netloc=netloc).geturl()
+
+
+@lru_cache(maxsize=1)
+def lock_engine() -> AsyncEngine:
+    """Small pool of its own for advisory locks (COALESCE_MODE="advisory"), so a
+    held lock never takes a connection the locked work needs. Autocommit: a lock
+    holder is idle, not idle in transaction. Built on first use."""
+    url = lock_database_url(settings.DATABASE_URL)
+    options = {
+        **engine_options(url),
+        "pool_size": settings.DB_LOCK_POOL_SIZE,
+        "max_overflow": settings.DB_LOCK_POOL_SIZE,
+        "isolation_level": "AUTOCOMMIT",
+    }
+    return create_async_engine(url, **options)
+
+
+async def warm_pool(connections: int) -> None:
+    """Opens `connections` pooled connections at startup (up to DB_POOL_SIZE)."""
+    async def ping() -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(min(connections, settings.DB_POOL_SIZE))))
+
+
+async def dispose_engine() -> None:
+    """Closes the pool's connections; called once in-flight work has drained."""
+    await engine.dispose()
+    if lock_engine.cache_info().currsize:
+        await lock_engine().dispose()
+
 
 async def get_session() -> AsyncSession:
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with async_session() as session:
+    async with async_session_factory() as session:
         yield session
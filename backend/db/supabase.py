@@ -1,9 +1,11 @@
+from functools import lru_cache
+
 from supabase import create_client, Client
 from core.config import settings
 
+@lru_cache(maxsize=1)
 def get_supabase() -> Client:
+    """The process's Supabase client, created on first use."""
     url: str = settings.SUPABASE_URL
     key: str = settings.SUPABASE_KEY
     return create_client(url, key)
-
-supabase: Client = get_supabase()
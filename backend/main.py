@@ -1,11 +1,66 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipMiddleware
 from core.config import settings
+from core.logging import configure_logging, get_logger
+from api.middleware import TimingHeadersMiddleware
 from api.routes import router as api_router
+from db.session import dispose_engine, warm_pool
+from services.ai_pipeline import close_llm_clients, warm_llm_clients
+from services.chunking import count_tokens
+from services.claim_memory import claim_memory
+from services.jobs import job_workers
+from services.lifecycle import scans_in_flight
+from services.metrics import registry
+
+configure_logging()
+logger = get_logger("main")
+
+async def warm_up() -> None:
+    """Builds this worker's LLM clients, tokenizer and first DB connections so
+    the first requests do not pay for them."""
+    clients = warm_llm_clients()
+    count_tokens("warm up")
+    try:
+        await asyncio.wait_for(warm_pool(settings.DB_WARMUP_CONNECTIONS), settings.DB_POOL_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning(f"DB Warmup Error: {e}")
+    logger.info("Worker warmed up", extra={"llm_clients": clients})
+
+async def shut_down() -> None:
+    """Lets in-flight scans finish (up to SHUTDOWN_DRAIN_SECONDS), then releases
+    the worker's resources. The server has stopped accepting requests by now."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.SHUTDOWN_DRAIN_SECONDS
+    # In-process workers for POST /scan/jobs: stop claiming, let running jobs finish
+    await job_workers.stop(timeout=max(0.0, deadline - loop.time()))
+    if not await scans_in_flight.drain(max(0.0, deadline - loop.time())):
+        logger.warning(f"Shutdown: {scans_in_flight.count} scans still running after drain timeout")
+    # Persist the semantic claim memory (no-op without CLAIM_MEMORY_PATH)
+    try:
+        claim_memory.save()
+    except Exception as e:
+        logger.warning(f"Claim Memory Save Error: {e}")
+    await close_llm_clients()
+    await dispose_engine()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up()
+    # JOB_WORKERS=0 to run the job workers elsewhere
+    if settings.JOB_WORKERS > 0:
+        job_workers.start()
+    yield
+    await shut_down()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -15,10 +70,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "X-LLM-Calls", "X-LLM-Prompt-Tokens", "X-LLM-Completion-Tokens"],
 )
 
+# Per-response stage timings and token counts (off by default)
+if settings.TIMING_HEADERS_ENABLED:
+    app.add_middleware(TimingHeadersMiddleware)
+
+# Response compression. Event streams and NDJSON are left alone so each
+# event/line still goes out as soon as it is written.
+STREAMING_CONTENT_TYPES = DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/x-ndjson",)
+if settings.COMPRESSION == "br":
+    try:
+        # Optional dependency (brotli-asgi); negotiates br and falls back to gzip
+        from brotli_asgi import BrotliMiddleware
+        app.add_middleware(BrotliMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE,
+                           excluded_handlers=["/scan/page/stream", "/scan/batch"])
+    except ImportError:
+        logger.warning("COMPRESSION=br needs brotli-asgi; using gzip")
+        app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE,
+                           exclude_content_types=STREAMING_CONTENT_TYPES)
+elif settings.COMPRESSION == "gzip":
+    app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE,
+                       exclude_content_types=STREAMING_CONTENT_TYPES)
+
 @app.get("/")
 async def root():
     return {"message": "LieSpy API is running", "docs": "/docs"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of pipeline, LLM and cache metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -0,0 +1,51 @@
+"""
+Production entry point: WEB_CONCURRENCY uvicorn worker processes on
+uvloop/httptools (when installed, see uvicorn[standard]).
+
+Each worker imports the app on its own and builds its own LLM clients, DB pool
+and job workers, warmed up before it accepts requests (main.lifespan). On
+SIGTERM the server stops accepting connections, waits up to
+SHUTDOWN_DRAIN_SECONDS for open requests, then the lifespan drains in-flight
+scans and jobs before the process exits.
+
+Workers share nothing in memory. LLM_REQUESTS_PER_MINUTE and
+LLM_TOKENS_PER_MINUTE are split evenly across them (services.llm_scheduler),
+but the in-process caches, the claim memory and COALESCE_MODE="local" only
+cover their own worker: use COALESCE_MODE="advisory" to coalesce scans of the
+same page across workers.
+
+Usage (from backend/):
+    python serve.py
+    WEB_CONCURRENCY=4 PORT=8080 python serve.py
+"""
+import importlib.util
+
+import uvicorn
+
+from core.config import settings, web_workers
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options() -> dict:
+    """uvicorn.run keyword arguments from settings."""
+    return {
+        "host": settings.HOST,
+        "port": settings.PORT,
+        "workers": web_workers(),
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "timeout_keep_alive": settings.KEEPALIVE_TIMEOUT_SECONDS,
+        "timeout_graceful_shutdown": int(settings.SHUTDOWN_DRAIN_SECONDS),
+        # Behind the platform's proxy: client address and scheme from X-Forwarded-*
+        "proxy_headers": True,
+        "forwarded_allow_ips": "*",
+        # The app logs through core.logging; keep uvicorn's own access log off
+        "access_log": False,
+    }
+
+
+if __name__ == "__main__":
+    uvicorn.run("main:app", **server_options())
@@ -1,34 +1,50 @@
-from typing import List, Dict, Any, TypedDict
-from langchain_core.messages import SystemMessage, HumanMessage
+from typing import List, Dict, Any, TypedDict, AsyncIterator, Optional, Type
+from pydantic import BaseModel
 from api.schemas import ScanResult, Claim
 
 import json
 import asyncio
-from langchain_openai import ChatOpenAI
+import time
+from contextlib import aclosing
 from core.config import settings
-
-# Initialize Real LLM
-llm = ChatOpenAI(
-    api_key=settings.OPENAI_API_KEY,
-    base_url=settings.LLM_BASE_URL,
-    model=settings.LLM_MODEL,
-    temperature=0.1
+from core.logging import get_logger
+from services.claim_cache import claim_cache, make_cache_key, normalize_text
+from services.claim_memory import claim_memory
+from services.llm_scheduler import llm_scheduler, estimate_tokens
+from services.llm_backends import create_llm
+from services.extraction import extract_main_text
+from services.chunking import iter_chunks, dedupe_claims
+from services.scoring import score_claims
+from services.prefilter import prefilter_chunk, record_decision, record_shadow_miss
+from services.verify_batcher import VerifyBatcher, VerifyItem
+from services.lifecycle import scans_in_flight
+from services.metrics import timed_stage, stage_timer, start_trace, finish_scan_trace, current_stage, registry
+from services.llm_router import (
+    AdmitCallback, LLMClientPool, RouteTarget, current_route, hedged, is_default_target, record_answer, route_chain,
+    route_stats, routes_signature, track_answers, use_route,
+)
+from services.structured_output import (
+    IdentifiedClaims, VerifiedClaims, BatchClaimResult, BatchVerifiedClaims, AggregateVerdict, SummaryText,
+    response_format_for, parse_items, repair_prompt,
 )
 
-# --- Utilities ---
+logger = get_logger("pipeline")
 
-def split_text(text: str, chunk_size: int = 20000, overlap: int = 500) -> List[str]:
-    """Splits text into larger chunks for processing."""
-    if not text:
-        return []
-    chunks = []
-    start = 0
-    text_len = len(text)
-    while start < text_len:
-        end = start + chunk_size
-        chunks.append(text[start:end])
-        start = end - overlap
-    return chunks
+# Bump whenever the identify/verify prompts change so cached claims are not reused.
+PROMPT_VERSION = "v1"
+
+# Configured backend: the provider, or the offline fake (LLM_BACKEND=fake).
+# `llm` serves the default target; routed stages get pooled clients (LLM_ROUTES).
+# Both are built on first use, so each server worker process creates its own
+# (warm_llm_clients builds them at startup).
+llm: Any = None
+llm_pool = LLMClientPool(create_llm)
+
+SCAN_PARTIAL = registry.counter(
+    "liespy_scan_partial_total", "Page scans returned partial (failed or late chunks left out).")
+VERIFY_BATCH_UNANSWERED = registry.counter(
+    "liespy_verify_batch_unanswered_claims_total",
+    "Batched claims left without a verdict by the model (the answer is taken as final).")
 
 # --- Agencies ---
 
@@ -63,8 +79,30 @@ def extract_json(text: str) -> Dict[str, Any]:
 
 # --- Agencies ---
 
-async def extract_content(candidates: List[str]) -> str:
-    """Extracts clean text from raw HTML/candidates."""
+@timed_stage("extraction")
+async def extract_content(candidates: List[str], mode: Optional[str] = None) -> str:
+    """Extracts clean text from raw HTML/candidates.
+    mode (default settings.EXTRACTION_MODE):
+    - "local": deterministic boilerplate stripper only, no LLM call
+    - "auto": local stripper, LLM pass only when its confidence is low
+    - "llm": LLM pass only"""
+    if not candidates:
+        return ""
+
+    mode = mode or settings.EXTRACTION_MODE
+    if mode in ("local", "auto"):
+        local = extract_main_text(candidates)
+        if mode == "local" or local["confidence"] >= settings.EXTRACTION_MIN_CONFIDENCE:
+            return local["text"]
+        logger.info(
+            f"Local extraction confidence {local['confidence']} below threshold, falling back to LLM.",
+            extra={"confidence": local["confidence"]},
+        )
+
+    return await extract_content_llm(candidates)
+
+async def extract_content_llm(candidates: List[str]) -> str:
+    """Extracts clean text from raw HTML/candidates with an LLM pass."""
     if not candidates:
         return ""
         
@@ -80,33 +118,160 @@ async def extract_content(candidates: List[str]) -> str:
     try:
         # We process extraction on the first X chars to avoid blowing context if it's huge, 
         # but realistically the client sends decent candidates.
-        response = await llm.ainvoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"RAW TEXT:\\n{full_text[:50000]}") 
-        ])
+        response = await invoke_with_retry(chat_messages(
+            system_prompt,
+            f"RAW TEXT:\\n{full_text[:50000]}"
+        ))
         return response.content
     except Exception as e:
-        print(f"Extraction Error: {e}")
+        logger.warning(f"Extraction Error: {e}")
         return full_text[:20000]
 
+# Set once the provider rejects `response_format`; later calls go without it.
+structured_output_rejected = False
+
+def chat_messages(system: str, human: str) -> List[Any]:
+    """A system + user prompt. langchain_core is imported on first use, not with
+    the module, so importing the app stays fast."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+    return [SystemMessage(content=system), HumanMessage(content=human)]
+
+def default_llm():
+    global llm
+    if llm is None:
+        llm = create_llm()
+    return llm
+
+def client_for(target: RouteTarget):
+    return default_llm() if is_default_target(target) else llm_pool.get(target)
+
+def warm_llm_clients() -> int:
+    """Builds the default client and those of every configured route; returns the count."""
+    targets = [target for route in [None] + list(settings.LLM_ROUTES) for target in route_chain(route)]
+    return len({id(client_for(target)) for target in targets})
+
+async def close_llm_clients() -> None:
+    """Closes the HTTP connections of every client built in this process."""
+    clients = ([llm] if llm is not None else []) + llm_pool.clients()
+    for client in clients:
+        # ChatOpenAI keeps an AsyncOpenAI client; the fake backend has nothing to close
+        close = getattr(getattr(client, "root_async_client", None), "close", None)
+        if close is None:
+            continue
+        try:
+            await close()
+        except Exception as e:
+            logger.warning(f"LLM Client Close Error: {e}")
+
+async def invoke_target(target: RouteTarget, messages, schema: Optional[Type[BaseModel]] = None,
+                        on_admit: Optional[AdmitCallback] = None):
+    """One call to `target` through the process-wide scheduler, which applies the
+    rate/concurrency limits, request priority and jittered backoff on 429s.
+    With `schema` the provider is asked for JSON matching it (STRUCTURED_OUTPUT_MODE).
+    on_admit is passed on to LLMScheduler.run."""
+    global structured_output_rejected
+    client = client_for(target)
+    tokens = estimate_tokens(messages)
+
+    def call(**kwargs):
+        return asyncio.wait_for(client.ainvoke(messages, **kwargs), target["timeout"])
+
+    response_format = None
+    if schema is not None and not structured_output_rejected:
+        response_format = response_format_for(schema, settings.STRUCTURED_OUTPUT_MODE)
+    if response_format is None:
+        return await llm_scheduler.run(call, tokens, on_admit=on_admit)
+
+    try:
+        return await llm_scheduler.run(lambda: call(response_format=response_format), tokens, on_admit=on_admit)
+    except Exception as e:
+        if "response_format" not in str(e):
+            raise
+        structured_output_rejected = True
+        logger.warning(f"Provider rejected response_format, continuing without structured output: {e}")
+        return await llm_scheduler.run(call, tokens, on_admit=on_admit)
+
 # Helper for retries
-async def invoke_with_retry(messages, max_retries=3):
-    """Invokes LLM with exponential backoff for rate limits."""
-    for attempt in range(max_retries):
+async def invoke_with_retry(messages, schema: Optional[Type[BaseModel]] = None):
+    """Invokes the model routed for the current stage (LLM_ROUTES), moving down
+    the route's fallback chain when a call fails or times out. Slow calls on
+    hedged stages get a duplicate request (see llm_router.hedged).
+    Latencies recorded per route count from scheduler admission, so time spent
+    queued for rate budget does not feed the hedge delay percentile."""
+    route = current_route(current_stage.get())
+    chain = route_chain(route)
+    for i, target in enumerate(chain):
+        admitted = [time.monotonic()]
+
+        async def attempt(on_admit: AdmitCallback):
+            # The latency of each call (primary or hedge) from its own admission
+            call_admitted = [time.monotonic()]
+
+            def admit(admitted_at: Optional[float]) -> None:
+                if admitted_at is not None:
+                    call_admitted[0] = admitted[0] = admitted_at
+                on_admit(admitted_at)
+
+            response = await invoke_target(target, messages, schema, admit)
+            return response, time.monotonic() - call_admitted[0]
+
         try:
-            return await llm.ainvoke(messages)
+            response, elapsed = await hedged(
+                attempt,
+                route_stats.hedge_delay(route, target["model"]),
+                lambda winner: route_stats.record_hedge(route, target["model"], winner),
+            )
         except Exception as e:
-            if "rate_limit" in str(e).lower() or "429" in str(e):
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt # 1s, 2s, 4s
-                    print(f"Rate limit hit. Retrying in {wait_time}s...")
-                    await asyncio.sleep(wait_time)
-                    continue
-            raise e
-    raise Exception("Max retries exceeded")
-
-async def identify_claims_in_chunk(chunk: str) -> List[str]:
-    """Identifies potential claims in a specific text chunk."""
+            route_stats.record(route, target["model"], "error", time.monotonic() - admitted[0])
+            if i == len(chain) - 1:
+                raise
+            route_stats.record_fallback(route, target["model"])
+            logger.warning(
+                f"LLM Route Fallback ({route}: {target['model']} -> {chain[i + 1]['model']}): {e}",
+                extra={"route": route, "model": target["model"]},
+            )
+            continue
+        usage = getattr(response, "usage_metadata", None) or {}
+        route_stats.record(route, target["model"], "ok", elapsed,
+                           usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+        record_answer(target["model"])
+        return response
+
+async def parse_with_repair(content: str, key: str, item_type: Any, schema: Type[BaseModel]) -> List[Any]:
+    """Parses the `key` array of a stage response, keeping every valid item.
+    Items that are malformed or fail validation (or the whole response, if no
+    array was found) get one repair call; only what fails again is dropped.
+    Raises ValueError when nothing usable was found at all."""
+    valid, failed, found = parse_items(content, key, item_type)
+    if found and not failed:
+        return valid
+
+    broken = "\n".join(failed) if found else content[:settings.JSON_REPAIR_MAX_CHARS]
+    if not settings.JSON_REPAIR_ENABLED or not broken.strip():
+        if not found:
+            raise ValueError("No claims array found in response")
+        return valid
+
+    logger.info(
+        f"Repairing {len(failed) if found else 'unparseable'} {key} item(s)",
+        extra={"key": key, "repair_chars": len(broken)},
+    )
+    with stage_timer("repair"):
+        response = await invoke_with_retry(chat_messages(
+            repair_prompt(schema, key),
+            broken[:settings.JSON_REPAIR_MAX_CHARS]
+        ), schema)
+    repaired, still_failed, repaired_found = parse_items(response.content, key, item_type)
+    if still_failed:
+        logger.warning(f"Dropped {len(still_failed)} {key} item(s) after repair", extra={"raw_items": still_failed})
+    if not found and not repaired_found:
+        raise ValueError("No claims array found in response or repair")
+    return valid + repaired
+
+@timed_stage("identify")
+async def identify_claims_in_chunk(chunk: str, strict: bool = False) -> List[str]:
+    """Identifies potential claims in a specific text chunk.
+    With strict=True errors are re-raised instead of returning an empty list."""
     system_prompt = """
     You are an expert investigative journalist. Identify specific CLAIMS in the text that match:
     1. Health claims (cures, treatments).
@@ -118,21 +283,25 @@ async def identify_claims_in_chunk(chunk: str) -> List[str]:
     """
     
     try:
-        response = await invoke_with_retry([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"TEXT CHUNK:\\n{chunk}")
-        ])
+        response = await invoke_with_retry(chat_messages(
+            system_prompt,
+            f"TEXT CHUNK:\\n{chunk}"
+        ), IdentifiedClaims)
         
-        content = response.content.strip()
-        data = extract_json(content)
-        return data.get("claims", [])
+        return await parse_with_repair(response.content, "claims", str, IdentifiedClaims)
     except Exception as e:
-        print(f"Identification Error: {e}")
-        print(f"RAW IDENTIFICATION RESPONSE: {response.content if 'response' in locals() else 'None'}")
+        logger.warning(
+            f"Identification Error: {e}",
+            extra={"raw_response": response.content if 'response' in locals() else None},
+        )
+        if strict:
+            raise
         return []
 
-async def verify_chunk_claims(chunk: str, claims: List[str]) -> List[Dict[str, Any]]:
-    """Verifies a list of claims against their chunk context."""
+@timed_stage("verify")
+async def verify_chunk_claims(chunk: str, claims: List[str], strict: bool = False) -> List[Dict[str, Any]]:
+    """Verifies a list of claims against their chunk context.
+    With strict=True errors are re-raised instead of returning an empty list."""
     if not claims:
         return []
         
@@ -157,22 +326,173 @@ async def verify_chunk_claims(chunk: str, claims: List[str]) -> List[Dict[str, A
     """
     
     try:
-        response = await invoke_with_retry([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"CONTEXT:\\n{chunk}\\n\\nCLAIMS TO VERIFY:\\n- {claims_text}")
-        ])
+        response = await invoke_with_retry(chat_messages(
+            system_prompt,
+            f"CONTEXT:\\n{chunk}\\n\\nCLAIMS TO VERIFY:\\n- {claims_text}"
+        ), VerifiedClaims)
         
-        content = response.content.strip()
-        data = extract_json(content)
-        return data.get("verified_claims", [])
+        return await parse_with_repair(response.content, "verified_claims", Claim, VerifiedClaims)
+    except Exception as e:
+        logger.warning(
+            f"Verification Error: {e}",
+            extra={"raw_response": response.content if 'response' in locals() else None},
+        )
+        if strict:
+            raise
+        return []
+
+
+async def verify_claims_batch(items: List[VerifyItem]) -> List[List[Dict[str, Any]]]:
+    """One verify call for claims from several chunks (see VerifyBatcher).
+    Each group carries only the context window around its claims. Returns the
+    verified claims per item, in order; a single item uses the plain verify prompt."""
+    if len(items) == 1:
+        return [await verify_chunk_claims(items[0]["context"], items[0]["claims"], strict=True)]
+
+    groups = []
+    for g, item in enumerate(items, start=1):
+        claims_text = "\n".join(f"- [{g}.{n}] {claim}" for n, claim in enumerate(item["claims"], start=1))
+        groups.append(f"GROUP {g}\nCONTEXT:\n{item['context']}\nCLAIMS TO VERIFY:\n{claims_text}")
+
+    system_prompt = """
+    You are an expert fact-checker. The input has several GROUPS, each taken from a different webpage section.
+    Analyze each group's claims based ONLY on that group's context.
+    For each claim, determine if it is Misleading, Scam, or Legitimate.
+    
+    Return a JSON object with key "verified_claims", one entry per claim, using the claim's id (e.g. "2.1"):
+    {
+        "verified_claims": [
+            {
+                "id": "1.1",
+                "text": "Claim text",
+                "risk_level": "low" | "medium" | "high",
+                "category": "Health" | "Financial" | "Urgency" | "Trust",
+                "explanation": "Brief explanation...",
+                "confidence": 0.0 to 1.0
+            }
+        ]
+    }
+    """
+
+    with stage_timer("verify"):
+        response = await invoke_with_retry(chat_messages(
+            system_prompt,
+            "\n\n".join(groups)
+        ), BatchVerifiedClaims)
+        verified = await parse_with_repair(response.content, "verified_claims", BatchClaimResult, BatchVerifiedClaims)
+
+    results: List[List[Dict[str, Any]]] = [[] for _ in items]
+    answered = [set() for _ in items]
+    unmapped = 0
+    for claim in verified:
+        group, n = _batch_claim_position(items, claim.pop("id", None) or "", claim["text"])
+        if group is None:
+            unmapped += 1
+            continue
+        results[group].append(claim)
+        if n is not None:
+            answered[group].add(n)
+
+    missing = {
+        g: [claim for n, claim in enumerate(item["claims"]) if n not in answered[g]]
+        for g, item in enumerate(items)
+    }
+    missing = {g: claims for g, claims in missing.items() if claims}
+    if not missing:
+        return results
+
+    # The prompt lets the model drop claims, so a short answer is normally final.
+    # Only when some verdicts could not be mapped back (no usable id, no matching
+    # text) are the claims left without a verdict verified once more, on their own.
+    if not unmapped:
+        VERIFY_BATCH_UNANSWERED.inc(sum(len(claims) for claims in missing.values()))
+        return results
+
+    logger.info(f"Re-verifying {sum(len(claims) for claims in missing.values())} unmapped batched claims",
+                extra={"groups": len(items), "short_groups": len(missing), "unmapped_verdicts": unmapped})
+    retried = await asyncio.gather(*[
+        verify_chunk_claims(items[g]["context"], claims, strict=True) for g, claims in missing.items()
+    ])
+    for g, claims in zip(missing, retried):
+        results[g].extend(claims)
+    return results
+
+def _batch_claim_position(items: List[VerifyItem], claim_id: str, text: str):
+    """(group, claim) indexes of a batched verdict, from its "g.n" id or else its
+    text. claim is None when only the group is known; group is None when neither is."""
+    group, _, number = claim_id.strip("[] ").partition(".")
+    g = int(group) - 1 if group.isdigit() and 1 <= int(group) <= len(items) else None
+    if g is not None and number.isdigit() and 1 <= int(number) <= len(items[g]["claims"]):
+        return g, int(number) - 1
+    target = normalize_text(text)
+    for candidate in ([g] if g is not None else range(len(items))):
+        for n, claim in enumerate(items[candidate]["claims"]):
+            if normalize_text(claim) == target:
+                return candidate, n
+    return g, None
+
+verify_batcher = VerifyBatcher(
+    verify_claims_batch,
+    max_tokens=settings.VERIFY_BATCH_MAX_TOKENS,
+    max_wait=settings.VERIFY_BATCH_MAX_WAIT_MS / 1000.0,
+    max_items=settings.VERIFY_BATCH_MAX_ITEMS,
+    context_sentences=settings.VERIFY_CONTEXT_SENTENCES,
+)
+
+
+@timed_stage("single_pass")
+async def identify_and_verify_chunk(chunk: str, strict: bool = False) -> List[Dict[str, Any]]:
+    """Single-pass mode: finds and verifies claims in one LLM call, so the chunk
+    is sent (and paid for) once instead of twice.
+    With strict=True errors are re-raised instead of returning an empty list."""
+    system_prompt = """
+    You are an expert investigative journalist and fact-checker. Find specific CLAIMS in the text that match:
+    1. Health claims (cures, treatments).
+    2. Financial claims (money making, returns).
+    3. Urgency claims (limited time).
+    4. Trust/Authority claims (endorsements).
+    
+    Quote the EXACT sentence for each claim, then judge it against the rest of the text:
+    is it Misleading, Scam, or Legitimate?
+    
+    Return a JSON object with key "verified_claims" (an empty list if there are no claims):
+    {
+        "verified_claims": [
+            {
+                "text": "Exact claim sentence",
+                "risk_level": "low" | "medium" | "high",
+                "category": "Health" | "Financial" | "Urgency" | "Trust",
+                "explanation": "Brief explanation...",
+                "confidence": 0.0 to 1.0
+            }
+        ]
+    }
+    """
+    
+    try:
+        response = await invoke_with_retry(chat_messages(
+            system_prompt,
+            f"TEXT CHUNK:\n{chunk}"
+        ), VerifiedClaims)
+        
+        return await parse_with_repair(response.content, "verified_claims", Claim, VerifiedClaims)
     except Exception as e:
-        print(f"Verification Error: {e}")
-        print(f"RAW VERIFICATION RESPONSE: {response.content if 'response' in locals() else 'None'}")
+        logger.warning(
+            f"Single-pass Error: {e}",
+            extra={"raw_response": response.content if 'response' in locals() else None},
+        )
+        if strict:
+            raise
         return []
 
 
-async def analyze_aggregated_results(all_claims: List[Dict[str, Any]], full_text_summary: str) -> ScanResult:
-    """Calculates final score and summary based on all verified claims."""
+@timed_stage("aggregation")
+async def analyze_aggregated_results(all_claims: List[Dict[str, Any]], full_text_summary: str, mode: Optional[str] = None) -> ScanResult:
+    """Calculates final score and summary based on all verified claims.
+    mode (default settings.AGGREGATION_MODE):
+    - "local": deterministic scoring with a templated summary, no LLM call
+      (an LLM summary can be generated later with summarize_with_llm)
+    - "llm": one LLM call for score, risk and summary"""
     
     # Validation: If no claims and no summary, we can't analyze anything.
     if not all_claims and not full_text_summary:
@@ -183,6 +503,23 @@ async def analyze_aggregated_results(all_claims: List[Dict[str, Any]], full_text
             claims=[]
         )
     
+    # Overlapping chunks report the same sentence twice; merge before scoring
+    all_claims = dedupe_claims(all_claims)
+
+    mode = mode or settings.AGGREGATION_MODE
+    if mode == "llm":
+        return await aggregate_with_llm(all_claims, full_text_summary)
+
+    score = score_claims(all_claims)
+    return ScanResult(
+        page_risk=score["page_risk"],
+        trust_score=score["trust_score"],
+        summary=score["summary"],
+        claims=all_claims
+    )
+
+async def aggregate_with_llm(all_claims: List[Dict[str, Any]], full_text_summary: str) -> ScanResult:
+    """Asks the LLM for trust_score, page_risk and summary over the verified claims."""
     claims_dump = json.dumps(all_claims, indent=2)
     
     system_prompt = """
@@ -202,10 +539,10 @@ async def analyze_aggregated_results(all_claims: List[Dict[str, Any]], full_text
     """
     
     try:
-        response = await llm.ainvoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"VERIFIED CLAIMS:\\n{claims_dump}\\n\\nPAGE CONTEXT SUMMARY:\\n{full_text_summary[:5000]}")
-        ])
+        response = await invoke_with_retry(chat_messages(
+            system_prompt,
+            f"VERIFIED CLAIMS:\\n{claims_dump}\\n\\nPAGE CONTEXT SUMMARY:\\n{full_text_summary[:5000]}"
+        ), AggregateVerdict)
         
         content = response.content.strip()
         data = extract_json(content)
@@ -218,8 +555,10 @@ async def analyze_aggregated_results(all_claims: List[Dict[str, Any]], full_text
             claims=all_claims
         )
     except Exception as e:
-        print(f"Aggregation Error: {e}")
-        print(f"RAW AGGREGATION RESPONSE: {response.content if 'response' in locals() else 'None'}")
+        logger.warning(
+            f"Aggregation Error: {e}",
+            extra={"raw_response": response.content if 'response' in locals() else None},
+        )
         return ScanResult(
             page_risk="unknown",
             trust_score=50,
@@ -227,40 +566,317 @@ async def analyze_aggregated_results(all_claims: List[Dict[str, Any]], full_text
             claims=all_claims
         )
 
+@timed_stage("summary")
+async def summarize_with_llm(result: ScanResult, full_text_summary: str = "") -> str:
+    """Writes an LLM summary for an already scored result (the lazy counterpart of
+    the templated summary). Returns the existing summary if the call fails."""
+    claims_dump = json.dumps([c.model_dump() for c in result.claims], separators=(",", ":"))
+    
+    system_prompt = """
+    You are the Chief Risk Officer. A webpage scan has already been scored.
+    Write a short 'summary' (max 2 sentences) explaining the verdict to a consumer.
+    
+    Return a JSON object: {"summary": "This page contains..."}
+    """
+    
+    try:
+        response = await invoke_with_retry(chat_messages(
+            system_prompt,
+            (
+                f"PAGE RISK: {result.page_risk}\nTRUST SCORE: {result.trust_score}\n\n"
+                f"VERIFIED CLAIMS:\n{claims_dump}\n\nPAGE CONTEXT SUMMARY:\n{full_text_summary[:2000]}"
+            )
+        ), SummaryText)
+        
+        content = response.content.strip()
+        data = extract_json(content)
+        return data.get("summary") or result.summary
+    except Exception as e:
+        logger.warning(
+            f"Summary Error: {e}",
+            extra={"raw_response": response.content if 'response' in locals() else None},
+        )
+        return result.summary
+
 
 # --- Orchestrator ---
 
-async def process_chunk(chunk: str) -> List[Dict[str, Any]]:
-    """Pipeline for a single chunk: Identify -> Verify."""
-    claims = await identify_claims_in_chunk(chunk)
+def result_routes(mode: Optional[str] = None) -> List[str]:
+    """The routes whose models produce a chunk's verified claims in `mode`."""
+    mode = mode or settings.PIPELINE_MODE
+    routes = ["single_pass"] if mode == "single_pass" else ["identify", "verify"]
+    if mode != "single_pass" and settings.LLM_ESCALATION_CONFIDENCE > 0:
+        routes.append("escalation")
+    return routes + ["repair"]
+
+def chunk_fingerprint(chunk: str, mode: Optional[str] = None) -> str:
+    """Identifies a chunk's verified claims: normalized content, the routed models
+    (primary model and endpoint of each route in result_routes), prompt version
+    and pipeline mode (the claim cache key)."""
+    mode = mode or settings.PIPELINE_MODE
+    return make_cache_key(chunk, routes_signature(result_routes(mode)), f"{PROMPT_VERSION}:{mode}")
+
+async def verify_with_memory(chunk: str, claims: List[str]) -> List[Dict[str, Any]]:
+    """Verify step of two-stage mode. Claims close to one verified before reuse its
+    verdict (settings.CLAIM_MEMORY_ENABLED); the rest are verified (batched if
+    enabled) and added to the memory."""
+    remembered: List[Dict[str, Any]] = []
+    if claims and settings.CLAIM_MEMORY_ENABLED:
+        with stage_timer("memory"):
+            matches = await claim_memory.lookup(claims)
+        remembered = [match for match in matches if match is not None]
+        claims = [claim for claim, match in zip(claims, matches) if match is None]
     if not claims:
+        return remembered
+
+    if settings.VERIFY_BATCHING_ENABLED:
+        verified = await verify_batcher.verify(chunk, claims)
+    else:
+        verified = await verify_chunk_claims(chunk, claims, strict=True)
+    if settings.LLM_ESCALATION_CONFIDENCE > 0:
+        verified = await escalate_low_confidence(chunk, verified)
+    if settings.CLAIM_MEMORY_ENABLED:
+        with stage_timer("memory"):
+            await claim_memory.add(verified)
+    return remembered + verified
+
+async def escalate_low_confidence(chunk: str, verified: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Re-verifies claims below LLM_ESCALATION_CONFIDENCE on the "escalation"
+    route, so verify can run on a cheap model and only unsure verdicts reach the
+    strong one. Keeps the first verdicts if escalation fails."""
+    low = [claim for claim in verified if claim.get("confidence", 0.0) < settings.LLM_ESCALATION_CONFIDENCE]
+    if not low:
+        return verified
+    try:
+        with use_route("escalation"):
+            escalated = await verify_chunk_claims(chunk, [claim["text"] for claim in low], strict=True)
+    except Exception:
+        return verified
+    kept = [claim for claim in verified if claim not in low]
+    return kept + escalated
+
+async def process_chunk(chunk: str, mode: Optional[str] = None, strict: bool = False) -> List[Dict[str, Any]]:
+    """Pipeline for a single chunk: Pre-filter -> Cache -> Identify -> Claim memory -> Verify.
+    mode (default settings.PIPELINE_MODE): "two_stage" (identify, then verify)
+    or "single_pass" (one fused call).
+    With strict=True a failed stage re-raises instead of returning an empty list."""
+    mode = mode or settings.PIPELINE_MODE
+
+    # Chunks without any claim signal never reach the LLM (settings.PREFILTER_MODE);
+    # in "shadow" mode they still do, and the decision is only checked afterwards
+    shadow = settings.PREFILTER_MODE == "shadow"
+    would_skip = None
+    if settings.PREFILTER_MODE != "off":
+        with stage_timer("prefilter"):
+            filtered = prefilter_chunk(chunk)
+        record_decision(chunk, filtered, shadow)
+        if shadow:
+            would_skip = None if filtered["keep"] else filtered
+        elif not filtered["keep"]:
+            return []
+        else:
+            chunk = filtered["text"]
+    prompt_version = f"{PROMPT_VERSION}:{mode}"
+
+    cache_key = None
+    if settings.CLAIM_CACHE_ENABLED:
+        cache_key = chunk_fingerprint(chunk, mode)
+        cached = await claim_cache.get(cache_key)
+        if cached is not None:
+            if would_skip and cached:
+                record_shadow_miss(chunk, would_skip, cached)
+            return cached
+
+    try:
+        with track_answers() as answered:
+            if mode == "single_pass":
+                verified = await identify_and_verify_chunk(chunk, strict=True)
+            else:
+                claims = await identify_claims_in_chunk(chunk, strict=True)
+                verified = await verify_with_memory(chunk, claims)
+    except Exception:
+        # Already logged by the stage; failures are never cached.
+        if strict:
+            raise
         return []
-    verified = await verify_chunk_claims(chunk, claims)
+
+    if cache_key is not None:
+        # Stored with the models that actually answered (fallbacks included)
+        model = ",".join(sorted(answered)) or route_chain(result_routes(mode)[0])[0]["model"]
+        await claim_cache.put(cache_key, model, prompt_version, verified)
+    if would_skip and verified:
+        record_shadow_miss(chunk, would_skip, verified)
     return verified
 
-async def run_page_scan(candidates: List[str], metadata: Dict[str, str] = {}, indicators: List[str] = []) -> ScanResult:
+class ScanEvent(TypedDict):
+    """A progress event emitted by stream_page_scan.
+    event is one of: extraction, chunk, aggregation, result."""
+    event: str
+    data: Dict[str, Any]
+
+class ChunkRecord(TypedDict):
+    """Stored per chunk with each Scan (Scan.chunks) for incremental rescans.
+    fingerprint is None when the chunk failed, so it is never reused."""
+    fingerprint: Optional[str]
+    claims: List[Dict[str, Any]]
+
+class PreviousScan(TypedDict):
+    """The last stored scan of a page: its result and chunk records."""
+    result: Dict[str, Any]
+    chunks: List[ChunkRecord]
+
+def _claims_signature(claims: List[Dict[str, Any]]) -> str:
+    return json.dumps(claims, sort_keys=True, default=str)
+
+async def stream_page_scan(candidates: List[str], metadata: Dict[str, str] = {}, indicators: List[str] = [], extraction_mode: Optional[str] = None, previous: Optional[PreviousScan] = None, scan_deadline: Optional[float] = None) -> AsyncIterator[ScanEvent]:
+    """Runs the page pipeline, yielding an event per stage and per finished chunk.
+    The last event is always "result" with the final ScanResult under data["result"]
+    and the chunk records to store with it under data["chunks"].
+    With `previous` (an earlier scan of the page), chunks whose fingerprint is
+    unchanged reuse their stored claims, and aggregation is skipped when the
+    merged claim list is the same as before.
+    Chunks that fail or miss CHUNK_DEADLINE_SECONDS, and all chunks still running
+    after `scan_deadline` seconds (default SCAN_DEADLINE_SECONDS, 0 = none), are
+    left out: the result is then marked partial with their indexes in missing_chunks.
+    Stage timings and token counts go to the scan's trace (see services.metrics).
+    Running scans are counted in scans_in_flight, which shutdown waits on."""
+    with scans_in_flight.track():
+        async with aclosing(_stream_page_scan(candidates, metadata, indicators, extraction_mode, previous, scan_deadline)) as events:
+            async for scan_event in events:
+                yield scan_event
+
+async def _stream_page_scan(candidates: List[str], metadata: Dict[str, str], indicators: List[str], extraction_mode: Optional[str], previous: Optional[PreviousScan], scan_deadline: Optional[float] = None) -> AsyncIterator[ScanEvent]:
+    trace = start_trace()
+    loop = asyncio.get_running_loop()
+    scan_deadline = settings.SCAN_DEADLINE_SECONDS if scan_deadline is None else scan_deadline
+    deadline = loop.time() + scan_deadline if scan_deadline > 0 else None
+    mode = settings.PIPELINE_MODE
+    reusable = {
+        record["fingerprint"]: record["claims"]
+        for record in (previous or {}).get("chunks") or []
+        if record.get("fingerprint")
+    }
+
     # 1. Extract clean text
-    clean_text = await extract_content(candidates)
+    clean_text = await trace.run(extract_content(candidates, extraction_mode))
     
-    # 2. Split into chunks
-    chunks = split_text(clean_text)
-    print(f"Split content into {len(chunks)} chunks.")
+    # 2. Split into token-budgeted chunks; tasks start as the generator yields them.
+    # Chunks unchanged since the previous scan are not processed again.
+    async def indexed(index: int, chunk: str):
+        try:
+            return index, await asyncio.wait_for(
+                process_chunk(chunk, strict=True), settings.CHUNK_DEADLINE_SECONDS or None), True
+        except asyncio.TimeoutError:
+            logger.warning(f"Chunk {index} missed its deadline", extra={"chunk": index})
+            return index, [], False
+        except Exception:
+            return index, [], False
+
+    records: List[ChunkRecord] = []
+    reused: List[int] = []
+    tasks = []
+    for i, chunk in enumerate(iter_chunks(clean_text)):
+        fingerprint = chunk_fingerprint(chunk, mode)
+        if fingerprint in reusable:
+            records.append(ChunkRecord(fingerprint=fingerprint, claims=reusable[fingerprint]))
+            reused.append(i)
+        else:
+            records.append(ChunkRecord(fingerprint=fingerprint, claims=[]))
+            tasks.append(asyncio.create_task(trace.run(indexed(i, chunk))))
+    logger.info(
+        f"Split content into {len(records)} chunks ({len(reused)} unchanged).",
+        extra={"chunks": len(records), "reused_chunks": len(reused)},
+    )
+    yield ScanEvent(event="extraction", data={
+        "chunks": len(records),
+        "reused_chunks": len(reused),
+        "characters": len(clean_text),
+    })
     
-    # 3. Parallel Processing (Identify & Verify per chunk)
-    tasks = [process_chunk(chunk) for chunk in chunks]
-    results = await asyncio.gather(*tasks)
+    # 3. Parallel Processing (Identify & Verify per chunk), reported as each chunk finishes
+    completed = 0
+    missing: List[int] = []
+    pending = {index for index, record in enumerate(records) if index not in reused}
+    try:
+        for index in reused:
+            completed += 1
+            yield ScanEvent(event="chunk", data={
+                "index": index,
+                "completed": completed,
+                "total": len(records),
+                "claims": records[index]["claims"],
+                "reused": True,
+            })
+        remaining = None if deadline is None else max(0.0, deadline - loop.time())
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=remaining):
+                index, claims, ok = await next_done
+                pending.discard(index)
+                records[index]["claims"] = claims
+                if not ok:
+                    records[index]["fingerprint"] = None
+                    missing.append(index)
+                completed += 1
+                yield ScanEvent(event="chunk", data={
+                    "index": index,
+                    "completed": completed,
+                    "total": len(records),
+                    "claims": claims,
+                    "reused": False,
+                    "missing": not ok,
+                })
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Scan deadline expired with {len(pending)} chunk(s) unfinished",
+                extra={"missing_chunks": len(pending)},
+            )
+            for index in pending:
+                records[index]["fingerprint"] = None
+            missing.extend(pending)
+    finally:
+        # Consumer went away (e.g. client disconnected): don't leave LLM calls running.
+        for task in tasks:
+            task.cancel()
     
-    # 4. Flatten Results
+    # 4. Flatten Results (in page order, not completion order)
     all_claims = []
-    for res in results:
-        all_claims.extend(res)
+    for record in records:
+        all_claims.extend(record["claims"])
+
+    previous_claims = [claim for record in (previous or {}).get("chunks") or [] for claim in record["claims"]]
+    unchanged = bool(previous and previous.get("result")) and \
+        _claims_signature(all_claims) == _claims_signature(previous_claims)
         
-    print(f"Total claims found: {len(all_claims)}")
+    missing.sort()
+    unchanged = unchanged and not missing
+
+    logger.info(f"Total claims found: {len(all_claims)}", extra={"claims": len(all_claims)})
+    yield ScanEvent(event="aggregation", data={"claims": len(all_claims), "reused": unchanged, "missing_chunks": missing})
         
-    # 5. Aggregate
-    final_result = await analyze_aggregated_results(all_claims, clean_text)
-    
-    return final_result
+    # 5. Aggregate (only when the claim set changed since the previous scan)
+    if unchanged:
+        # This scan is complete (unchanged requires no missing chunks), whatever the previous one was
+        final_result = ScanResult(**{**previous["result"], "partial": False, "missing_chunks": []})
+    else:
+        final_result = await trace.run(analyze_aggregated_results(all_claims, clean_text))
+    if missing:
+        final_result.partial = True
+        final_result.missing_chunks = missing
+        SCAN_PARTIAL.inc()
+    finish_scan_trace(trace)
+    logger.info("Scan finished", extra=trace.snapshot())
+    yield ScanEvent(event="result", data={"result": final_result, "chunks": records})
+
+async def collect_page_scan(candidates: List[str], metadata: Dict[str, str] = {}, indicators: List[str] = [], extraction_mode: Optional[str] = None, previous: Optional[PreviousScan] = None) -> Dict[str, Any]:
+    """Drains stream_page_scan; returns the data of its "result" event."""
+    result_data: Dict[str, Any] = {}
+    async for scan_event in stream_page_scan(candidates, metadata, indicators, extraction_mode, previous):
+        if scan_event["event"] == "result":
+            result_data = scan_event["data"]
+    return result_data
+
+async def run_page_scan(candidates: List[str], metadata: Dict[str, str] = {}, indicators: List[str] = [], extraction_mode: Optional[str] = None) -> ScanResult:
+    return (await collect_page_scan(candidates, metadata, indicators, extraction_mode))["result"]
 
 async def run_text_scan(text: str) -> ScanResult:
     return await run_page_scan([text])
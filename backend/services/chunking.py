@@ -0,0 +1,185 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.config import settings
+from core.logging import get_logger
+from services.claim_cache import normalize_text
+
+logger = get_logger("chunking")
+
+# --- Token counting ---
+
+# Roughly how BPE tokenizers split English: words, numbers and single symbols.
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """tiktoken's cl100k encoding when CHUNK_TOKENIZER is "tiktoken" and the
+    package and its BPE file are available, otherwise None (regex estimate)."""
+    if settings.CHUNK_TOKENIZER != "tiktoken":
+        return None
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count of `text`. Exact for OpenAI-style BPE with tiktoken; a close
+    estimate (slightly high for long words) otherwise."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(1 + len(m) // 8 for m in _TOKEN_RE.findall(text))
+
+
+def chunk_budget(model: Optional[str] = None) -> int:
+    """Per-chunk token budget for `model` (settings.CHUNK_TOKEN_BUDGETS, else the default)."""
+    model = model or settings.LLM_MODEL
+    return settings.CHUNK_TOKEN_BUDGETS.get(model, settings.CHUNK_TOKEN_BUDGET)
+
+# --- Segmentation ---
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n|\n")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?…])[\"'”’)\]]*\s+(?=[\"'“‘(\[]?[A-Z0-9])")
+
+
+def iter_sentences(text: str) -> Iterator[tuple]:
+    """Yields (sentence, starts_paragraph) lazily, without copying the text into a list."""
+    for paragraph in _iter_paragraphs(text):
+        first = True
+        sentence_start = 0
+        for boundary in _SENTENCE_END_RE.finditer(paragraph):
+            sentence = paragraph[sentence_start:boundary.start()].strip()
+            sentence_start = boundary.end()
+            if sentence:
+                yield sentence, first
+                first = False
+        sentence = paragraph[sentence_start:].strip()
+        if sentence:
+            yield sentence, first
+
+
+def _iter_paragraphs(text: str) -> Iterator[str]:
+    position = 0
+    for paragraph_break in _PARAGRAPH_RE.finditer(text):
+        yield text[position:paragraph_break.start()]
+        position = paragraph_break.end()
+    yield text[position:]
+
+
+def _split_oversized(sentence: str, max_tokens: int) -> Iterator[str]:
+    """Hard-splits a single sentence that alone exceeds the budget, on word boundaries."""
+    words = sentence.split()
+    piece: List[str] = []
+    piece_tokens = 0
+    for word in words:
+        tokens = count_tokens(word) + 1
+        if piece and piece_tokens + tokens > max_tokens:
+            yield " ".join(piece)
+            piece, piece_tokens = [], 0
+        piece.append(word)
+        piece_tokens += tokens
+    if piece:
+        yield " ".join(piece)
+
+
+def iter_chunks(text: str, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> Iterator[str]:
+    """Packs whole sentences into chunks of at most `max_tokens`.
+
+    - Paragraphs stay together where they fit; a new paragraph starts on its own line
+    - Sentences are never cut unless one alone exceeds the budget
+    - The last sentences of a chunk (up to `overlap_tokens`) are repeated at the
+      start of the next one for context; claims found twice are merged by dedupe_claims
+    """
+    if not text:
+        return
+    max_tokens = max_tokens or chunk_budget()
+    overlap_tokens = settings.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    current: List[tuple] = []  # (text, tokens, starts_paragraph)
+    current_tokens = 0
+    has_new_content = False
+
+    def render(parts):
+        out = []
+        for i, (sentence, _, starts_paragraph) in enumerate(parts):
+            if i and starts_paragraph:
+                out.append("\n")
+            elif i:
+                out.append(" ")
+            out.append(sentence)
+        return "".join(out)
+
+    for sentence, starts_paragraph in iter_sentences(text):
+        tokens = count_tokens(sentence)
+        pieces = [(sentence, tokens)] if tokens <= max_tokens else [
+            (p, count_tokens(p)) for p in _split_oversized(sentence, max_tokens)
+        ]
+        for piece, piece_tokens in pieces:
+            if current and current_tokens + piece_tokens > max_tokens:
+                yield render(current)
+                # Carry whole trailing sentences forward as overlap
+                carried: List[tuple] = []
+                carried_tokens = 0
+                for part in reversed(current):
+                    if carried_tokens + part[1] > overlap_tokens or carried_tokens + part[1] + piece_tokens > max_tokens:
+                        break
+                    carried.insert(0, part)
+                    carried_tokens += part[1]
+                current, current_tokens = carried, carried_tokens
+                has_new_content = False
+            current.append((piece, piece_tokens, starts_paragraph))
+            current_tokens += piece_tokens
+            has_new_content = True
+            starts_paragraph = False
+
+    if current and has_new_content:
+        yield render(current)
+
+# --- Claim de-duplication ---
+
+_RISK_RANK = {"high": 3, "medium": 2, "low": 1}
+
+
+def claim_key(claim: Dict[str, Any]) -> str:
+    return normalize_text(str(claim.get("text", ""))).rstrip(" .!?…\"'”’")
+
+
+def dedupe_claims(claims: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merges claims with the same normalized text (typically found in two
+    overlapping chunks), keeping the highest-risk, most confident verdict in
+    the position of the first occurrence."""
+    best: Dict[str, Dict[str, Any]] = {}
+    order: List[str] = []
+    for claim in claims:
+        if not isinstance(claim, dict):
+            # Malformed entries are left for validation to reject
+            key = f"#{len(order)}"
+            best[key] = claim
+            order.append(key)
+            continue
+        key = claim_key(claim)
+        if key not in best:
+            best[key] = claim
+            order.append(key)
+            continue
+        current = best[key]
+        if _claim_rank(claim) > _claim_rank(current):
+            best[key] = claim
+    return [best[key] for key in order]
+
+
+def _claim_rank(claim: Dict[str, Any]) -> tuple:
+    try:
+        confidence = float(claim.get("confidence", 0) or 0)
+    except (TypeError, ValueError):
+        confidence = 0.0
+    return (_RISK_RANK.get(str(claim.get("risk_level", "")).lower(), 0), confidence)
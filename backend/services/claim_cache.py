@@ -0,0 +1,207 @@
+import hashlib
+import re
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.logging import get_logger
+from db.models import ClaimCacheEntry
+from db.session import async_session_factory
+from services.metrics import registry
+
+logger = get_logger("claim_cache")
+
+# --- Keys ---
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalizes text so trivially different copies of a chunk share a key.
+    - Unicode NFKC (fancy quotes, full-width chars)
+    - Lowercased
+    - Whitespace collapsed
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def make_cache_key(text: str, model: str, prompt_version: str) -> str:
+    """Content hash of the normalized text, scoped to model and prompt version."""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt_version.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# --- Cache ---
+
+class ClaimCache:
+    """Two-tier cache of verified claims per chunk.
+
+    Tier 1 is an in-process LRU. Tier 2 is the `claim_cache_entries` table,
+    with a TTL on every row and periodic pruning down to a maximum row count.
+    Database errors never fail a scan; they are counted and treated as misses.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(
+        self,
+        memory_size: int = 2048,
+        ttl_seconds: int = 7 * 24 * 3600,
+        db_enabled: bool = True,
+        db_max_rows: int = 100000,
+    ):
+        self.memory_size = memory_size
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.db_enabled = db_enabled
+        self.db_max_rows = db_max_rows
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._writes_since_prune = 0
+        self.stats: Dict[str, int] = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "db_errors": 0,
+        }
+
+    # Memory tier
+
+    def _memory_get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        claims, expires_at = entry
+        if expires_at <= datetime.utcnow():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return claims
+
+    def _memory_put(self, key: str, claims: List[Dict[str, Any]], expires_at: datetime) -> None:
+        self._memory[key] = (claims, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    # Database tier
+
+    async def _db_get(self, key: str) -> Optional[tuple]:
+        async with async_session_factory() as session:
+            statement = select(ClaimCacheEntry.claims, ClaimCacheEntry.expires_at).where(
+                ClaimCacheEntry.key == key,
+                ClaimCacheEntry.expires_at > datetime.utcnow(),
+            )
+            row = (await session.execute(statement)).first()
+            return (row.claims, row.expires_at) if row else None
+
+    async def _db_put(self, key: str, model: str, prompt_version: str,
+                      claims: List[Dict[str, Any]], expires_at: datetime) -> None:
+        now = datetime.utcnow()
+        values = dict(
+            key=key,
+            model=model,
+            prompt_version=prompt_version,
+            claims=claims,
+            created_at=now,
+            expires_at=expires_at,
+        )
+        statement = insert(ClaimCacheEntry).values(**values).on_conflict_do_update(
+            index_elements=[ClaimCacheEntry.key],
+            set_={"claims": claims, "created_at": now, "expires_at": expires_at},
+        )
+        async with async_session_factory() as session:
+            await session.execute(statement)
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= self.PRUNE_EVERY:
+                self._writes_since_prune = 0
+                await self._db_prune(session)
+            await session.commit()
+
+    async def _db_prune(self, session: AsyncSession) -> None:
+        """Drops expired rows, then the oldest rows above the size limit."""
+        await session.execute(
+            delete(ClaimCacheEntry).where(ClaimCacheEntry.expires_at <= datetime.utcnow())
+        )
+        overflow = (
+            select(ClaimCacheEntry.key)
+            .order_by(ClaimCacheEntry.created_at.desc())
+            .offset(self.db_max_rows)
+            .scalar_subquery()
+        )
+        await session.execute(delete(ClaimCacheEntry).where(ClaimCacheEntry.key.in_(overflow)))
+
+    # Public API
+
+    async def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        claims = self._memory_get(key)
+        if claims is not None:
+            self.stats["memory_hits"] += 1
+            return claims
+
+        if self.db_enabled:
+            try:
+                row = await self._db_get(key)
+            except Exception as e:
+                self.stats["db_errors"] += 1
+                logger.warning(f"Claim Cache Read Error: {e}")
+                row = None
+            if row is not None:
+                claims, expires_at = row
+                self._memory_put(key, claims, expires_at)
+                self.stats["db_hits"] += 1
+                return claims
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, key: str, model: str, prompt_version: str, claims: List[Dict[str, Any]]) -> None:
+        expires_at = datetime.utcnow() + self.ttl
+        self._memory_put(key, claims, expires_at)
+        self.stats["writes"] += 1
+
+        if self.db_enabled:
+            try:
+                await self._db_put(key, model, prompt_version, claims, expires_at)
+            except Exception as e:
+                self.stats["db_errors"] += 1
+                logger.warning(f"Claim Cache Write Error: {e}")
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus derived hit rate, for the stats endpoint."""
+        hits = self.stats["memory_hits"] + self.stats["db_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hits": hits,
+            "lookups": lookups,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+
+claim_cache = ClaimCache(
+    memory_size=settings.CLAIM_CACHE_MEMORY_SIZE,
+    ttl_seconds=settings.CLAIM_CACHE_TTL_SECONDS,
+    db_enabled=settings.CLAIM_CACHE_DB_ENABLED,
+    db_max_rows=settings.CLAIM_CACHE_DB_MAX_ROWS,
+)
+
+registry.gauge("liespy_claim_cache_hit_ratio", "Claim cache hits / lookups since start.",
+               lambda: claim_cache.snapshot()["hit_rate"])
@@ -0,0 +1,368 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+from core.config import settings
+from core.logging import get_logger
+from services.claim_cache import normalize_text
+from services.metrics import registry
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = get_logger("claim_memory")
+
+# Semantic claim memory: verified claims are embedded and kept in a vector
+# index, so a new claim close enough to one already verified (the same scam
+# sentence reworded on another site) reuses that verdict instead of a verify call.
+#
+# - Index: brute-force cosine similarity over a NumPy matrix of unit vectors.
+#   At the default size (50k x 256 float32, ~50 MB) a lookup is one matrix
+#   product, well under the cost of any LLM call.
+# - Eviction: entries expire after CLAIM_MEMORY_TTL_SECONDS; when full, the
+#   least recently used entry is replaced.
+# - Persistence (CLAIM_MEMORY_PATH): an .npz of the vectors plus a JSON file of
+#   the verdicts, written every SAVE_EVERY additions and on shutdown. A file
+#   built with another embedder is ignored.
+#
+# Embedders (CLAIM_MEMORY_EMBEDDINGS):
+# - "local": feature hashing of content-word stems and their bigrams, numbers
+#   weighted up (so "10x" vs "2x" stays apart). No network; matches rewordings
+#   that share most of their words, not paraphrases.
+# - "openai": an embeddings endpoint (EMBEDDING_BASE_URL / EMBEDDING_MODEL);
+#   also matches paraphrases.
+# The right CLAIM_MEMORY_THRESHOLD depends on the embedder.
+#
+# Embeddings of a claim and its negation are close ("Clinically proven to ..."
+# vs "Not clinically proven to ..." score 0.91 with the local embedder), so a
+# stored verdict only matches claims of the same polarity (see is_negated).
+#
+# NumPy is imported when the first claim is embedded (or a saved index loaded),
+# so an empty memory costs nothing at startup.
+
+Embed = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+CLAIM_MEMORY_LOOKUPS = registry.counter(
+    "liespy_claim_memory_lookups_total", "Claims looked up in the semantic claim memory.", ("result",))
+
+
+# --- Polarity ---
+
+_NEGATION_RE = re.compile(r"\b(?:not|no|never|none|nothing|neither|nor|without|cannot)\b|n['\u2019]t\b")
+
+
+def is_negated(text: str) -> bool:
+    """Whether `text` carries an odd number of negations ("not", "never", "n't", ...)."""
+    return len(_NEGATION_RE.findall(normalize_text(text))) % 2 == 1
+
+
+# --- Embedders ---
+
+_WORD_RE = re.compile(r"[a-z0-9$%]+")
+_SUFFIXES = ("ing", "ed", "es", "s")
+_STOPWORDS = frozenset(
+    "a an the this that these those of in on at to for from with within by "
+    "your you our my is are be it its just only very and or".split()
+)
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def _bucket(feature: str, dim: int) -> tuple:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dim, 1.0 if (value >> 63) else -1.0
+
+
+class HashingEmbedder:
+    """Offline embedder: signed feature hashing into `dim` buckets, L2-normalized."""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed_one(self, text: str) -> "np.ndarray":
+        import numpy as np
+        words = [_stem(word) for word in _WORD_RE.findall(normalize_text(text)) if word not in _STOPWORDS]
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in words:
+            index, sign = _bucket(f"w:{word}", self.dim)
+            vector[index] += sign * (2.0 if any(c.isdigit() for c in word) else 1.0)
+        for a, b in zip(words, words[1:]):
+            index, sign = _bucket(f"b:{a} {b}", self.dim)
+            vector[index] += sign * 0.5
+        return vector
+
+    async def __call__(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_one(text) for text in texts]
+
+
+def create_embedder(backend: Optional[str] = None) -> Embed:
+    """The configured embedder (default settings.CLAIM_MEMORY_EMBEDDINGS); has a `name`."""
+    backend = backend or settings.CLAIM_MEMORY_EMBEDDINGS
+    if backend == "local":
+        return HashingEmbedder()
+    if backend == "openai":
+        # Imported here so the local embedder works without the provider client
+        from langchain_openai import OpenAIEmbeddings
+        client = OpenAIEmbeddings(
+            api_key=settings.EMBEDDING_API_KEY or settings.OPENAI_API_KEY,
+            base_url=settings.EMBEDDING_BASE_URL,
+            model=settings.EMBEDDING_MODEL,
+        )
+
+        async def embed(texts: List[str]) -> List[List[float]]:
+            return await client.aembed_documents(texts)
+
+        embed.name = settings.EMBEDDING_MODEL
+        return embed
+    raise ValueError(f"Unknown CLAIM_MEMORY_EMBEDDINGS: {backend}")
+
+
+# --- Index ---
+
+class ClaimMemory:
+    """Vector index of verified claims (one stored verdict per entry)."""
+
+    SAVE_EVERY = 100
+    RECENT_EMBEDDINGS = 1024
+
+    def __init__(
+        self,
+        embed: Embed,
+        threshold: float = 0.9,
+        max_entries: int = 50000,
+        ttl_seconds: int = 30 * 24 * 3600,
+        path: str = "",
+    ):
+        self.embed = embed
+        self.embedder_name = getattr(embed, "name", "custom")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.path = path
+        # (max_entries, dim) vectors and per-entry timestamps, allocated on first add or load
+        self._vectors: "Optional[np.ndarray]" = None
+        self._created: "Optional[np.ndarray]" = None
+        self._last_used: "Optional[np.ndarray]" = None
+        self._negated: "Optional[np.ndarray]" = None
+        self._verdicts: List[Optional[Dict[str, Any]]] = []
+        self._count = 0
+        # Query vectors of the latest lookups, so adding their verdicts needs no second embed call
+        self._recent: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._writes_since_save = 0
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "embed_errors": 0,
+        }
+        if path:
+            self.load(path)
+
+    # Embedding
+
+    async def _embed(self, texts: List[str]) -> "np.ndarray":
+        import numpy as np
+        keys = [normalize_text(text) for text in texts]
+        found = {key: self._recent[key] for key in keys if key in self._recent}
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+        if missing:
+            for key, vector in zip(missing, await self.embed(missing)):
+                vector = np.asarray(vector, dtype=np.float32)
+                norm = float(np.linalg.norm(vector))
+                found[key] = self._recent[key] = vector / norm if norm else vector
+                while len(self._recent) > self.RECENT_EMBEDDINGS:
+                    self._recent.popitem(last=False)
+        return np.stack([found[key] for key in keys])
+
+    def _allocate(self, dim: int) -> None:
+        import numpy as np
+        self._vectors = np.zeros((self.max_entries, dim), dtype=np.float32)
+        self._created = np.zeros(self.max_entries, dtype=np.float64)
+        self._last_used = np.zeros(self.max_entries, dtype=np.float64)
+        self._negated = np.zeros(self.max_entries, dtype=bool)
+
+    def _similarities(self, queries: "np.ndarray", negated: List[bool], now: float) -> "np.ndarray":
+        """(queries, entries) cosine similarities; expired entries and entries of
+        the opposite polarity score -1."""
+        import numpy as np
+        scores = queries @ self._vectors[:self._count].T
+        expired = self._created[:self._count] < now - self.ttl
+        scores[:, expired] = -1.0
+        opposite = self._negated[None, :self._count] != np.asarray(negated, dtype=bool)[:, None]
+        scores[opposite] = -1.0
+        return scores
+
+    # Public API
+
+    async def lookup(self, claims: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """The stored verdict for each claim (with the claim's own text), or None."""
+        if not claims:
+            return []
+        if not self._count:
+            self.stats["misses"] += len(claims)
+            CLAIM_MEMORY_LOOKUPS.inc(len(claims), result="miss")
+            return [None] * len(claims)
+        try:
+            queries = await self._embed(claims)
+        except Exception as e:
+            self.stats["embed_errors"] += 1
+            logger.warning(f"Claim Memory Embed Error: {e}")
+            return [None] * len(claims)
+
+        now = time.time()
+        scores = self._similarities(queries, [is_negated(claim) for claim in claims], now)
+        best = scores.argmax(axis=1)
+        matches: List[Optional[Dict[str, Any]]] = []
+        for claim, row, index in zip(claims, scores, best):
+            if row[index] >= self.threshold:
+                self._last_used[index] = now
+                matches.append({**self._verdicts[index], "text": claim})
+            else:
+                matches.append(None)
+        hits = sum(1 for match in matches if match is not None)
+        self.stats["hits"] += hits
+        self.stats["misses"] += len(claims) - hits
+        if hits:
+            CLAIM_MEMORY_LOOKUPS.inc(hits, result="hit")
+        if len(claims) - hits:
+            CLAIM_MEMORY_LOOKUPS.inc(len(claims) - hits, result="miss")
+        return matches
+
+    async def add(self, verified: List[Dict[str, Any]]) -> None:
+        """Indexes verified claims. A claim matching an existing entry replaces it."""
+        verified = [claim for claim in verified if claim.get("text")]
+        if not verified:
+            return
+        try:
+            vectors = await self._embed([claim["text"] for claim in verified])
+        except Exception as e:
+            self.stats["embed_errors"] += 1
+            logger.warning(f"Claim Memory Embed Error: {e}")
+            return
+
+        if self._vectors is None:
+            self._allocate(vectors.shape[1])
+        now = time.time()
+        for claim, vector in zip(verified, vectors):
+            negated = is_negated(claim["text"])
+            slot = self._slot_for(vector, negated, now)
+            self._vectors[slot] = vector
+            self._verdicts[slot] = dict(claim)
+            self._created[slot] = now
+            self._last_used[slot] = now
+            self._negated[slot] = negated
+            self.stats["writes"] += 1
+
+        self._writes_since_save += len(verified)
+        if self.path and self._writes_since_save >= self.SAVE_EVERY:
+            self._writes_since_save = 0
+            try:
+                await asyncio.to_thread(self.save)
+            except Exception as e:
+                logger.warning(f"Claim Memory Save Error: {e}")
+
+    def _slot_for(self, vector: "np.ndarray", negated: bool, now: float) -> int:
+        if self._count:
+            scores = self._similarities(vector[None, :], [negated], now)[0]
+            best = int(scores.argmax())
+            if scores[best] >= self.threshold:
+                return best
+        if self._count < self.max_entries:
+            self._count += 1
+            self._verdicts.append(None)
+            return self._count - 1
+        # Full: the oldest expired entry first, then the least recently used one
+        self.stats["evictions"] += 1
+        oldest = int(self._created[:self._count].argmin())
+        if self._created[oldest] < now - self.ttl:
+            return oldest
+        return int(self._last_used[:self._count].argmin())
+
+    # Persistence
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path or self._vectors is None:
+            return
+        import numpy as np
+        n = self._count
+        # Per-process temp files: every server worker saves the same path on shutdown
+        tmp = f"{path}.{os.getpid()}.tmp"
+        np.savez(
+            tmp + ".npz",
+            vectors=self._vectors[:n],
+            created=self._created[:n],
+            last_used=self._last_used[:n],
+        )
+        with open(tmp + ".json", "w") as f:
+            json.dump({"embedder": self.embedder_name, "verdicts": self._verdicts[:n]}, f)
+        os.replace(tmp + ".npz", path + ".npz")
+        os.replace(tmp + ".json", path + ".json")
+
+    def load(self, path: str) -> None:
+        if not (os.path.exists(path + ".npz") and os.path.exists(path + ".json")):
+            return
+        import numpy as np
+        try:
+            with open(path + ".json") as f:
+                meta = json.load(f)
+            if meta.get("embedder") != self.embedder_name:
+                logger.warning(f"Claim Memory: ignoring {path} (built with {meta.get('embedder')})")
+                return
+            arrays = np.load(path + ".npz")
+            n = min(len(meta["verdicts"]), self.max_entries)
+            vectors = arrays["vectors"][:n]
+        except Exception as e:
+            logger.warning(f"Claim Memory Load Error: {e}")
+            return
+        self._allocate(vectors.shape[1])
+        self._vectors[:n] = vectors
+        self._created[:n] = arrays["created"][:n]
+        self._last_used[:n] = arrays["last_used"][:n]
+        self._verdicts = list(meta["verdicts"][:n])
+        self._negated[:n] = [is_negated(verdict.get("text", "")) for verdict in self._verdicts]
+        self._count = n
+
+    def clear(self) -> None:
+        self._vectors = None
+        self._verdicts = []
+        self._count = 0
+        self._recent.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "lookups": lookups,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": self._count,
+            "threshold": self.threshold,
+            "embedder": self.embedder_name,
+        }
+
+
+claim_memory = ClaimMemory(
+    create_embedder(),
+    threshold=settings.CLAIM_MEMORY_THRESHOLD,
+    max_entries=settings.CLAIM_MEMORY_MAX_ENTRIES,
+    ttl_seconds=settings.CLAIM_MEMORY_TTL_SECONDS,
+    path=settings.CLAIM_MEMORY_PATH,
+)
+
+registry.gauge("liespy_claim_memory_entries", "Verified claims in the semantic claim memory.",
+               lambda: claim_memory.snapshot()["entries"])
+registry.gauge("liespy_claim_memory_hit_ratio", "Semantic claim memory hits / lookups since start.",
+               lambda: claim_memory.snapshot()["hit_rate"])
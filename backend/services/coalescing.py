@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List
+
+from sqlalchemy import text
+
+from core.config import settings
+from db.session import lock_engine
+from services.claim_cache import normalize_text
+
+# Request coalescing ("single flight") for page scans.
+#
+# Concurrent requests for the same URL + content share one pipeline run: the
+# first caller starts it, later callers await the same task. The run is a task
+# of its own, so a leader that disconnects does not cancel it for followers.
+# For multi-worker deployments, advisory_lock() serializes runs across
+# processes through Postgres.
+
+
+def content_fingerprint(candidates: List[str]) -> str:
+    """Stable hash of the page content the client sent (normalized per candidate)."""
+    digest = hashlib.sha256()
+    for candidate in candidates:
+        digest.update(normalize_text(candidate).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, int] = {"leaders": 0, "followers": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            self.stats["leaders"] += 1
+            task = asyncio.create_task(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.stats["followers"] += 1
+        # shield: one caller being cancelled must not cancel the shared run
+        return await asyncio.shield(task)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {**self.stats, "in_flight": len(self._in_flight)}
+
+
+def advisory_lock_id(key: str) -> int:
+    """Signed 64-bit id for the pg_*advisory_lock functions."""
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+@asynccontextmanager
+async def advisory_lock(key: str):
+    """Holds a session-level Postgres advisory lock on `key` for the body.
+
+    Waiters poll pg_try_advisory_lock every COALESCE_LOCK_POLL_SECONDS with a
+    connection checked out only for the attempt; the holder keeps one
+    autocommit connection of the separate lock pool (db.session.lock_engine).
+    Neither touches the main pool the locked scan uses, and no transaction
+    stays open while the scan runs."""
+    lock_id = advisory_lock_id(key)
+    lock_pool = lock_engine()
+    while True:
+        connection = await lock_pool.connect()
+        try:
+            acquired = (await connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id})).scalar()
+        except BaseException:
+            await connection.close()
+            raise
+        if acquired:
+            break
+        await connection.close()
+        await asyncio.sleep(settings.COALESCE_LOCK_POLL_SECONDS)
+
+    try:
+        yield
+    finally:
+        try:
+            await connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+        except BaseException:
+            # Don't return a connection that may still hold the lock to the pool
+            await connection.invalidate()
+            raise
+        finally:
+            await connection.close()
+
+scan_flight = SingleFlight()
@@ -0,0 +1,127 @@
+import re
+from typing import List, TypedDict
+
+from services.claim_cache import normalize_text
+
+# Local, deterministic boilerplate stripping (no LLM round trip).
+#
+# The client sends `candidates`: text blocks scraped from the page, in page order.
+# Each block is classified as content, boilerplate or "short" (undecided) using
+# text density, link density, duplicate lines and a few site-chrome patterns,
+# then short blocks are kept only when they sit next to content (headings,
+# bullet points and prices inside sales copy).
+
+_URL_RE = re.compile(r"(https?://\S+|www\.\S+|\S+@\S+\.\w+)", re.IGNORECASE)
+_NAV_SEPARATOR_RE = re.compile(r"[|»›•·]|\s/\s|\s>\s")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_END_RE = re.compile(r"[.!?…]")
+_CHROME_RE = re.compile(
+    r"(©|\(c\)\s*\d{4}|\b(all rights reserved|privacy policy|terms (of|and) (service|use|conditions)"
+    r"|cookies?|sign in|log ?in|sign up|subscribe to our newsletter|skip to (main )?content"
+    r"|follow us|share on|back to top)\b)",
+    re.IGNORECASE,
+)
+
+# Below this size there is nothing worth stripping; the text is returned as-is.
+MIN_STRIP_CHARS = 400
+# Content needed before the result is trusted without an LLM fallback.
+CONFIDENT_CONTENT_CHARS = 400
+
+CONTENT_MIN_WORDS = 12
+SHORT_MAX_WORDS = 6
+MAX_LINK_DENSITY = 0.3
+
+
+class LocalExtraction(TypedDict):
+    text: str
+    confidence: float
+    kept_blocks: int
+    dropped_blocks: int
+
+
+def _split_blocks(candidates: List[str]) -> List[str]:
+    blocks = []
+    for candidate in candidates:
+        for line in (candidate or "").splitlines():
+            line = line.strip()
+            if line:
+                blocks.append(line)
+    return blocks
+
+
+def link_density(block: str) -> float:
+    """Share of the block's words that are URLs/emails or navigation separators."""
+    words = block.split()
+    if not words:
+        return 0.0
+    links = len(_URL_RE.findall(block)) + len(_NAV_SEPARATOR_RE.findall(block))
+    return min(1.0, links / len(words))
+
+
+def classify_block(block: str) -> str:
+    """Returns "content", "boilerplate" or "short"."""
+    words = _WORD_RE.findall(block)
+    if not words:
+        return "boilerplate"
+    if link_density(block) > MAX_LINK_DENSITY:
+        return "boilerplate"
+    if _CHROME_RE.search(block) and len(words) < 40:
+        return "boilerplate"
+    if len(words) >= CONTENT_MIN_WORDS and _SENTENCE_END_RE.search(block):
+        return "content"
+    if len(words) <= SHORT_MAX_WORDS:
+        return "short"
+    # Medium-length text: content if it reads like prose, otherwise undecided.
+    return "content" if _SENTENCE_END_RE.search(block) else "short"
+
+
+def extract_main_text(candidates: List[str]) -> LocalExtraction:
+    """Strips navigation, footers and repeated chrome from candidate blocks."""
+    blocks = _split_blocks(candidates)
+    total_chars = sum(len(b) for b in blocks)
+    if total_chars <= MIN_STRIP_CHARS:
+        return LocalExtraction(text="\n".join(blocks), confidence=1.0, kept_blocks=len(blocks), dropped_blocks=0)
+
+    # Duplicate lines (menus, repeated CTAs, per-section footers): keep the first only.
+    seen = set()
+    labels = []
+    for block in blocks:
+        key = normalize_text(block)
+        if key in seen:
+            labels.append("boilerplate")
+            continue
+        seen.add(key)
+        labels.append(classify_block(block))
+
+    # Context smoothing: a short block survives when content is adjacent to it
+    # (looking past a few other short blocks), so headings and bullet lists stay.
+    # Lone words without digits ("Home", "Shop", "Menu") are menu items, not copy.
+    kept = []
+    for i, label in enumerate(labels):
+        if label == "content":
+            kept.append(blocks[i])
+        elif label == "short" and _near_content(labels, i) and not _is_menu_item(blocks[i]):
+            kept.append(blocks[i])
+
+    content_chars = sum(len(b) for b, label in zip(blocks, labels) if label == "content")
+    confidence = min(1.0, content_chars / CONFIDENT_CONTENT_CHARS)
+    return LocalExtraction(
+        text="\n".join(kept),
+        confidence=round(confidence, 3),
+        kept_blocks=len(kept),
+        dropped_blocks=len(blocks) - len(kept),
+    )
+
+
+def _is_menu_item(block: str) -> bool:
+    return len(_WORD_RE.findall(block)) < 2 and not any(c.isdigit() for c in block)
+
+
+def _near_content(labels: List[str], index: int, max_run: int = 8) -> bool:
+    for step in (-1, 1):
+        j = index + step
+        while 0 <= j < len(labels) and labels[j] == "short" and abs(j - index) < max_run:
+            j += step
+        if 0 <= j < len(labels) and labels[j] == "content":
+            return True
+    return False
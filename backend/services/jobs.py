@@ -0,0 +1,278 @@
+import asyncio
+from contextlib import aclosing
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.schemas import PageScanRequest, ScanResult
+from api.utils import normalize_url
+from core.config import settings
+from core.logging import get_logger
+from db.models import ScanJob
+from db.session import async_session_factory
+from services.ai_pipeline import stream_page_scan
+from services.llm_scheduler import Priority, llm_priority
+from services.scan_cache import candidates_fingerprint, load_previous_scan, lookup_cached_scan
+from services.scan_store import add_scan
+
+logger = get_logger("jobs")
+
+# Scan jobs: requests are written to the scan_jobs table and picked up by
+# in-process asyncio workers, so the HTTP request returns immediately.
+#
+# Claiming uses SELECT ... FOR UPDATE SKIP LOCKED, which lets several workers
+# (and several server processes) share the table. A claimed job holds a lease
+# that a heartbeat task renews while the job runs; if a worker dies, the lease
+# expires and another worker picks the job up again. Each claim also gets a new
+# lease_token, and every write a worker makes to the job is conditional on it,
+# so a worker that lost its lease (e.g. stalled past the expiry) cannot
+# overwrite the job or store a second scan for it. Jobs that fail max_attempts
+# times are moved to the "dead" status (the dead-letter set) with their last error.
+#
+# Jobs call the LLM at batch priority and without the interactive
+# SCAN_DEADLINE_SECONDS (JOB_SCAN_DEADLINE_SECONDS instead). A partial result
+# is retried like a failure; on the last attempt it is stored and the job ends
+# "partial" rather than "succeeded".
+#
+# Unless the request has force_refresh, a job whose page already has a fresh
+# cached scan (same rules as /scan/page) finishes with that scan instead of
+# running the pipeline. only_check_cache is rejected when the job is enqueued.
+
+
+async def enqueue_scan_job(session: AsyncSession, request: PageScanRequest) -> ScanJob:
+    if request.only_check_cache:
+        raise ValueError("only_check_cache is not supported for scan jobs")
+    job = ScanJob(
+        payload=request.model_dump(),
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        progress={"stage": "queued"},
+    )
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    return job
+
+
+async def claim_next_job() -> Optional[ScanJob]:
+    """Leases the oldest runnable job (queued, or running with an expired lease)."""
+    now = datetime.utcnow()
+    async with async_session_factory() as session:
+        statement = (
+            select(ScanJob)
+            .where(or_(
+                and_(ScanJob.status == "queued", ScanJob.run_after <= now),
+                and_(ScanJob.status == "running", ScanJob.lease_expires_at < now),
+            ))
+            .order_by(ScanJob.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = (await session.execute(statement)).scalars().first()
+        if job is None:
+            return None
+
+        if job.status == "running" and job.attempts >= job.max_attempts:
+            # Worker died on the last attempt
+            job.status = "dead"
+            job.error = job.error or "Lease expired on final attempt"
+            job.updated_at = now
+            await session.commit()
+            return None
+
+        job.status = "running"
+        job.attempts += 1
+        job.lease_expires_at = now + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        job.lease_token = uuid4()
+        job.updated_at = now
+        await session.commit()
+        return job
+
+
+class LeaseLost(Exception):
+    """The job was claimed by another worker after this one's lease expired."""
+
+
+def _owned(job: ScanJob):
+    """UPDATE of the job row that only matches while `job`'s lease is still held."""
+    return update(ScanJob).where(ScanJob.id == job.id, ScanJob.lease_token == job.lease_token)
+
+
+async def _update_job(job: ScanJob, **values: Any) -> bool:
+    """Writes `values` to the job row; False (nothing written) if the lease was lost."""
+    values["updated_at"] = datetime.utcnow()
+    async with async_session_factory() as session:
+        result = await session.execute(_owned(job).values(**values))
+        await session.commit()
+    return result.rowcount == 1
+
+
+async def _store_result(job: ScanJob, scan_fields: Dict[str, Any], **values: Any) -> None:
+    """Stores the scan and finishes the job in one transaction, or neither if
+    the lease was lost (LeaseLost)."""
+    async with async_session_factory() as session:
+        new_scan = await add_scan(session, **scan_fields)
+        result = await session.execute(
+            _owned(job).values(scan_id=new_scan.id, updated_at=datetime.utcnow(), **values)
+        )
+        if result.rowcount != 1:
+            await session.rollback()
+            raise LeaseLost(job.id)
+        await session.commit()
+
+
+async def _heartbeat(job: ScanJob, lease: timedelta) -> None:
+    """Renews the lease every third of its length for as long as the job runs,
+    independently of how often the scan reports progress."""
+    while True:
+        await asyncio.sleep(lease.total_seconds() / 3)
+        try:
+            if not await _update_job(job, lease_expires_at=datetime.utcnow() + lease):
+                logger.warning(f"Scan Job Lease Lost ({job.id})")
+                return
+        except Exception as e:
+            # Retried on the next beat, well before the lease runs out
+            logger.error(f"Scan Job Lease Renewal Error ({job.id}): {e}")
+
+
+async def _find_cached_scan(request: PageScanRequest) -> Optional[Any]:
+    """A fresh stored scan of the job's page, or None (always None with force_refresh)."""
+    if request.force_refresh:
+        return None
+    async with async_session_factory() as session:
+        return await lookup_cached_scan(
+            session, normalize_url(request.url), candidates_fingerprint(request.candidates)
+        )
+
+
+async def run_job(job: ScanJob) -> None:
+    """Runs the page pipeline for a leased job, recording progress as it goes."""
+    request = PageScanRequest(**job.payload)
+    priority = llm_priority.set(Priority.BATCH)
+    heartbeat = asyncio.create_task(_heartbeat(job, timedelta(seconds=settings.JOB_LEASE_SECONDS)))
+    try:
+        cached_scan = await _find_cached_scan(request)
+        if cached_scan:
+            if not await _update_job(
+                job,
+                status="succeeded",
+                scan_id=cached_scan.id,
+                progress={"stage": "done", "cached": True},
+                lease_expires_at=None,
+                lease_token=None,
+                error=None,
+            ):
+                raise LeaseLost(job.id)
+            return
+
+        result_data: Optional[ScanResult] = None
+        chunk_records = None
+        async with aclosing(stream_page_scan(
+            candidates=request.candidates,
+            metadata=request.metadata,
+            indicators=request.indicators,
+            previous=await load_previous_scan(normalize_url(request.url)),
+            scan_deadline=settings.JOB_SCAN_DEADLINE_SECONDS,
+        )) as scan_events:
+            async for scan_event in scan_events:
+                if scan_event["event"] == "result":
+                    result_data = scan_event["data"]["result"]
+                    chunk_records = scan_event["data"]["chunks"]
+                    break
+                progress: Dict[str, Any] = {"stage": scan_event["event"]}
+                if scan_event["event"] == "chunk":
+                    progress.update(completed=scan_event["data"]["completed"], total=scan_event["data"]["total"])
+                if not await _update_job(job, progress=progress):
+                    raise LeaseLost(job.id)
+
+        missing = f"Partial result, missing chunks {result_data.missing_chunks}" if result_data.partial else None
+        if missing and job.attempts < job.max_attempts:
+            raise RuntimeError(missing)
+
+        await _store_result(
+            job,
+            dict(
+                url=normalize_url(request.url),
+                result=result_data.model_dump(),
+                content_hash=candidates_fingerprint(request.candidates),
+                chunks=chunk_records,
+                user_id=None
+            ),
+            status="partial" if missing else "succeeded",
+            progress={"stage": "done"},
+            lease_expires_at=None,
+            lease_token=None,
+            error=missing,
+        )
+    except LeaseLost:
+        # Another worker holds the job now; it records the outcome
+        logger.warning(f"Scan Job Lease Lost ({job.id}, attempt {job.attempts}), abandoning it")
+    except Exception as e:
+        logger.error(f"Scan Job Error ({job.id}, attempt {job.attempts}): {e}")
+        if job.attempts >= job.max_attempts:
+            await _update_job(job, status="dead", error=str(e), lease_expires_at=None, lease_token=None)
+        else:
+            delay = settings.JOB_RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1)
+            await _update_job(
+                job,
+                status="queued",
+                error=str(e),
+                lease_expires_at=None,
+                lease_token=None,
+                run_after=datetime.utcnow() + timedelta(seconds=delay),
+            )
+    finally:
+        heartbeat.cancel()
+        llm_priority.reset(priority)
+
+
+class JobWorkerPool:
+    """N asyncio workers polling the job table inside the API process."""
+
+    def __init__(self, workers: int = 2, poll_interval: float = 1.0):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    async def _worker(self) -> None:
+        while not self._stopping:
+            try:
+                job = await claim_next_job()
+            except Exception as e:
+                logger.error(f"Scan Job Claim Error: {e}")
+                job = None
+            if job is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            try:
+                await run_job(job)
+            except Exception as e:
+                # e.g. the DB write recording a failure failed too; the lease
+                # expires and the job is picked up again
+                logger.error(f"Scan Job Worker Error ({job.id}): {e}")
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 0.0) -> None:
+        """Stops claiming jobs, gives running ones up to `timeout` seconds to
+        finish, then cancels the rest (their lease expires and another worker
+        retries them)."""
+        self._stopping = True
+        if self._tasks and timeout > 0:
+            await asyncio.wait(self._tasks, timeout=timeout)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+job_workers = JobWorkerPool(
+    workers=settings.JOB_WORKERS,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+)
@@ -0,0 +1,48 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from services.metrics import registry
+
+# Graceful shutdown: work that must finish before a worker process exits
+# (page scans, whether run for a request, a batch or a background job) is
+# tracked here, and the app's lifespan waits for it to drain.
+
+
+class InflightTracker:
+    """Counts running units of work; drain() waits until there are none."""
+
+    def __init__(self):
+        self.count = 0
+        self._waiters: List[asyncio.Future] = []
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        self.count += 1
+        try:
+            yield
+        finally:
+            self.count -= 1
+            if not self.count:
+                for waiter in self._waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+                self._waiters = []
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Waits up to `timeout` seconds for the count to reach zero; False if it did not."""
+        if not self.count:
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+scans_in_flight = InflightTracker()
+
+registry.gauge("liespy_scans_in_flight", "Page scans currently running in this process.",
+               lambda: scans_in_flight.count)
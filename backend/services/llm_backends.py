@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from core.config import settings
+from services.metrics import current_stage
+
+if TYPE_CHECKING:
+    from langchain_core.messages import AIMessage
+
+# LLM backends. The pipeline only needs `await llm.ainvoke(messages)` returning
+# a message with `.content` (and optionally `.usage_metadata`), so any object
+# with that method can stand in for ChatOpenAI.
+#
+# LLM_BACKEND:
+# - "openai": ChatOpenAI against LLM_BASE_URL (the provider)
+# - "fake": FakeLLM, a deterministic local stand-in for tests, benchmarks and
+#   load tests (no network, no cost)
+
+# --- Fake backend ---
+
+_SENTENCE_RE = re.compile(r"[^.!?\n]+[.!?]?")
+_LABEL_RE = re.compile(r"^[A-Z ]+:\n")
+_BATCH_CLAIM_RE = re.compile(r"^- \[(\d+\.\d+)\] (.*)$", re.MULTILINE)
+
+# Keyword -> (category, risk_level) used to produce plausible canned claims
+_CLAIM_KEYWORDS = (
+    ("cure", "Health", "high"),
+    ("miracle", "Health", "high"),
+    ("doctor", "Trust", "medium"),
+    ("guarantee", "Financial", "high"),
+    ("profit", "Financial", "high"),
+    ("income", "Financial", "medium"),
+    ("limited", "Urgency", "medium"),
+    ("only today", "Urgency", "medium"),
+    ("% off", "Urgency", "low"),
+    ("endorsed", "Trust", "medium"),
+)
+
+
+class FakeRateLimitError(Exception):
+    """Shaped like the provider's 429 error (status_code + response headers)."""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__("Error code: 429 - rate_limit_exceeded (injected by FakeLLM)")
+        self.status_code = 429
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = type("FakeResponse", (), {"status_code": 429, "headers": headers})()
+
+
+class FakeLLMError(Exception):
+    """Injected non-retryable provider failure."""
+
+
+def _find_claims(text: str) -> List[Dict[str, Any]]:
+    claims = []
+    for sentence in _SENTENCE_RE.findall(text):
+        sentence = sentence.strip(" -\t")
+        lowered = sentence.lower()
+        for keyword, category, risk_level in _CLAIM_KEYWORDS:
+            if keyword in lowered:
+                claims.append({
+                    "text": sentence,
+                    "risk_level": risk_level,
+                    "category": category,
+                    "explanation": f"Contains '{keyword}'.",
+                    "confidence": 0.8,
+                })
+                break
+    return claims
+
+
+class FakeLLM:
+    """Deterministic ChatOpenAI stand-in.
+
+    - Latency: "fixed", "uniform" (0..2x mean) or "lognormal" (median latency_ms,
+      spread `jitter`), in milliseconds
+    - Failures: error_rate raises FakeLLMError, rate_limit_rate raises a 429
+      with an optional Retry-After
+    - Responses: canned JSON per pipeline stage, derived from the input with a
+      keyword matcher, or taken from `responses` ({stage: JSON object}) when given
+
+    Randomness is seeded per (seed, prompt, attempt number for that prompt), so a
+    run is reproducible regardless of how concurrent calls interleave.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        latency_distribution: str = "fixed",
+        jitter: float = 0.3,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: Optional[float] = None,
+        seed: int = 0,
+        responses: Optional[Dict[str, Any]] = None,
+        model_name: str = "fake",
+    ):
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.seed = seed
+        self.responses = responses or {}
+        self.model_name = model_name
+        self._attempts: Dict[str, int] = defaultdict(int)
+        self.calls = 0
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        attempt = self._attempts[digest]
+        self._attempts[digest] += 1
+        return random.Random(f"{self.seed}:{digest}:{attempt}")
+
+    def _latency(self, rng: random.Random) -> float:
+        mean = self.latency_ms / 1000.0
+        if mean <= 0:
+            return 0.0
+        if self.latency_distribution == "uniform":
+            return rng.uniform(0, 2 * mean)
+        if self.latency_distribution == "lognormal":
+            return rng.lognormvariate(0, self.jitter) * mean
+        return mean
+
+    def _respond(self, stage: str, system: str, human: str) -> str:
+        if stage in self.responses:
+            return json.dumps(self.responses[stage])
+        # Some prompts use a literal "\\n" as separator
+        human = human.replace("\\n", "\n")
+        if stage == "extraction":
+            return _LABEL_RE.sub("", human)
+        if stage == "identify":
+            return json.dumps({"claims": [claim["text"] for claim in _find_claims(human)]})
+        if stage in ("verify", "single_pass"):
+            if _BATCH_CLAIM_RE.search(human):
+                # Batched verify: tag each verdict with its "[g.n]" claim id
+                verified = []
+                for claim_id, text in _BATCH_CLAIM_RE.findall(human):
+                    verified.extend({"id": claim_id, **claim} for claim in _find_claims(text))
+                return json.dumps({"verified_claims": verified})
+            if "CLAIMS TO VERIFY:" in human:
+                claims_text = human.split("CLAIMS TO VERIFY:", 1)[1]
+                return json.dumps({"verified_claims": _find_claims(claims_text)})
+            return json.dumps({"verified_claims": _find_claims(human)})
+        if stage == "aggregation":
+            high = human.count('"risk_level": "high"')
+            score = max(0, 90 - 25 * high)
+            risk = "high" if score < 40 else "medium" if score < 70 else "low"
+            return json.dumps({"page_risk": risk, "trust_score": score, "summary": f"{high} high-risk claims found."})
+        if stage == "summary":
+            return json.dumps({"summary": "Fake summary of the scan."})
+        return "{}"
+
+    async def ainvoke(self, messages, **kwargs) -> "AIMessage":
+        from langchain_core.messages import AIMessage
+        system = "\n".join(m.content for m in messages if getattr(m, "type", "") == "system")
+        human = "\n".join(m.content for m in messages if getattr(m, "type", "") != "system")
+        rng = self._rng(system + "\0" + human)
+        self.calls += 1
+
+        await asyncio.sleep(self._latency(rng))
+
+        roll = rng.random()
+        if roll < self.rate_limit_rate:
+            raise FakeRateLimitError(self.retry_after)
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise FakeLLMError("Injected provider error")
+
+        content = self._respond(current_stage.get(), system, human)
+        prompt_tokens = (len(system) + len(human)) // 4
+        completion_tokens = len(content) // 4
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
+# --- Factory ---
+
+def create_llm(
+    backend: Optional[str] = None,
+    model: Optional[str] = None,
+    base_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> Any:
+    """Builds the configured backend (default settings.LLM_BACKEND) for `model`
+    at `base_url` (defaults LLM_MODEL / LLM_BASE_URL; see services.llm_router)."""
+    backend = backend or settings.LLM_BACKEND
+    if backend == "fake":
+        responses = None
+        if settings.FAKE_LLM_RESPONSES_FILE:
+            with open(settings.FAKE_LLM_RESPONSES_FILE) as f:
+                responses = json.load(f)
+        return FakeLLM(
+            latency_ms=settings.FAKE_LLM_LATENCY_MS,
+            latency_distribution=settings.FAKE_LLM_LATENCY_DISTRIBUTION,
+            jitter=settings.FAKE_LLM_LATENCY_JITTER,
+            error_rate=settings.FAKE_LLM_ERROR_RATE,
+            rate_limit_rate=settings.FAKE_LLM_RATE_LIMIT_RATE,
+            seed=settings.FAKE_LLM_SEED,
+            responses=responses,
+            model_name=model or "fake",
+        )
+    if backend == "openai":
+        # Imported here so the fake backend works without the provider client
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=base_url or settings.LLM_BASE_URL,
+            model=model or settings.LLM_MODEL,
+            timeout=timeout or settings.LLM_TIMEOUT_SECONDS,
+            temperature=0.1,
+            # Rate-limit retries and backoff belong to services.llm_scheduler;
+            # the client's own retries would bypass its budget accounting
+            max_retries=0,
+        )
+    raise ValueError(f"Unknown LLM_BACKEND: {backend}")
@@ -0,0 +1,293 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple, TypedDict
+
+from core.config import settings
+from services.metrics import registry
+
+# Per-stage model routing.
+#
+# A route is normally the pipeline stage making the call (services.metrics
+# current_stage: extraction, identify, verify, ...). LLM_ROUTES maps routes to
+#   {"model": ..., "base_url": ..., "timeout": ..., "fallbacks": [...]}
+# with missing keys taken from LLM_MODEL / LLM_BASE_URL / LLM_TIMEOUT_SECONDS.
+# Fallbacks are tried in order when a call fails (after the scheduler's own
+# rate-limit retries); each is a model name on the same endpoint or a full
+# target dict. Routes not listed use the default target with no fallbacks.
+#
+#   LLM_ROUTES='{"extraction": {"model": "sonar"},
+#                "identify": {"model": "sonar", "timeout": 20, "fallbacks": ["sonar-pro"]}}'
+#
+# Clients are pooled per (model, endpoint). Latency, tokens and cost (from
+# LLM_PRICES, USD per 1M prompt / completion tokens) are recorded per route and model.
+#
+# Hedging (HEDGE_ENABLED, HEDGE_STAGES): a call still running after the
+# route/model's recent p95 latency gets a duplicate; the first to succeed wins
+# and the other is cancelled. Hedges are capped at HEDGE_MAX_RATIO of calls.
+
+LLM_ROUTE_CALLS = registry.counter(
+    "liespy_llm_route_calls_total", "LLM calls per route and model, by outcome.", ("route", "model", "outcome"))
+LLM_ROUTE_SECONDS = registry.histogram(
+    "liespy_llm_route_seconds", "LLM call latency per route and model, from scheduler admission.", ("route", "model"))
+LLM_ROUTE_COST = registry.counter(
+    "liespy_llm_route_cost_usd_total", "Estimated LLM cost per route and model (LLM_PRICES).", ("route", "model"))
+LLM_ROUTE_FALLBACKS = registry.counter(
+    "liespy_llm_route_fallbacks_total", "Calls that moved on to the next model of a route's chain.", ("route", "model"))
+LLM_HEDGES = registry.counter(
+    "liespy_llm_hedges_total", "Hedged duplicate LLM calls, by which request won.", ("route", "winner"))
+
+# Set by use_route(); takes precedence over the current stage
+route_override: ContextVar[Optional[str]] = ContextVar("llm_route", default=None)
+# Set by track_answers(); collects the models whose calls succeeded
+answered_models: ContextVar[Optional[Set[str]]] = ContextVar("llm_answered_models", default=None)
+
+
+class RouteTarget(TypedDict):
+    model: str
+    base_url: str
+    timeout: float
+
+
+def default_target() -> RouteTarget:
+    return RouteTarget(model=settings.LLM_MODEL, base_url=settings.LLM_BASE_URL, timeout=settings.LLM_TIMEOUT_SECONDS)
+
+
+def is_default_target(target: RouteTarget) -> bool:
+    return target["model"] == settings.LLM_MODEL and target["base_url"] == settings.LLM_BASE_URL
+
+
+def _target(spec: Any, base: RouteTarget) -> RouteTarget:
+    if isinstance(spec, str):
+        return RouteTarget(model=spec, base_url=base["base_url"], timeout=base["timeout"])
+    return RouteTarget(
+        model=spec.get("model", base["model"]),
+        base_url=spec.get("base_url", base["base_url"]),
+        timeout=float(spec.get("timeout", base["timeout"])),
+    )
+
+
+def route_chain(route: Optional[str], routes: Optional[Dict[str, Dict[str, Any]]] = None) -> List[RouteTarget]:
+    """Targets to try for `route`: its primary target, then its fallbacks."""
+    routes = settings.LLM_ROUTES if routes is None else routes
+    default = default_target()
+    spec = routes.get(route or "") if route else None
+    if not spec:
+        return [default]
+    primary = _target(spec, default)
+    return [primary] + [_target(fallback, primary) for fallback in spec.get("fallbacks", [])]
+
+
+def routes_signature(routes: List[str]) -> str:
+    """The primary model and endpoint of each of `routes`, e.g. for cache keys
+    that must change when a route is pointed at another model."""
+    parts = []
+    for route in routes:
+        primary = route_chain(route)[0]
+        parts.append(f"{route}={primary['model']}@{primary['base_url']}")
+    return ";".join(parts)
+
+
+def current_route(stage: str) -> str:
+    return route_override.get() or stage or "default"
+
+
+@contextmanager
+def use_route(route: str) -> Iterator[None]:
+    """Routes the LLM calls made inside the block through `route`."""
+    token = route_override.set(route)
+    try:
+        yield
+    finally:
+        route_override.reset(token)
+
+
+@contextmanager
+def track_answers() -> Iterator[Set[str]]:
+    """Collects the models that answer the LLM calls made inside the block
+    (primary, fallback or hedge; see record_answer)."""
+    models: Set[str] = set()
+    token = answered_models.set(models)
+    try:
+        yield models
+    finally:
+        answered_models.reset(token)
+
+
+def record_answer(model: str) -> None:
+    models = answered_models.get()
+    if models is not None:
+        models.add(model)
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int,
+              prices: Optional[Dict[str, List[float]]] = None) -> float:
+    prices = settings.LLM_PRICES if prices is None else prices
+    prompt_price, completion_price = (list(prices.get(model, [])) + [0.0, 0.0])[:2]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+# --- Client pool ---
+
+class LLMClientPool:
+    """One client per (model, endpoint), built on first use by `factory`
+    (llm_backends.create_llm)."""
+
+    def __init__(self, factory: Callable[..., Any]):
+        self.factory = factory
+        self._clients: Dict[Tuple[str, str], Any] = {}
+
+    def get(self, target: RouteTarget) -> Any:
+        key = (target["model"], target["base_url"])
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = self.factory(
+                model=target["model"], base_url=target["base_url"], timeout=target["timeout"])
+        return client
+
+    def clients(self) -> List[Any]:
+        return list(self._clients.values())
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+# --- Per-route stats ---
+
+class RouteStats:
+    """Latency, token and cost totals per (route, model), for /llm/stats."""
+
+    RECENT = 500
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def _entry(self, route: str, model: str) -> Dict[str, Any]:
+        key = (route, model)
+        if key not in self._routes:
+            self._routes[key] = {
+                "calls": 0, "errors": 0, "fallbacks": 0, "hedges": 0, "seconds_total": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+                "recent": deque(maxlen=self.RECENT),
+            }
+        return self._routes[key]
+
+    def record(self, route: str, model: str, outcome: str, seconds: float,
+               prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        entry = self._entry(route, model)
+        entry["calls"] += 1
+        entry["seconds_total"] += seconds
+        LLM_ROUTE_CALLS.inc(route=route, model=model, outcome=outcome)
+        LLM_ROUTE_SECONDS.observe(seconds, route=route, model=model)
+        if outcome != "ok":
+            entry["errors"] += 1
+            return
+        entry["recent"].append(seconds)
+        cost = call_cost(model, prompt_tokens, completion_tokens)
+        entry["prompt_tokens"] += prompt_tokens
+        entry["completion_tokens"] += completion_tokens
+        entry["cost_usd"] += cost
+        if cost:
+            LLM_ROUTE_COST.inc(cost, route=route, model=model)
+
+    def record_fallback(self, route: str, model: str) -> None:
+        self._entry(route, model)["fallbacks"] += 1
+        LLM_ROUTE_FALLBACKS.inc(route=route, model=model)
+
+    def percentile(self, route: str, model: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """Latency percentile of recent successful calls, or None with too few samples."""
+        entry = self._routes.get((route, model))
+        if entry is None or len(entry["recent"]) < max(1, min_samples):
+            return None
+        recent = sorted(entry["recent"])
+        return recent[int(q * (len(recent) - 1))]
+
+    def hedge_delay(self, route: str, model: str) -> Optional[float]:
+        """Seconds to wait before hedging a call on `route`, or None to not hedge."""
+        if not settings.HEDGE_ENABLED or route not in settings.HEDGE_STAGES:
+            return None
+        entry = self._routes.get((route, model))
+        if entry is None or entry["hedges"] >= settings.HEDGE_MAX_RATIO * entry["calls"]:
+            return None
+        p = self.percentile(route, model, settings.HEDGE_PERCENTILE, settings.HEDGE_MIN_SAMPLES)
+        return None if p is None else max(p, settings.HEDGE_MIN_DELAY_SECONDS)
+
+    def record_hedge(self, route: str, model: str, winner: str) -> None:
+        self._entry(route, model)["hedges"] += 1
+        LLM_HEDGES.inc(route=route, winner=winner)
+
+    def snapshot(self) -> Dict[str, Any]:
+        routes = {}
+        for (route, model), entry in sorted(self._routes.items()):
+            recent = sorted(entry["recent"])
+            routes[f"{route}/{model}"] = {
+                **{key: value for key, value in entry.items() if key != "recent"},
+                "cost_usd": round(entry["cost_usd"], 6),
+                "avg_seconds": round(entry["seconds_total"] / entry["calls"], 4) if entry["calls"] else 0.0,
+                "p95_seconds": round(recent[int(0.95 * (len(recent) - 1))], 4) if recent else 0.0,
+            }
+        return routes
+
+
+route_stats = RouteStats()
+
+
+# --- Hedging ---
+
+AdmitCallback = Callable[[Optional[float]], None]
+
+
+async def hedged(call: Callable[[AdmitCallback], Awaitable[Any]], delay: Optional[float],
+                 on_hedge: Optional[Callable[[str], None]] = None) -> Any:
+    """Awaits call(on_admit); if it has been running for `delay` seconds without
+    finishing, starts a second call and returns whichever succeeds first,
+    cancelling the other. Raises the first call's error if both fail.
+    on_hedge("primary"/"hedge") reports the winner of a hedged call.
+
+    The call reports its scheduler admission through on_admit (see
+    LLMScheduler.run): the delay counts from the moment the first call was
+    admitted, and no hedge is sent while it is queued or backing off, when a
+    duplicate would only wait for the same budget."""
+    if delay is None:
+        return await call(lambda admitted_at: None)
+
+    admitted: List[Optional[float]] = [None]
+    changed = asyncio.Event()
+
+    def on_admit(admitted_at: Optional[float]) -> None:
+        admitted[0] = admitted_at
+        changed.set()
+
+    primary = asyncio.ensure_future(call(on_admit))
+    pending = {primary}
+    try:
+        while True:
+            changed.clear()
+            remaining = None if admitted[0] is None else admitted[0] + delay - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            waiter = asyncio.ensure_future(changed.wait())
+            try:
+                await asyncio.wait({primary, waiter}, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+            if primary.done():
+                return primary.result()
+
+        hedge = asyncio.ensure_future(call(lambda admitted_at: None))
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    if on_hedge:
+                        on_hedge("primary" if task is primary else "hedge")
+                    return task.result()
+        return primary.result()
+    finally:
+        # Also reached when the caller is cancelled (e.g. a chunk deadline):
+        # abandoned calls must not keep their scheduler slot and rate budget
+        for task in pending:
+            task.cancel()
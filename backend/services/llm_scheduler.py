@@ -0,0 +1,298 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from core.config import settings, web_workers
+from core.logging import get_logger
+from services.metrics import record_llm_call, registry
+
+logger = get_logger("llm_scheduler")
+
+# --- Priorities ---
+
+class Priority(IntEnum):
+    """Lower value is served first."""
+    INTERACTIVE = 0
+    BATCH = 1
+
+# Routes set this; tasks spawned while handling a request inherit it.
+llm_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+# --- Rate limiting ---
+
+class TokenBucket:
+    """Refills continuously at rate_per_minute, holding at most one minute of budget.
+    A rate of 0 disables the bucket."""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until `amount` can be consumed (0 if available now)."""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Takes `amount` from the bucket. The level may go negative when a
+        completed call turns out to have used more tokens than estimated."""
+        if not self.enabled:
+            return
+        self._refill()
+        self.level -= amount
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return "rate_limit" in message or "429" in message
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Reads Retry-After (or retry-after-ms) from the provider's HTTP response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        # HTTP-date form is not used by our providers; fall back to backoff.
+        return None
+    return None
+
+# --- Scheduler ---
+
+class LLMScheduler:
+    """Process-wide gate in front of the LLM client.
+
+    Every call waits in a priority queue until a concurrency slot is free and
+    the requests-per-minute and tokens-per-minute buckets can cover it. Only the
+    head of the queue is admitted, so batch work cannot jump ahead of interactive
+    work by fitting into a smaller budget. A rate-limit response pauses admission
+    for everyone (honouring Retry-After) and the call is retried with jittered
+    exponential backoff.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+    ):
+        self.max_in_flight = max_in_flight
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._queue: list = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._cooldown_until = 0.0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._recent_waits: deque = deque(maxlen=1000)
+        self.stats: Dict[str, Any] = {
+            "calls": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+            "max_queue_depth": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    # Admission
+
+    def _dispatch(self) -> None:
+        self._wakeup = None
+        while self._queue and self._in_flight < self.max_in_flight:
+            _, _, tokens, future = self._queue[0]
+            if future.done():
+                # Waiter was cancelled
+                heapq.heappop(self._queue)
+                continue
+
+            delay = max(
+                self._cooldown_until - time.monotonic(),
+                self.requests.delay_for(1),
+                self.tokens.delay_for(tokens),
+            )
+            if delay > 0:
+                self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+
+            heapq.heappop(self._queue)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _kick(self) -> None:
+        """Re-evaluates the queue now, replacing any pending timed wake-up."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._dispatch()
+
+    async def _acquire(self, tokens: int, priority: Priority) -> float:
+        """Waits for admission; returns the seconds spent queued."""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (int(priority), next(self._sequence), tokens, future))
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], len(self._queue))
+
+        started = time.monotonic()
+        self._kick()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just as we were cancelled: give it back.
+                self._release()
+            raise
+
+        waited = time.monotonic() - started
+        self._recent_waits.append(waited)
+        self.stats["wait_seconds_total"] += waited
+        self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+        return waited
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._kick()
+
+    # Calls
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        jittered = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            # Never retry before the provider allows it; jitter spreads the herd.
+            return retry_after + random.uniform(0, self.backoff_base)
+        return jittered
+
+    def _record_usage(self, response: Any, estimated_tokens: int) -> tuple:
+        """Returns (prompt_tokens, completion_tokens) as billed by the provider."""
+        usage = getattr(response, "usage_metadata", None) or {}
+        prompt_tokens = usage.get("input_tokens", 0)
+        completion_tokens = usage.get("output_tokens", 0)
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += completion_tokens
+        if prompt_tokens or completion_tokens:
+            # Settle the estimate against what the provider actually billed.
+            self.tokens.consume(prompt_tokens + completion_tokens - estimated_tokens)
+        return prompt_tokens, completion_tokens
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        estimated_tokens: int = 0,
+        priority: Optional[Priority] = None,
+        on_admit: Optional[Callable[[Optional[float]], None]] = None,
+    ) -> Any:
+        """Runs `call` under the scheduler's limits, retrying rate-limit errors.
+        Every attempt is recorded in the metrics under the current stage.
+        on_admit(t) reports the time.monotonic() at which each attempt was
+        admitted, and on_admit(None) when a rate-limited call goes back to wait."""
+        if priority is None:
+            priority = llm_priority.get()
+
+        for attempt in range(self.max_retries):
+            waited = await self._acquire(estimated_tokens, priority)
+            started = time.monotonic()
+            if on_admit:
+                on_admit(started)
+            try:
+                self.stats["calls"] += 1
+                response = await call()
+            except Exception as e:
+                duration = time.monotonic() - started
+                if is_rate_limit_error(e) and attempt < self.max_retries - 1:
+                    wait_time = self._backoff(attempt, e)
+                    self.stats["rate_limited"] += 1
+                    self.stats["retries"] += 1
+                    self._cooldown_until = max(self._cooldown_until, time.monotonic() + wait_time)
+                    record_llm_call("rate_limited", waited, duration)
+                    logger.warning(f"Rate limit hit. Retrying in {wait_time:.2f}s...", extra={"retry_in": wait_time})
+                    if on_admit:
+                        on_admit(None)
+                    continue
+                self.stats["failures"] += 1
+                record_llm_call("error", waited, duration)
+                raise
+            finally:
+                self._release()
+
+            prompt_tokens, completion_tokens = self._record_usage(response, estimated_tokens)
+            record_llm_call("ok", waited, time.monotonic() - started, prompt_tokens, completion_tokens)
+            return response
+
+        raise Exception("Max retries exceeded")
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = sorted(self._recent_waits)
+        return {
+            **self.stats,
+            "queue_depth": len(self._queue),
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "wait_seconds_p50": waits[len(waits) // 2] if waits else 0.0,
+            "wait_seconds_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+        }
+
+
+def estimate_tokens(messages) -> int:
+    """Rough prompt size (~4 chars per token) plus the expected completion."""
+    chars = sum(len(getattr(m, "content", "") or "") for m in messages)
+    return chars // 4 + settings.LLM_EXPECTED_COMPLETION_TOKENS
+
+
+def per_worker(limit: int, workers: int) -> int:
+    """This process's share of a server-wide per-minute budget (0 stays off)."""
+    if limit <= 0:
+        return limit
+    return max(1, limit // max(1, workers))
+
+# The provider's limits apply to the whole server, and every worker process has its own scheduler
+llm_scheduler = LLMScheduler(
+    max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+    requests_per_minute=per_worker(settings.LLM_REQUESTS_PER_MINUTE, web_workers()),
+    tokens_per_minute=per_worker(settings.LLM_TOKENS_PER_MINUTE, web_workers()),
+    max_retries=settings.LLM_MAX_RETRIES,
+    backoff_base=settings.LLM_BACKOFF_BASE_SECONDS,
+    backoff_max=settings.LLM_BACKOFF_MAX_SECONDS,
+)
+
+registry.gauge("liespy_llm_queue_depth", "LLM calls waiting for admission.", lambda: len(llm_scheduler._queue))
+registry.gauge("liespy_llm_in_flight", "LLM calls currently running.", lambda: llm_scheduler._in_flight)
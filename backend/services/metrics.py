@@ -0,0 +1,308 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+# In-process metrics, rendered in the Prometheus text format at /metrics.
+#
+# Two views of the same measurements:
+# - Process-wide counters/histograms in `registry` (what Prometheus scrapes).
+# - ScanTrace: per-request / per-scan totals by stage, used for the
+#   Server-Timing headers and the "Scan finished" log line. Traces nest: a scan
+#   trace started inside a request records into the request's trace as well.
+#
+# Stages: extraction, prefilter, identify, memory, verify, single_pass, repair,
+# aggregation, summary.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+# --- Registry ---
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels.get(name, "")) for name in self.labels), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            # [bucket counts..., sum, count]
+            series = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._values.get(tuple(str(labels.get(name, "")) for name in self.labels))
+        return series[-1] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time from a callback, so it never goes stale."""
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {_format_value(float(self.read()))}",
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def _register(self, metric):
+        # Re-registering a name returns the existing metric (module reloads in tests)
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], float]) -> Gauge:
+        gauge = Gauge(name, documentation, read)
+        self._metrics[name] = gauge
+        return gauge
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # A broken gauge callback must not take the whole scrape down
+                continue
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "liespy_stage_duration_seconds", "Wall time of one pipeline stage call.", ("stage",))
+STAGE_ERRORS = registry.counter(
+    "liespy_stage_errors_total", "Pipeline stage calls that raised.", ("stage",))
+LLM_CALLS = registry.counter(
+    "liespy_llm_calls_total", "LLM calls by stage and outcome (ok, rate_limited, error).", ("stage", "outcome"))
+LLM_QUEUE_WAIT = registry.histogram(
+    "liespy_llm_queue_wait_seconds", "Time an LLM call waited in the scheduler queue.", ("stage",))
+LLM_CALL_SECONDS = registry.histogram(
+    "liespy_llm_call_duration_seconds", "Provider round trip of one LLM call.", ("stage",))
+LLM_RETRIES = registry.counter(
+    "liespy_llm_retries_total", "LLM calls retried after a rate-limit response.", ("stage",))
+LLM_TOKENS = registry.counter(
+    "liespy_llm_tokens_total", "Tokens reported by the provider, by kind (prompt, completion).", ("stage", "kind"))
+SCAN_SECONDS = registry.histogram(
+    "liespy_scan_duration_seconds", "End-to-end wall time of a page scan.")
+SCAN_TOKENS = registry.histogram(
+    "liespy_scan_tokens", "Prompt plus completion tokens used by one page scan.", buckets=TOKEN_BUCKETS)
+
+# --- Traces ---
+
+TRACE_FIELDS = ("seconds", "calls", "llm_calls", "queue_wait_seconds", "retries", "prompt_tokens", "completion_tokens")
+
+current_trace: ContextVar[Optional["ScanTrace"]] = ContextVar("current_trace", default=None)
+
+# Set while a stage runs so the LLM scheduler can attribute its calls.
+current_stage: ContextVar[str] = ContextVar("current_stage", default="other")
+
+
+class ScanTrace:
+    """Per-stage totals for one request or scan.
+
+    Stage seconds are summed over calls, so chunk stages that run concurrently
+    can add up to more than the trace's elapsed time.
+    """
+
+    def __init__(self, parent: Optional["ScanTrace"] = None):
+        self.parent = parent
+        self.started = time.perf_counter()
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def add(self, stage: str, **values: float) -> None:
+        trace = self
+        while trace is not None:
+            totals = trace.stages.setdefault(stage, dict.fromkeys(TRACE_FIELDS, 0))
+            for key, value in values.items():
+                totals[key] += value
+            trace = trace.parent
+
+    def total(self, field: str) -> float:
+        return sum(totals[field] for totals in self.stages.values())
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    async def run(self, awaitable: Awaitable[Any]) -> Any:
+        """Awaits `awaitable` with this trace as the current one. Used instead of
+        setting the context variable directly inside async generators."""
+        token = current_trace.set(self)
+        try:
+            return await awaitable
+        finally:
+            current_trace.reset(token)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (durations in ms)."""
+        parts = [
+            f'{stage};dur={totals["seconds"] * 1000:.1f};desc="{int(totals["llm_calls"])} llm"'
+            for stage, totals in self.stages.items()
+        ]
+        wait = self.total("queue_wait_seconds")
+        if wait:
+            parts.append(f"llm-queue;dur={wait * 1000:.1f}")
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "elapsed_seconds": round(self.elapsed(), 4),
+            "stages": {
+                stage: {key: round(value, 4) if isinstance(value, float) else value for key, value in totals.items()}
+                for stage, totals in self.stages.items()
+            },
+        }
+
+
+def start_trace() -> ScanTrace:
+    """A new trace nested under the current one, if any."""
+    return ScanTrace(parent=current_trace.get())
+
+
+def finish_scan_trace(trace: ScanTrace) -> None:
+    SCAN_SECONDS.observe(trace.elapsed())
+    SCAN_TOKENS.observe(trace.total("prompt_tokens") + trace.total("completion_tokens"))
+
+# --- Recording ---
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Times the enclosed block as one call of `stage`; LLM calls inside it are
+    attributed to the stage."""
+    token = current_stage.set(stage)
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        current_stage.reset(token)
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add(stage, seconds=elapsed, calls=1)
+
+
+def timed_stage(stage: str):
+    """Decorator form of stage_timer for async functions."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_call(
+    outcome: str,
+    queue_wait: float = 0.0,
+    duration: float = 0.0,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+) -> None:
+    """Called by the LLM scheduler once per attempt."""
+    stage = current_stage.get()
+    LLM_CALLS.inc(stage=stage, outcome=outcome)
+    LLM_QUEUE_WAIT.observe(queue_wait, stage=stage)
+    LLM_CALL_SECONDS.observe(duration, stage=stage)
+    if outcome == "rate_limited":
+        LLM_RETRIES.inc(stage=stage)
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, stage=stage, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, stage=stage, kind="completion")
+
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(
+            stage,
+            llm_calls=1,
+            queue_wait_seconds=queue_wait,
+            retries=1 if outcome == "rate_limited" else 0,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
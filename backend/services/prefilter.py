@@ -0,0 +1,160 @@
+import re
+from typing import Dict, List, Tuple, TypedDict
+
+from core.config import settings
+from core.logging import get_logger
+from services.chunking import iter_sentences
+from services.metrics import registry
+
+logger = get_logger("prefilter")
+
+# Local claim-signal pre-filter, run before a chunk reaches the LLM.
+#
+# Each category from the identify prompt (health, financial, urgency, trust) is
+# one compiled alternation of cue patterns. A sentence scores the sum of the
+# weights of the categories it hits plus small bonuses for generic "selling"
+# signals (percentages, prices, superlatives), capped at 1.0.
+#
+# PREFILTER_MODE:
+# - "off": every chunk goes to the LLM
+# - "shadow" (default): every chunk goes to the LLM; "chunk" decisions are only
+#   counted, and chunks it would have skipped that turn out to hold claims are
+#   counted and logged as misses. Measures recall on real pages before enabling.
+# - "chunk": chunks whose best sentence scores below PREFILTER_THRESHOLD are skipped
+# - "sentences": like "chunk", and kept chunks are reduced to the promising
+#   sentences plus PREFILTER_CONTEXT_SENTENCES neighbours on each side
+#
+# Recall against labeled sentences: tools/eval_prefilter.py.
+
+CATEGORY_PATTERNS: Dict[str, Tuple[float, str]] = {
+    "health": (0.6, r"""
+        cure[sd]?|curing|heal(?:s|ed|ing)?|remed(?:y|ies)|treat(?:s|ed|ment|ments)?|
+        detox\w*|immun\w*|cancer|diabet\w*|arthritis|alzheimer\w*|blood\s+(?:pressure|sugar)|
+        weight\s*loss|lose\s+\d+\s*(?:lbs?|pounds|kg)|burn\w*\s+fat|fat[-\s]burn\w*|metabolism|
+        supplement\w*|pills?|capsules?|dose|clinically|reverse[sd]?|anti[-\s]?aging|
+        side[-\s]effects|prescription|pharma\w*|disease\w*|symptoms?|pain|natural\s+remedy|
+        belly\s+fat|melts?|restores?|vision|eyesight|live\s+longer|overnight
+    """),
+    "financial": (0.6, r"""
+        profits?|returns?|roi|invest\w*|income|earn\w*|passive|crypto\w*|bitcoin|token|
+        trading|forex|dividends?|wealth\w*|rich|millionaire\w*|make\s+money|cash|payouts?|
+        risk[-\s]free|double\s+your|guaranteed?|\$\s?\d[\d,.]*\s*(?:k|m|per|a|/)?|
+        \d+x|\d+\s*x\s+(?:returns?|gains?)|per\s+(?:day|week|month)|pays?\s+out|interest\s+rates?
+    """),
+    "urgency": (0.5, r"""
+        limited|only\s+\d+|last\s+chance|hurry|act\s+now|today\s+only|only\s+today|
+        ends?\s+(?:tonight|today|soon|in)|expires?|deadline|countdown|while\s+supplies|
+        don'?t\s+miss|before\s+it'?s\s+(?:gone|too\s+late)|spots?\s+(?:left|remaining|available)|
+        selling\s+out|sold\s+out|immediately|right\s+now|final\s+hours?|
+        closes?\s+in|in\s+\d+\s+(?:minutes|hours)
+    """),
+    "trust": (0.5, r"""
+        doctors?|physicians?|scientists?|experts?|studies|study|research\w*|proven|
+        endorsed|approved|certified|fda|as\s+seen\s+on|featured\s+in|testimonials?|
+        trusted\s+by|recommended|award[-\s]winning|official|\d+(?:,\d{3})*\s+(?:customers|users|people)|
+        celebrit\w*|harvard|stanford|nasa|guarantee[sd]?|money[-\s]back|backed\s+by|
+        \d+\s+out\s+of\s+\d+
+    """),
+}
+
+# Generic selling signals: weight per distinct match type
+SIGNAL_PATTERNS: List[Tuple[float, str]] = [
+    (0.2, r"\d+(?:\.\d+)?\s*%"),
+    (0.15, r"\b(?:best|#1|number\s+one|revolutionary|breakthrough|miracle|secret|amazing|instantly|100)\b"),
+    (0.1, r"!"),
+]
+
+_CATEGORY_RES = {
+    category: (weight, re.compile(r"(?<!\w)(?:%s)(?!\w)" % pattern, re.IGNORECASE | re.VERBOSE))
+    for category, (weight, pattern) in CATEGORY_PATTERNS.items()
+}
+_SIGNAL_RES = [(weight, re.compile(pattern, re.IGNORECASE)) for weight, pattern in SIGNAL_PATTERNS]
+
+PREFILTER_CHUNKS = registry.counter(
+    "liespy_prefilter_chunks_total", "Chunks seen by the local pre-filter, by decision.", ("decision",))
+PREFILTER_CHARS_SAVED = registry.counter(
+    "liespy_prefilter_chars_saved_total", "Characters the pre-filter kept away from the LLM.")
+PREFILTER_SHADOW_MISSES = registry.counter(
+    "liespy_prefilter_shadow_misses_total", "Chunks the shadow pre-filter would have skipped that held claims.")
+
+
+class PrefilterResult(TypedDict):
+    keep: bool
+    score: float            # best sentence score in the chunk
+    text: str               # text to send to the LLM ("" when skipped)
+    kept_sentences: int
+    total_sentences: int
+
+
+def score_sentence(sentence: str) -> float:
+    """Claim likelihood in [0, 1]."""
+    score = 0.0
+    for weight, pattern in _CATEGORY_RES.values():
+        if pattern.search(sentence):
+            score += weight
+    for weight, pattern in _SIGNAL_RES:
+        if pattern.search(sentence):
+            score += weight
+    return min(score, 1.0)
+
+
+def matched_categories(sentence: str) -> List[str]:
+    return [category for category, (_, pattern) in _CATEGORY_RES.items() if pattern.search(sentence)]
+
+
+def prefilter_chunk(chunk: str, threshold: float = None, mode: str = None, context: int = None) -> PrefilterResult:
+    """Decides whether (and which part of) a chunk goes to the LLM."""
+    threshold = settings.PREFILTER_THRESHOLD if threshold is None else threshold
+    mode = mode or settings.PREFILTER_MODE
+    context = settings.PREFILTER_CONTEXT_SENTENCES if context is None else context
+
+    sentences = [sentence for sentence, _ in iter_sentences(chunk)]
+    if mode == "off" or not sentences:
+        return PrefilterResult(keep=bool(chunk.strip()), score=1.0, text=chunk,
+                               kept_sentences=len(sentences), total_sentences=len(sentences))
+
+    scores = [score_sentence(sentence) for sentence in sentences]
+    best = max(scores)
+    if best < threshold:
+        return PrefilterResult(keep=False, score=best, text="", kept_sentences=0, total_sentences=len(sentences))
+
+    if mode != "sentences":
+        return PrefilterResult(keep=True, score=best, text=chunk,
+                               kept_sentences=len(sentences), total_sentences=len(sentences))
+
+    keep = [False] * len(sentences)
+    for i, score in enumerate(scores):
+        if score >= threshold:
+            for j in range(max(0, i - context), min(len(sentences), i + context + 1)):
+                keep[j] = True
+    # Gaps are marked so the verifier knows context was removed
+    parts, gap = [], False
+    for sentence, kept in zip(sentences, keep):
+        if kept:
+            if gap and parts:
+                parts.append("[...]")
+            parts.append(sentence)
+            gap = False
+        else:
+            gap = True
+    return PrefilterResult(keep=True, score=best, text=" ".join(parts),
+                           kept_sentences=sum(keep), total_sentences=len(sentences))
+
+
+def record_decision(chunk: str, result: PrefilterResult, shadow: bool = False) -> None:
+    if shadow:
+        PREFILTER_CHUNKS.inc(decision="kept" if result["keep"] else "would_skip")
+        return
+    PREFILTER_CHUNKS.inc(decision="kept" if result["keep"] else "skipped")
+    saved = len(chunk) - len(result["text"])
+    if saved > 0:
+        PREFILTER_CHARS_SAVED.inc(saved)
+
+
+def record_shadow_miss(chunk: str, result: PrefilterResult, claims: List[Dict]) -> None:
+    """A chunk the shadow pre-filter would have skipped turned out to hold claims."""
+    PREFILTER_SHADOW_MISSES.inc()
+    logger.info(
+        "Pre-filter shadow miss",
+        extra={"score": result["score"], "claims": [claim.get("text") for claim in claims], "chunk": chunk[:500]},
+    )
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import Text, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.logging import get_logger
+from db.models import Scan
+from db.session import async_session_factory
+from services.coalescing import content_fingerprint
+
+logger = get_logger("scan_cache")
+
+# Page-level scan cache over the scans table.
+#
+# Freshness rules, in order:
+# 1. Both the request and the stored scan have a content fingerprint:
+#    same content -> hit regardless of age; changed content -> miss.
+# 2. Otherwise (no candidates sent, or a scan stored before fingerprints
+#    existed) the age limit SCAN_CACHE_MAX_AGE_HOURS decides (0 = no limit).
+# Partial scans (the scan deadline expired) are stored but never served.
+
+
+def candidates_fingerprint(candidates: List[str]) -> Optional[str]:
+    """Fingerprint stored with / compared against scans; None when no content was sent."""
+    return content_fingerprint(candidates) if candidates else None
+
+
+def is_fresh(
+    created_at: datetime,
+    stored_fingerprint: Optional[str],
+    fingerprint: Optional[str],
+    max_age: Optional[timedelta],
+    now: Optional[datetime] = None,
+) -> bool:
+    if fingerprint and stored_fingerprint:
+        return fingerprint == stored_fingerprint
+    if not max_age:
+        return True
+    now = now or datetime.utcnow()
+    return now - created_at < max_age
+
+
+def is_partial(result: Optional[Dict[str, Any]]) -> bool:
+    return bool((result or {}).get("partial"))
+
+
+def max_cache_age() -> Optional[timedelta]:
+    hours = settings.SCAN_CACHE_MAX_AGE_HOURS
+    return timedelta(hours=hours) if hours > 0 else None
+
+
+def _stored_scan_columns():
+    # The result comes back as JSON text (jsonb::text), to be sent on as is
+    # (api.utils.scan_response_json) rather than decoded and re-validated.
+    return (
+        Scan.id,
+        cast(Scan.result, Text).label("result_json"),
+        Scan.created_at,
+        Scan.content_hash,
+        func.coalesce(Scan.result["partial"].as_boolean(), False).label("partial"),
+    )
+
+
+async def lookup_cached_scan(session: AsyncSession, url: str, fingerprint: Optional[str] = None) -> Optional[Any]:
+    """Latest scan for `url` if it is still valid for this content, else None.
+
+    Reads only the newest row (served by ix_scans_url_created_at) and only the
+    columns a response needs. Returns a row with id, result_json, created_at.
+    """
+    statement = (
+        select(*_stored_scan_columns())
+        .where(Scan.url == url)
+        .order_by(Scan.created_at.desc())
+        .limit(1)
+    )
+    row = (await session.execute(statement)).first()
+    if row is None or row.partial:
+        return None
+    if not is_fresh(row.created_at, row.content_hash, fingerprint, max_cache_age()):
+        return None
+    return row
+
+
+async def lookup_scan(session: AsyncSession, scan_id: UUID) -> Optional[Any]:
+    """A stored scan by id (partial or not), as a row with id, result_json, created_at."""
+    statement = select(*_stored_scan_columns()).where(Scan.id == scan_id)
+    return (await session.execute(statement)).first()
+
+
+async def lookup_cached_scans(session: AsyncSession, urls: List[str]) -> Dict[str, Any]:
+    """Latest scan per URL for many URLs in one query (DISTINCT ON url).
+    Freshness is left to the caller (is_fresh), since each item has its own content."""
+    if not urls:
+        return {}
+    statement = (
+        select(Scan.url, Scan.id, Scan.result, Scan.created_at, Scan.content_hash)
+        .where(Scan.url.in_(set(urls)))
+        .order_by(Scan.url, Scan.created_at.desc())
+        .distinct(Scan.url)
+    )
+    rows = (await session.execute(statement)).all()
+    return {row.url: row for row in rows if not is_partial(row.result)}
+
+
+async def lookup_previous_scan(session: AsyncSession, url: str) -> Optional[Dict[str, Any]]:
+    """Result and chunk records of the latest scan of `url` that stored chunks,
+    for incremental rescans (ai_pipeline.PreviousScan), or None."""
+    statement = (
+        select(Scan.result, Scan.chunks)
+        .where(Scan.url == url, Scan.chunks.is_not(None))
+        .order_by(Scan.created_at.desc())
+        .limit(1)
+    )
+    row = (await session.execute(statement)).first()
+    if row is None:
+        return None
+    return {"result": row.result, "chunks": row.chunks}
+
+
+async def load_previous_scan(url: Optional[str]) -> Optional[Dict[str, Any]]:
+    """lookup_previous_scan in its own session. Errors only cost the reuse."""
+    if not url or not settings.INCREMENTAL_SCANS_ENABLED:
+        return None
+    try:
+        async with async_session_factory() as session:
+            return await lookup_previous_scan(session, url)
+    except Exception as e:
+        logger.warning(f"Previous Scan Lookup Error: {e}")
+        return None
@@ -0,0 +1,74 @@
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models import ClaimRecord, Scan
+
+# Writes page scans. The full ScanResult stays in Scan.result (served back as
+# is); its claims are also written to the claims table, one row each, in one
+# bulk insert per scan, so analytics can filter by category / risk / time
+# through indexes instead of reading every JSONB document.
+
+
+def scan_score(result: Dict[str, Any]) -> Optional[float]:
+    score = result.get("trust_score")
+    return float(score) if isinstance(score, (int, float)) else None
+
+
+def claim_rows(scan_id: UUID, result: Dict[str, Any], created_at) -> List[Dict[str, Any]]:
+    """ClaimRecord rows for the claims of a stored ScanResult dict."""
+    rows = []
+    for claim in result.get("claims") or []:
+        if not isinstance(claim, dict) or not claim.get("text"):
+            continue
+        confidence = claim.get("confidence")
+        rows.append(dict(
+            scan_id=scan_id,
+            claim_text=claim["text"],
+            category=str(claim.get("category") or "unknown").strip().lower(),
+            risk_level=str(claim.get("risk_level") or "low").strip().lower(),
+            explanation=claim.get("explanation"),
+            confidence=float(confidence) if isinstance(confidence, (int, float)) else None,
+            created_at=created_at,
+        ))
+    return rows
+
+
+async def add_scan(session: AsyncSession, **fields) -> Scan:
+    """Inserts a Scan (score taken from its result) and its claim rows in the
+    session's transaction, without committing."""
+    scan = Scan(**fields)
+    if scan.score is None:
+        scan.score = scan_score(scan.result)
+    session.add(scan)
+    await session.flush()
+    rows = claim_rows(scan.id, scan.result, scan.created_at)
+    if rows:
+        await session.execute(insert(ClaimRecord), rows)
+    return scan
+
+
+async def store_scan(session: AsyncSession, **fields) -> Scan:
+    """add_scan, then commits and returns the refreshed Scan."""
+    scan = await add_scan(session, **fields)
+    await session.commit()
+    await session.refresh(scan)
+    return scan
+
+
+async def store_scans(session: AsyncSession, scans: List[Dict[str, Any]]) -> None:
+    """Bulk variant for many scans (dicts of Scan columns with id and created_at set):
+    one insert for the scans, one for all their claims."""
+    if not scans:
+        return
+    rows = []
+    for values in scans:
+        if values.get("score") is None:
+            values["score"] = scan_score(values["result"])
+        rows.extend(claim_rows(values["id"], values["result"], values["created_at"]))
+    await session.execute(insert(Scan), scans)
+    if rows:
+        await session.execute(insert(ClaimRecord), rows)
+    await session.commit()
@@ -0,0 +1,80 @@
+import math
+from collections import Counter
+from typing import Any, Dict, List, TypedDict
+
+# Deterministic page scoring over verified claims (no LLM call).
+#
+# Each claim contributes a penalty: risk weight x category weight x confidence.
+# The trust score decays exponentially with the total penalty, so one confident
+# high-risk health claim costs ~35 points and a handful of them approach 0.
+
+RISK_WEIGHTS = {"high": 1.0, "medium": 0.4, "low": 0.05}
+CATEGORY_WEIGHTS = {"health": 1.0, "financial": 1.0, "trust": 0.7, "urgency": 0.5}
+DEFAULT_CATEGORY_WEIGHT = 0.6
+DEFAULT_CONFIDENCE = 0.5
+DECAY = 0.5
+
+HIGH_RISK_SCORE = 40
+MEDIUM_RISK_SCORE = 70
+
+
+class PageScore(TypedDict):
+    trust_score: int
+    page_risk: str
+    summary: str
+
+
+def _confidence(claim: Dict[str, Any]) -> float:
+    try:
+        value = float(claim.get("confidence", DEFAULT_CONFIDENCE))
+    except (TypeError, ValueError):
+        return DEFAULT_CONFIDENCE
+    return min(1.0, max(0.0, value))
+
+
+def claim_penalty(claim: Dict[str, Any]) -> float:
+    risk = RISK_WEIGHTS.get(str(claim.get("risk_level", "")).lower(), RISK_WEIGHTS["medium"])
+    category = CATEGORY_WEIGHTS.get(str(claim.get("category", "")).lower(), DEFAULT_CATEGORY_WEIGHT)
+    return risk * category * _confidence(claim)
+
+
+def score_claims(claims: List[Dict[str, Any]]) -> PageScore:
+    """Computes trust_score (0-100), page_risk and a templated summary."""
+    claims = [c for c in claims if isinstance(c, dict)]
+    total_penalty = sum(claim_penalty(c) for c in claims)
+    trust_score = int(round(100 * math.exp(-DECAY * total_penalty)))
+
+    high = [c for c in claims if str(c.get("risk_level", "")).lower() == "high"]
+    medium = [c for c in claims if str(c.get("risk_level", "")).lower() == "medium"]
+    confident_high = [c for c in high if _confidence(c) >= 0.6]
+
+    if confident_high or trust_score < HIGH_RISK_SCORE:
+        page_risk = "high"
+    elif high or medium or trust_score < MEDIUM_RISK_SCORE:
+        page_risk = "medium"
+    else:
+        page_risk = "low"
+
+    return PageScore(trust_score=trust_score, page_risk=page_risk, summary=template_summary(claims, page_risk))
+
+
+def template_summary(claims: List[Dict[str, Any]], page_risk: str) -> str:
+    """Two-sentence verdict built from the claim list."""
+    if not claims:
+        return "No misleading health, financial, urgency or endorsement claims were found on this page."
+
+    high = sum(1 for c in claims if str(c.get("risk_level", "")).lower() == "high")
+    categories = Counter(str(c.get("category", "Other")).title() for c in claims)
+    top = [name.lower() for name, _ in categories.most_common(2)]
+    noun = "claim" if len(claims) == 1 else "claims"
+
+    first = f"This page makes {len(claims)} notable {noun}, mostly {' and '.join(top)}"
+    first += f", {high} of them rated high risk." if high else ", none rated high risk."
+
+    if page_risk == "high":
+        second = "Treat its promises with strong caution and verify them independently."
+    elif page_risk == "medium":
+        second = "Some statements are questionable, so check them before acting on them."
+    else:
+        second = "Nothing here looks clearly misleading."
+    return f"{first} {second}"
@@ -0,0 +1,195 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from api.schemas import Claim
+
+# Structured LLM output for the chunk stages.
+#
+# 1. The request asks the provider for JSON matching a schema
+#    (STRUCTURED_OUTPUT_MODE: "json_schema", "json_object" or "off").
+# 2. The response is parsed element by element (ClaimStreamParser), so a
+#    truncated or partly malformed array still yields its complete items.
+# 3. Each item is validated against its model (Claim for verified claims).
+# 4. Only the items that failed (or the whole response, if no array was found)
+#    are sent back for a cheap repair call; see ai_pipeline.parse_with_repair.
+
+# --- Response schemas ---
+
+class IdentifiedClaims(BaseModel):
+    claims: List[str]
+
+class VerifiedClaims(BaseModel):
+    verified_claims: List[Claim]
+
+class BatchClaim(Claim):
+    id: str  # "<group>.<claim>" as numbered in a batched verify prompt
+
+class BatchClaimResult(Claim):
+    # Parsed batched verdict: a verdict the model left untagged is kept, so it can
+    # still be matched to its claim by text
+    id: Optional[str] = None
+
+class BatchVerifiedClaims(BaseModel):
+    verified_claims: List[BatchClaim]
+
+class AggregateVerdict(BaseModel):
+    page_risk: str
+    trust_score: int
+    summary: str
+
+class SummaryText(BaseModel):
+    summary: str
+
+
+def response_format_for(model: Type[BaseModel], mode: str) -> Optional[Dict[str, Any]]:
+    """The `response_format` request parameter for `model`, or None when off."""
+    if mode == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": model.__name__, "schema": model.model_json_schema()},
+        }
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
+
+# --- Incremental parsing ---
+
+class ClaimStreamParser:
+    """Incremental parser for the array under `key` in a JSON response.
+
+    feed() can be called with the whole response or with streamed pieces; it
+    returns the elements completed by that piece. Each element is decoded on its
+    own, so one malformed element (kept in `malformed` as raw text) does not cost
+    the others, and a response cut off mid-array keeps everything before the cut.
+    Without `key` (or if the key never appears) a top-level array is accepted.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self.key_re = re.compile(r'"%s"\s*:\s*\[' % re.escape(key)) if key else None
+        self.buffer = ""
+        self.pos: Optional[int] = None  # scan position inside the array
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.element_start: Optional[int] = None
+        self.done = False
+        self.items: List[Any] = []
+        self.malformed: List[str] = []
+
+    @property
+    def found(self) -> bool:
+        return self.pos is not None
+
+    def _find_array(self) -> None:
+        match = self.key_re.search(self.buffer) if self.key_re else None
+        if match:
+            self.pos = match.end()
+            return
+        stripped = self.buffer.lstrip()
+        if stripped.startswith("["):
+            self.pos = len(self.buffer) - len(stripped) + 1
+
+    def _finish_element(self, end: int) -> List[Any]:
+        if self.element_start is None:
+            return []
+        raw = self.buffer[self.element_start:end].strip()
+        self.element_start = None
+        try:
+            item = json.loads(raw)
+        except json.JSONDecodeError:
+            self.malformed.append(raw)
+            return []
+        self.items.append(item)
+        return [item]
+
+    def feed(self, text: str) -> List[Any]:
+        self.buffer += text
+        if self.done:
+            return []
+        if self.pos is None:
+            self._find_array()
+            if self.pos is None:
+                return []
+
+        completed: List[Any] = []
+        i = self.pos
+        while i < len(self.buffer):
+            c = self.buffer[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif c == "\\":
+                    self.escaped = True
+                elif c == '"':
+                    self.in_string = False
+            elif c == '"':
+                self.in_string = True
+                if self.depth == 0 and self.element_start is None:
+                    self.element_start = i
+            elif c in "{[":
+                if self.depth == 0 and self.element_start is None:
+                    self.element_start = i
+                self.depth += 1
+            elif c in "}]":
+                if self.depth == 0:
+                    # Closing bracket of the array itself
+                    completed.extend(self._finish_element(i))
+                    self.done = True
+                    i += 1
+                    break
+                self.depth -= 1
+            elif c == "," and self.depth == 0:
+                completed.extend(self._finish_element(i))
+            elif not c.isspace() and self.depth == 0 and self.element_start is None:
+                self.element_start = i
+            i += 1
+        self.pos = i
+        return completed
+
+    def close(self) -> List[Any]:
+        """End of input: decodes a last element that was complete but unterminated."""
+        if self.done or self.in_string or self.depth != 0:
+            return []
+        return self._finish_element(len(self.buffer))
+
+# --- Validation ---
+
+def validate_items(items: List[Any], item_type: Any) -> Tuple[List[Any], List[Any]]:
+    """Splits parsed items into (valid, invalid). item_type is `str` or a model;
+    valid model items are returned as plain dicts, as the pipeline uses them."""
+    valid, invalid = [], []
+    for item in items:
+        if item_type is str:
+            if isinstance(item, str) and item.strip():
+                valid.append(item)
+            else:
+                invalid.append(item)
+            continue
+        try:
+            valid.append(item_type.model_validate(item).model_dump())
+        except ValidationError:
+            invalid.append(item)
+    return valid, invalid
+
+
+def parse_items(content: str, key: str, item_type: Any) -> Tuple[List[Any], List[str], bool]:
+    """Parses a full response. Returns (valid items, raw text of failed items,
+    whether the array was found at all)."""
+    parser = ClaimStreamParser(key)
+    parser.feed(content)
+    parser.close()
+    valid, invalid = validate_items(parser.items, item_type)
+    failed = parser.malformed + [json.dumps(item) for item in invalid]
+    return valid, failed, parser.found
+
+
+def repair_prompt(model: Type[BaseModel], key: str) -> str:
+    return (
+        "You repair malformed JSON. Rewrite the input as a JSON object "
+        f'{{"{key}": [...]}} that matches this JSON schema, keeping the original '
+        "wording of every item. Drop items that cannot be repaired. Return ONLY the JSON.\n"
+        f"SCHEMA: {json.dumps(model.model_json_schema(), separators=(',', ':'))}"
+    )
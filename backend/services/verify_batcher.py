@@ -0,0 +1,169 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, TypedDict
+
+from services.chunking import count_tokens, iter_sentences
+from services.claim_cache import normalize_text
+from services.llm_router import answered_models, track_answers
+from services.llm_scheduler import Priority, llm_priority
+from services.metrics import registry
+
+# Verify batching: identified claims from many chunks (of one page, or of
+# concurrent scans from different requests) are verified together in one call.
+#
+# Each chunk contributes only the sentences around its claims (claim_context)
+# instead of the whole chunk. Pending items are flushed when they reach the
+# token budget or the item limit, or when the oldest has waited max_wait.
+#
+# The flush runs with the highest priority among its items. Its wall time and
+# tokens are recorded under the "verify" stage of the trace that opened the
+# batch; the models that answered it are reported to every item's caller
+# (llm_router.track_answers).
+
+FALLBACK_CONTEXT_CHARS = 2000
+
+VERIFY_BATCH_SIZE = registry.histogram(
+    "liespy_verify_batch_items", "Chunks verified per verify call.", buckets=(1, 2, 4, 8, 16, 32))
+
+
+class VerifyItem(TypedDict):
+    context: str
+    claims: List[str]
+    tokens: int
+    priority: Priority
+    answered: Optional[Set[str]]
+    future: asyncio.Future
+
+
+def claim_context(chunk: str, claims: List[str], radius: int = 2) -> str:
+    """The sentences containing each claim plus `radius` sentences either side,
+    in page order, with "[...]" where text was left out. Falls back to the start
+    of the chunk if no claim can be located."""
+    sentences = [sentence for sentence, _ in iter_sentences(chunk)]
+    normalized = [normalize_text(sentence) for sentence in sentences]
+    keep = [False] * len(sentences)
+    for claim in claims:
+        target = normalize_text(claim)
+        if not target:
+            continue
+        for i, sentence in enumerate(normalized):
+            if target in sentence or (sentence and sentence in target):
+                for j in range(max(0, i - radius), min(len(sentences), i + radius + 1)):
+                    keep[j] = True
+
+    if not any(keep):
+        return chunk[:FALLBACK_CONTEXT_CHARS]
+
+    parts: List[str] = []
+    for i, sentence in enumerate(sentences):
+        if keep[i]:
+            if i > 0 and not keep[i - 1]:
+                parts.append("[...]")
+            parts.append(sentence)
+    if not keep[-1]:
+        parts.append("[...]")
+    return " ".join(parts)
+
+
+class VerifyBatcher:
+    """Collects verify requests and sends them in shared calls.
+
+    `send(items)` performs one verify call for the items and returns one list of
+    verified claims per item, in order. An exception fails every item of the batch.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List[VerifyItem]], Awaitable[List[List[Dict[str, Any]]]]],
+        max_tokens: int = 6000,
+        max_wait: float = 0.05,
+        max_items: int = 16,
+        context_sentences: int = 2,
+    ):
+        self.send = send
+        self.max_tokens = max_tokens
+        self.max_wait = max_wait
+        self.max_items = max_items
+        self.context_sentences = context_sentences
+        self._pending: List[VerifyItem] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+        self.stats: Dict[str, int] = {
+            "batches": 0,
+            "items": 0,
+            "claims": 0,
+            "flushed_full": 0,
+            "flushed_deadline": 0,
+            "context_chars_saved": 0,
+        }
+
+    async def verify(self, chunk: str, claims: List[str]) -> List[Dict[str, Any]]:
+        if not claims:
+            return []
+        context = claim_context(chunk, claims, self.context_sentences)
+        self.stats["context_chars_saved"] += max(0, len(chunk) - len(context))
+        item = VerifyItem(
+            context=context,
+            claims=claims,
+            tokens=count_tokens(context) + sum(count_tokens(claim) for claim in claims),
+            priority=llm_priority.get(),
+            answered=answered_models.get(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+
+        if self._pending and self._pending_tokens + item["tokens"] > self.max_tokens:
+            self._flush("full")
+        self._pending.append(item)
+        self._pending_tokens += item["tokens"]
+        if self._pending_tokens >= self.max_tokens or len(self._pending) >= self.max_items:
+            self._flush("full")
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush, "deadline")
+
+        return await item["future"]
+
+    def _flush(self, reason: str) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        if not batch:
+            return
+        self.stats[f"flushed_{reason}"] += 1
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[VerifyItem]) -> None:
+        live = [item for item in batch if not item["future"].done()]
+        if not live:
+            return
+        self.stats["batches"] += 1
+        self.stats["items"] += len(live)
+        self.stats["claims"] += sum(len(item["claims"]) for item in live)
+        VERIFY_BATCH_SIZE.observe(len(live))
+
+        token = llm_priority.set(min(item["priority"] for item in live))
+        try:
+            with track_answers() as answered:
+                results = await self.send(live)
+        except Exception as e:
+            for item in live:
+                if not item["future"].done():
+                    item["future"].set_exception(e)
+            return
+        finally:
+            llm_priority.reset(token)
+
+        for item, verified in zip(live, results):
+            if item["answered"] is not None:
+                item["answered"].update(answered)
+            if not item["future"].done():
+                item["future"].set_result(verified)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "avg_items_per_batch": round(self.stats["items"] / self.stats["batches"], 2) if self.stats["batches"] else 0.0,
+        }
@@ -0,0 +1,43 @@
+import json
+from fastapi.testclient import TestClient
+from api import routes
+from api.schemas import ScanResult
+from main import app
+
+client = TestClient(app)
+
+def test_batch_streams_ndjson_and_scans_duplicates_once(monkeypatch):
+    scanned = []
+
+    async def fake_run_page_scan(candidates, metadata={}, indicators=[]):
+        scanned.append(candidates)
+        return ScanResult(page_risk="low", trust_score=95, summary="ok", claims=[])
+
+    async def no_cache(session, urls):
+        return {}
+
+    monkeypatch.setattr(routes, "run_page_scan", fake_run_page_scan)
+    monkeypatch.setattr(routes, "lookup_cached_scans", no_cache)
+
+    payload = {"items": [
+        {"id": "a", "text": "Only today 90% off"},
+        {"id": "b", "text": "Only today 90% off"},
+        {"id": "c", "candidates": ["This pill cures cancer"]},
+        {"id": "d"},
+    ]}
+    response = client.post("/api/v1/scan/batch", json=payload)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results = {line["id"]: line for line in lines[:-1]}
+    assert results["d"]["status"] == "error"
+    assert results["a"]["status"] == results["b"]["status"] == results["c"]["status"] == "ok"
+    assert results["a"]["response"]["result"]["trust_score"] == 95
+    assert lines[-1] == {"done": True, "items": 4, "cached": 0, "scanned": 3, "errors": 1, "stored": 0}
+    assert len(scanned) == 2
+
+def test_batch_rejects_too_many_items(monkeypatch):
+    monkeypatch.setattr(routes.settings, "BATCH_MAX_ITEMS", 1)
+    response = client.post("/api/v1/scan/batch", json={"items": [{"text": "a"}, {"text": "b"}]})
+    assert response.status_code == 413
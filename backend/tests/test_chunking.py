@@ -0,0 +1,55 @@
+import types
+from services.chunking import count_tokens, iter_sentences, iter_chunks, dedupe_claims
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("Buy now!") == 3
+
+def test_iter_sentences_marks_paragraphs():
+    text = "First one. Second one!\nNew paragraph? Yes."
+    assert list(iter_sentences(text)) == [
+        ("First one.", True),
+        ("Second one!", False),
+        ("New paragraph?", True),
+        ("Yes.", False),
+    ]
+
+def test_chunks_respect_budget_and_sentence_boundaries():
+    sentences = [f"Sentence number {i} claims this pill cures everything." for i in range(200)]
+    text = " ".join(sentences)
+    chunks = iter_chunks(text, max_tokens=100, overlap_tokens=0)
+    assert isinstance(chunks, types.GeneratorType)
+    chunks = list(chunks)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert count_tokens(chunk) <= 100
+        assert chunk.endswith(".")
+    # No overlap: every sentence appears exactly once
+    assert " ".join(chunks) == text
+
+def test_chunks_overlap_whole_sentences():
+    text = " ".join(f"Claim {i} is here." for i in range(50))
+    chunks = list(iter_chunks(text, max_tokens=40, overlap_tokens=10))
+    last_sentence = chunks[0].split(". ")[-1]
+    assert last_sentence in chunks[1]
+    assert not chunks[1].startswith(chunks[0])
+
+def test_oversized_sentence_is_split():
+    text = " ".join(["word"] * 500)
+    chunks = list(iter_chunks(text, max_tokens=50, overlap_tokens=0))
+    assert len(chunks) > 1
+    assert all(count_tokens(c) <= 50 for c in chunks)
+
+def test_empty_text_yields_nothing():
+    assert list(iter_chunks("")) == []
+
+def test_dedupe_claims_keeps_strongest_verdict():
+    claims = [
+        {"text": "This pill cures cancer.", "risk_level": "medium", "confidence": 0.6},
+        {"text": "Buy now", "risk_level": "low", "confidence": 0.9},
+        {"text": "this pill  cures cancer", "risk_level": "high", "confidence": 0.8},
+    ]
+    deduped = dedupe_claims(claims)
+    assert len(deduped) == 2
+    assert deduped[0]["risk_level"] == "high"
+    assert deduped[1]["text"] == "Buy now"
@@ -0,0 +1,54 @@
+import asyncio
+from services.claim_cache import ClaimCache, make_cache_key, normalize_text
+
+def test_normalize_text():
+    assert normalize_text("  Buy   NOW\n\tfor 50%  off ") == "buy now for 50% off"
+    assert normalize_text("") == ""
+
+def test_key_ignores_whitespace_and_case():
+    a = make_cache_key("This pill cures cancer.", "sonar-pro", "v1")
+    b = make_cache_key("this  pill\ncures CANCER.", "sonar-pro", "v1")
+    assert a == b
+
+def test_key_scoped_to_model_and_prompt_version():
+    base = make_cache_key("text", "sonar-pro", "v1")
+    assert base != make_cache_key("text", "sonar", "v1")
+    assert base != make_cache_key("text", "sonar-pro", "v2")
+
+def test_memory_hit_and_miss():
+    cache = ClaimCache(memory_size=10, db_enabled=False)
+    claims = [{"text": "x", "category": "Health", "risk_level": "high", "explanation": "", "confidence": 0.9}]
+
+    async def run():
+        assert await cache.get("k") is None
+        await cache.put("k", "m", "v1", claims)
+        assert await cache.get("k") == claims
+
+    asyncio.run(run())
+    stats = cache.snapshot()
+    assert stats["misses"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_lru_eviction():
+    cache = ClaimCache(memory_size=2, db_enabled=False)
+
+    async def run():
+        await cache.put("a", "m", "v1", [])
+        await cache.put("b", "m", "v1", [])
+        await cache.get("a")  # "b" is now least recently used
+        await cache.put("c", "m", "v1", [])
+        return await cache.get("a"), await cache.get("b")
+
+    a, b = asyncio.run(run())
+    assert a == []
+    assert b is None
+
+def test_ttl_expiry():
+    cache = ClaimCache(memory_size=10, ttl_seconds=-1, db_enabled=False)
+
+    async def run():
+        await cache.put("k", "m", "v1", [])
+        return await cache.get("k")
+
+    assert asyncio.run(run()) is None
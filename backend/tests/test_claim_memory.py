@@ -0,0 +1,115 @@
+import asyncio
+import numpy as np
+from core.config import settings
+from services import ai_pipeline
+from services.claim_memory import ClaimMemory, HashingEmbedder
+
+def verdict(text, risk="high"):
+    return {"text": text, "category": "Health", "risk_level": risk, "explanation": "Unproven.", "confidence": 0.9}
+
+def test_hashing_embedder_separates_near_duplicates_from_other_claims():
+    embed = HashingEmbedder()
+
+    def similarity(a, b):
+        va, vb = embed.embed_one(a), embed.embed_one(b)
+        return float(va @ vb / np.linalg.norm(va) / np.linalg.norm(vb))
+
+    assert similarity("This tea cures diabetes in 7 days", "This tea cures diabetes in just 7 days!") > 0.9
+    assert similarity("Cures diabetes in 7 days", "Cures cancer in 7 days") < 0.9
+    assert similarity("Guaranteed 10x returns", "Guaranteed 2x returns") < 0.9
+
+def test_near_duplicate_reuses_verdict():
+    memory = ClaimMemory(HashingEmbedder(), threshold=0.9)
+
+    async def run():
+        await memory.add([verdict("This tea cures diabetes in 7 days")])
+        return await memory.lookup(["This tea cures diabetes in just 7 days!", "Cures cancer in 7 days"])
+
+    hit, miss = asyncio.run(run())
+    assert hit["risk_level"] == "high" and hit["text"] == "This tea cures diabetes in just 7 days!"
+    assert miss is None
+    assert memory.snapshot()["hits"] == 1 and memory.snapshot()["misses"] == 1
+
+def test_negated_claims_do_not_match():
+    memory = ClaimMemory(HashingEmbedder(), threshold=0.9)
+
+    async def run():
+        await memory.add([verdict("Clinically proven to reduce blood pressure", risk="high")])
+        await memory.add([verdict("Not clinically proven to reduce blood pressure", risk="low")])
+        return await memory.lookup([
+            "Not clinically proven to reduce blood pressure!",
+            "This supplement isn't clinically proven to reduce blood pressure",
+            "Clinically proven to reduce blood pressure!",
+            "Never clinically proven to reduce blood pressure",
+        ])
+
+    negated, contracted, affirmed, never = asyncio.run(run())
+    assert memory.snapshot()["entries"] == 2
+    assert negated["risk_level"] == "low"
+    assert contracted is None or contracted["risk_level"] == "low"
+    assert affirmed["risk_level"] == "high"
+    assert never is None or never["risk_level"] == "low"
+
+def test_negated_claim_misses_affirmative_entry():
+    memory = ClaimMemory(HashingEmbedder(), threshold=0.9)
+
+    async def run():
+        await memory.add([verdict("Clinically proven to reduce blood pressure")])
+        return await memory.lookup(["Not clinically proven to reduce blood pressure"])
+
+    assert asyncio.run(run()) == [None]
+
+def test_full_memory_evicts_least_recently_used():
+    memory = ClaimMemory(HashingEmbedder(), threshold=0.9, max_entries=2)
+
+    async def run():
+        await memory.add([verdict("Cures diabetes overnight")])
+        await memory.add([verdict("Earn $500 per day from home")])
+        await memory.lookup(["Cures diabetes overnight"])
+        await memory.add([verdict("Only 3 spots left today")])
+        return await memory.lookup(["Cures diabetes overnight", "Earn $500 per day from home"])
+
+    kept, evicted = asyncio.run(run())
+    assert kept is not None and evicted is None
+    assert memory.snapshot()["evictions"] == 1
+
+def test_full_memory_reclaims_expired_entry_before_live_ones():
+    memory = ClaimMemory(HashingEmbedder(), threshold=0.9, max_entries=2, ttl_seconds=60)
+
+    async def run():
+        await memory.add([verdict("Earn $500 per day from home")])
+        await memory.add([verdict("Cures diabetes overnight")])
+        memory._created[1] -= 120  # expired, but the most recently used entry
+        await memory.add([verdict("Only 3 spots left today")])
+        return await memory.lookup(["Earn $500 per day from home", "Only 3 spots left today"])
+
+    live, added = asyncio.run(run())
+    assert live is not None and added is not None
+
+def test_memory_persists_to_disk(tmp_path):
+    path = str(tmp_path / "claims")
+    memory = ClaimMemory(HashingEmbedder(), path=path)
+    asyncio.run(memory.add([verdict("Cures diabetes overnight")]))
+    memory.save()
+
+    restored = ClaimMemory(HashingEmbedder(), path=path)
+    assert restored.snapshot()["entries"] == 1
+    assert asyncio.run(restored.lookup(["cures diabetes overnight"]))[0]["risk_level"] == "high"
+
+def test_pipeline_only_verifies_unknown_claims(monkeypatch):
+    memory = ClaimMemory(HashingEmbedder(), threshold=0.9)
+    asyncio.run(memory.add([verdict("This tea cures diabetes in 7 days")]))
+    monkeypatch.setattr(ai_pipeline, "claim_memory", memory)
+    monkeypatch.setattr(settings, "CLAIM_MEMORY_ENABLED", True)
+    monkeypatch.setattr(settings, "VERIFY_BATCHING_ENABLED", False)
+    verified_claims = []
+
+    async def verify(chunk, claims, strict=False):
+        verified_claims.append(claims)
+        return [verdict(claim, risk="medium") for claim in claims]
+
+    monkeypatch.setattr(ai_pipeline, "verify_chunk_claims", verify)
+    result = asyncio.run(ai_pipeline.verify_with_memory("text", ["This tea cures diabetes in just 7 days", "Act now"]))
+    assert verified_claims == [["Act now"]]
+    assert [claim["risk_level"] for claim in result] == ["high", "medium"]
+    assert memory.snapshot()["entries"] == 2
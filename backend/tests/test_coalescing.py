@@ -0,0 +1,113 @@
+import asyncio
+from core.config import settings
+from services import coalescing
+from services.coalescing import SingleFlight, content_fingerprint, advisory_lock_id
+
+def test_content_fingerprint_is_normalized():
+    assert content_fingerprint(["Buy  NOW", "x"]) == content_fingerprint(["buy now", "x"])
+    assert content_fingerprint(["a", "b"]) != content_fingerprint(["ab"])
+
+def test_advisory_lock_id_fits_bigint():
+    lock_id = advisory_lock_id("https://example.com:abc")
+    assert -2 ** 63 <= lock_id < 2 ** 63
+    assert lock_id == advisory_lock_id("https://example.com:abc")
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    runs = []
+
+    async def scan():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*[flight.do("key", scan) for _ in range(5)])
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(runs) == 1
+    assert flight.snapshot() == {"leaders": 1, "followers": 4, "in_flight": 0}
+
+def test_cancelled_caller_does_not_cancel_shared_run():
+    flight = SingleFlight()
+
+    async def scan():
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def run():
+        leader = asyncio.create_task(flight.do("key", scan))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", scan))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == "result"
+
+def test_advisory_lock_polls_without_holding_a_connection(monkeypatch):
+    attempts = iter([False, False, True])
+    log = []
+
+    class Connection:
+        async def execute(self, statement, params):
+            log.append(str(statement).split("(")[0].replace("SELECT ", ""))
+            value = next(attempts) if "try" in str(statement) else True
+            return type("Result", (), {"scalar": lambda self: value})()
+
+        async def close(self):
+            log.append("close")
+
+        async def invalidate(self):
+            log.append("invalidate")
+
+    class LockPool:
+        async def connect(self):
+            log.append("connect")
+            return Connection()
+
+    monkeypatch.setattr(coalescing, "lock_engine", lambda: LockPool())
+    monkeypatch.setattr(settings, "COALESCE_LOCK_POLL_SECONDS", 0)
+
+    async def run():
+        async with coalescing.advisory_lock("page"):
+            log.append("body")
+
+    asyncio.run(run())
+    attempt = ["connect", "pg_try_advisory_lock"]
+    assert log == attempt + ["close"] + attempt + ["close"] + attempt + ["body", "pg_advisory_unlock", "close"]
+
+def test_scan_stored_while_waiting_is_reused_only_for_the_same_content(monkeypatch):
+    from contextlib import asynccontextmanager
+    from api import routes
+    from api.schemas import PageScanRequest
+
+    statements, scanned = [], []
+
+    class Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):
+            return False
+
+        async def execute(self, statement):
+            statements.append(statement.compile().params)
+            return type("Result", (), {"scalars": lambda self: type("Scalars", (), {"first": lambda self: None})()})()
+
+    @asynccontextmanager
+    async def lock(key):
+        yield
+
+    async def scan_and_store(request):
+        scanned.append(request)
+        return "stored"
+
+    monkeypatch.setattr(routes, "advisory_lock", lock)
+    monkeypatch.setattr(routes, "async_session_factory", Session)
+    monkeypatch.setattr(routes, "_scan_and_store", scan_and_store)
+
+    request = PageScanRequest(url="https://example.com", candidates=["Our tea cures cancer."])
+    assert asyncio.run(routes._run_and_store_page_scan(request, "page")) == "stored"
+    assert routes.candidates_fingerprint(request.candidates) in statements[0].values()
+    assert len(scanned) == 1
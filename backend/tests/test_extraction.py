@@ -0,0 +1,44 @@
+import json
+import os
+from services.extraction import extract_main_text, classify_block, link_density, MAX_LINK_DENSITY
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "pages")
+
+def load(name):
+    with open(os.path.join(FIXTURES, f"{name}.json")) as f:
+        return json.load(f)["candidates"]
+
+def test_link_density():
+    assert link_density("Home | Shop | About | Contact") > MAX_LINK_DENSITY
+    assert link_density("This supplement cures diabetes in seven days.") == 0
+
+def test_classify_block():
+    assert classify_block("© 2024 Example Inc. All rights reserved.") == "boilerplate"
+    assert classify_block("Order Now") == "short"
+    assert classify_block(
+        "Doctors are stunned: this natural supplement reverses type 2 diabetes in just 7 days."
+    ) == "content"
+
+def test_sales_page_keeps_copy_and_drops_chrome():
+    result = extract_main_text(load("sales_supplement"))
+    assert "reverses type 2 diabetes" in result["text"]
+    assert "Melts 30 lbs of belly fat" in result["text"]  # bullet next to content
+    assert "All rights reserved" not in result["text"]
+    assert "Privacy Policy" not in result["text"]
+    assert result["text"].count("Order Now") == 1  # duplicate dropped
+    assert result["confidence"] >= 0.5
+
+def test_news_article_drops_navigation():
+    result = extract_main_text(load("news_article"))
+    assert "benchmark interest rate unchanged" in result["text"]
+    assert "Skip to main content" not in result["text"]
+    assert "Share on Twitter" not in result["text"]
+
+def test_navigation_only_page_has_low_confidence():
+    result = extract_main_text(load("navigation_only"))
+    assert result["confidence"] < 0.5
+
+def test_short_text_passes_through():
+    result = extract_main_text(["Only today 90% off"])
+    assert result["text"] == "Only today 90% off"
+    assert result["confidence"] == 1.0
@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from api import routes
+from api.schemas import ScanResponse
+from api.utils import etag_matches, scan_etag, scan_response_json
+from main import app
+
+CLAIM = {"text": "Cures cancer", "category": "Health", "risk_level": "high", "explanation": "Unproven. " * 50, "confidence": 0.9}
+RESULT_JSON = json.dumps({"page_risk": "high", "trust_score": 10, "summary": "Scam.", "claims": [CLAIM] * 5})
+ROW = SimpleNamespace(id=uuid4(), result_json=RESULT_JSON, created_at=datetime(2026, 1, 2, 3, 4, 5, 678000), partial=False)
+
+client = TestClient(app)
+
+def use_cached_row(monkeypatch):
+    async def lookup(session, url, fingerprint=None):
+        return ROW
+
+    class NoSession:
+        async def __aenter__(self):
+            return None
+
+        async def __aexit__(self, *args):
+            return False
+
+    monkeypatch.setattr(routes, "lookup_cached_scan", lookup)
+    monkeypatch.setattr(routes, "async_session_factory", NoSession)
+
+def test_preserialized_body_matches_scan_response():
+    body = scan_response_json(ROW.id, ROW.result_json, ROW.created_at)
+    expected = ScanResponse(scan_id=ROW.id, result=json.loads(RESULT_JSON), created_at=ROW.created_at, is_cached=True)
+    parsed = json.loads(body)
+    assert ScanResponse(**parsed) == expected
+    assert parsed["created_at"] == expected.model_dump(mode="json")["created_at"]
+
+def test_etag_matching():
+    etag = scan_etag(ROW.id, RESULT_JSON)
+    assert etag != scan_etag(ROW.id, RESULT_JSON.replace("Scam.", "Updated."))
+    assert etag.startswith('W/"')
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+
+def test_cache_hit_revalidates_with_304(monkeypatch):
+    use_cached_row(monkeypatch)
+    payload = {"url": "https://example.com", "candidates": [], "only_check_cache": True}
+    first = client.post("/api/v1/scan/page", json=payload, headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.json()["result"]["trust_score"] == 10
+
+    second = client.post("/api/v1/scan/page", json=payload, headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert "Accept-Encoding" in first.headers["vary"] and "Accept-Encoding" in second.headers["vary"]
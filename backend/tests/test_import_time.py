@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..")
+
+def test_app_import_leaves_heavy_clients_unloaded():
+    # A fresh interpreter must import the app without LangChain, OpenAI,
+    # Supabase or NumPy (tools/bench_import.py LAZY_MODULES). Wall-clock
+    # budgets are left to the tool itself: they are too noisy for the suite.
+    completed = subprocess.run(
+        [sys.executable, "tools/bench_import.py", "--runs", "1", "--budget-ms", "0"],
+        cwd=BACKEND, capture_output=True, text=True,
+    )
+    assert completed.returncode == 0, completed.stdout + completed.stderr
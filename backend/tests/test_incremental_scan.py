@@ -0,0 +1,85 @@
+import asyncio
+from api.schemas import ScanResult
+from core.config import settings
+from services import ai_pipeline
+
+def claim(text):
+    return {"text": text, "category": "Health", "risk_level": "high", "explanation": "", "confidence": 0.9}
+
+def setup(monkeypatch, processed, aggregated):
+    async def fake_extract(candidates, mode=None):
+        return "\n".join(candidates)
+
+    async def fake_process(chunk, strict=False):
+        processed.append(chunk)
+        if chunk == "broken":
+            raise RuntimeError("provider down")
+        if " costs" not in chunk:
+            return []
+        return [claim(chunk.split(" costs")[0])]
+
+    async def fake_aggregate(all_claims, full_text_summary):
+        aggregated.append(len(all_claims))
+        return ScanResult(page_risk="high", trust_score=len(all_claims), summary="new", claims=all_claims)
+
+    monkeypatch.setattr(settings, "PIPELINE_MODE", "two_stage")
+    monkeypatch.setattr(ai_pipeline, "extract_content", fake_extract)
+    monkeypatch.setattr(ai_pipeline, "iter_chunks", lambda text: iter(text.split("\n")))
+    monkeypatch.setattr(ai_pipeline, "process_chunk", fake_process)
+    monkeypatch.setattr(ai_pipeline, "analyze_aggregated_results", fake_aggregate)
+
+def scan(candidates, previous=None):
+    return asyncio.run(ai_pipeline.collect_page_scan(candidates, previous=previous))
+
+def test_rescan_only_processes_changed_chunks(monkeypatch):
+    processed, aggregated = [], []
+    setup(monkeypatch, processed, aggregated)
+
+    first = scan(["Pill A costs $10", "Pill B costs $20"])
+    previous = {"result": first["result"].model_dump(), "chunks": first["chunks"]}
+    processed.clear()
+
+    second = scan(["Pill A costs $10", "Pill C costs $30"], previous)
+    assert processed == ["Pill C costs $30"]
+    assert [c.text for c in second["result"].claims] == ["Pill A", "Pill C"]
+    assert aggregated == [2, 2]
+
+def test_unchanged_claims_skip_aggregation(monkeypatch):
+    processed, aggregated = [], []
+    setup(monkeypatch, processed, aggregated)
+
+    first = scan(["Pill A costs $10"])
+    previous = {"result": first["result"].model_dump(), "chunks": first["chunks"]}
+
+    # Only the price changed: the chunk is re-verified but yields the same claims
+    second = scan(["Pill A costs $12"], previous)
+    assert processed == ["Pill A costs $10", "Pill A costs $12"]
+    assert aggregated == [1]
+    assert second["result"] == first["result"]
+
+def test_failed_chunks_are_not_reused(monkeypatch):
+    processed, aggregated = [], []
+    setup(monkeypatch, processed, aggregated)
+
+    first = scan(["broken", "Pill A costs $10"])
+    assert first["chunks"][0]["fingerprint"] is None
+    previous = {"result": first["result"].model_dump(), "chunks": first["chunks"]}
+    processed.clear()
+
+    scan(["broken", "Pill A costs $10"], previous)
+    assert processed == ["broken"]
+
+def test_complete_rescan_of_partial_scan_is_not_partial(monkeypatch):
+    processed, aggregated = [], []
+    setup(monkeypatch, processed, aggregated)
+
+    first = scan(["Pill A costs $10", "Nothing to see"])
+    # As stored when the second chunk missed its deadline (it has no claims either way)
+    first["chunks"][1]["fingerprint"] = None
+    result = {**first["result"].model_dump(), "partial": True, "missing_chunks": [1]}
+    previous = {"result": result, "chunks": first["chunks"]}
+
+    second = scan(["Pill A costs $10", "Nothing to see"], previous)
+    assert aggregated == [1]
+    assert second["result"].partial is False
+    assert second["result"].missing_chunks == []
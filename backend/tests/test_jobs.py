@@ -0,0 +1,227 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+import pytest
+from api.schemas import PageScanRequest, ScanResult
+from core.config import settings
+from db.models import ScanJob
+from services import jobs
+from services.llm_scheduler import Priority, llm_priority
+
+def failing_job(attempts, max_attempts=3):
+    return ScanJob(
+        payload={"url": "https://example.com", "candidates": ["x"]},
+        attempts=attempts,
+        max_attempts=max_attempts,
+        status="running",
+    )
+
+def run_failing(monkeypatch, job):
+    updates = []
+
+    async def fake_update(job, **values):
+        updates.append(values)
+        return True
+
+    async def broken_stream(**kwargs):
+        raise RuntimeError("provider down")
+        yield
+
+    async def no_cached_scan(request):
+        return None
+
+    monkeypatch.setattr(jobs, "_update_job", fake_update)
+    monkeypatch.setattr(jobs, "_find_cached_scan", no_cached_scan)
+    monkeypatch.setattr(jobs, "stream_page_scan", broken_stream)
+    asyncio.run(jobs.run_job(job))
+    return updates
+
+def test_failed_job_is_requeued_with_backoff(monkeypatch):
+    updates = run_failing(monkeypatch, failing_job(attempts=1))
+    assert updates[-1]["status"] == "queued"
+    assert updates[-1]["error"] == "provider down"
+    assert updates[-1]["run_after"] is not None
+
+def test_job_is_dead_lettered_after_max_attempts(monkeypatch):
+    updates = run_failing(monkeypatch, failing_job(attempts=3))
+    assert updates[-1]["status"] == "dead"
+    assert updates[-1]["error"] == "provider down"
+
+def run_with_result(monkeypatch, job, result, events=(), owned=True):
+    updates, stored, priorities = [], [], []
+
+    async def fake_update(job, **values):
+        updates.append(values)
+        return owned
+
+    async def fake_previous(url):
+        return None
+
+    async def scan(**kwargs):
+        priorities.append((llm_priority.get(), kwargs["scan_deadline"]))
+        for event in events:
+            yield event
+        yield {"event": "result", "data": {"result": result, "chunks": []}}
+
+    async def fake_store(job, scan_fields, **values):
+        if not owned:
+            raise jobs.LeaseLost(job.id)
+        stored.append(scan_fields)
+        updates.append(values)
+
+    async def no_cached_scan(request):
+        return None
+
+    monkeypatch.setattr(jobs, "_update_job", fake_update)
+    monkeypatch.setattr(jobs, "_find_cached_scan", no_cached_scan)
+    monkeypatch.setattr(jobs, "load_previous_scan", fake_previous)
+    monkeypatch.setattr(jobs, "stream_page_scan", scan)
+    monkeypatch.setattr(jobs, "_store_result", fake_store)
+    asyncio.run(jobs.run_job(job))
+    return updates, stored, priorities
+
+def partial_result():
+    return ScanResult(page_risk="low", trust_score=80, summary="", claims=[], partial=True, missing_chunks=[1])
+
+def test_job_runs_at_batch_priority_without_interactive_deadline(monkeypatch):
+    monkeypatch.setattr(settings, "SCAN_DEADLINE_SECONDS", 5.0)
+    result = ScanResult(page_risk="low", trust_score=80, summary="", claims=[])
+    updates, stored, priorities = run_with_result(monkeypatch, failing_job(attempts=1), result)
+    assert priorities == [(Priority.BATCH, settings.JOB_SCAN_DEADLINE_SECONDS)]
+    assert updates[-1]["status"] == "succeeded"
+    assert llm_priority.get() == Priority.INTERACTIVE
+
+def test_partial_job_is_retried_then_stored_as_partial(monkeypatch):
+    updates, stored, _ = run_with_result(monkeypatch, failing_job(attempts=1), partial_result())
+    assert updates[-1]["status"] == "queued" and stored == []
+
+    updates, stored, _ = run_with_result(monkeypatch, failing_job(attempts=3), partial_result())
+    assert updates[-1]["status"] == "partial"
+    assert "missing chunks [1]" in updates[-1]["error"]
+    assert len(stored) == 1
+
+def test_job_that_lost_its_lease_writes_nothing(monkeypatch):
+    result = ScanResult(page_risk="low", trust_score=80, summary="", claims=[])
+    progress = {"event": "status", "data": {}}
+    updates, stored, _ = run_with_result(monkeypatch, failing_job(attempts=1), result, events=[progress], owned=False)
+    # The progress write found another worker's lease: no store, no requeue
+    assert updates == [{"progress": {"stage": "status"}}]
+    assert stored == []
+
+    updates, stored, _ = run_with_result(monkeypatch, failing_job(attempts=1), result, owned=False)
+    assert updates == [] and stored == []
+
+def test_job_finishes_with_a_fresh_cached_scan_unless_forced(monkeypatch):
+    updates, scanned = [], []
+    cached = SimpleNamespace(id=uuid4())
+
+    async def fake_update(job, **values):
+        updates.append(values)
+        return True
+
+    async def lookup(session, url, fingerprint=None):
+        return cached
+
+    class Session:
+        async def __aenter__(self):
+            return None
+
+        async def __aexit__(self, *args):
+            return False
+
+    async def scan(**kwargs):
+        scanned.append(kwargs)
+        raise RuntimeError("provider down")
+        yield
+
+    monkeypatch.setattr(jobs, "_update_job", fake_update)
+    async def fake_previous(url):
+        return None
+
+    monkeypatch.setattr(jobs, "lookup_cached_scan", lookup)
+    monkeypatch.setattr(jobs, "load_previous_scan", fake_previous)
+    monkeypatch.setattr(jobs, "async_session_factory", Session)
+    monkeypatch.setattr(jobs, "stream_page_scan", scan)
+
+    asyncio.run(jobs.run_job(failing_job(attempts=1)))
+    assert updates[-1]["status"] == "succeeded" and updates[-1]["scan_id"] == cached.id
+    assert scanned == []
+
+    job = failing_job(attempts=1)
+    job.payload = dict(job.payload, force_refresh=True)
+    asyncio.run(jobs.run_job(job))
+    assert len(scanned) == 1 and updates[-1]["status"] == "queued"
+
+def test_only_check_cache_jobs_are_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(jobs.enqueue_scan_job(None, PageScanRequest(candidates=["x"], only_check_cache=True)))
+
+def test_heartbeat_renews_the_lease_while_the_scan_runs(monkeypatch):
+    renewals = []
+
+    async def fake_update(job, **values):
+        renewals.append(values["lease_expires_at"])
+        return len(renewals) < 3
+
+    monkeypatch.setattr(jobs, "_update_job", fake_update)
+
+    async def scenario():
+        # Renews every third of the lease, stops once the lease is lost
+        await asyncio.wait_for(jobs._heartbeat(failing_job(attempts=1), timedelta(seconds=0.03)), timeout=1)
+
+    asyncio.run(scenario())
+    assert len(renewals) == 3
+
+def test_worker_survives_job_errors(monkeypatch):
+    claims = iter([failing_job(attempts=1), failing_job(attempts=1)])
+    runs = []
+
+    async def claim():
+        return next(claims, None)
+
+    async def run(job):
+        runs.append(job)
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(jobs, "claim_next_job", claim)
+    monkeypatch.setattr(jobs, "run_job", run)
+
+    async def scenario():
+        pool = jobs.JobWorkerPool(workers=1, poll_interval=0.01)
+        pool.start()
+        await asyncio.sleep(0.05)
+        await pool.stop()
+
+    asyncio.run(scenario())
+    assert len(runs) == 2
+
+def test_store_result_rolls_back_when_the_lease_was_taken(monkeypatch):
+    calls = []
+
+    class Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):
+            return False
+
+        async def execute(self, statement):
+            calls.append("update")
+            return type("Result", (), {"rowcount": 0})()
+
+        async def rollback(self):
+            calls.append("rollback")
+
+        async def commit(self):
+            calls.append("commit")
+
+    async def fake_add_scan(session, **fields):
+        calls.append("add_scan")
+        return ScanJob(id=None)
+
+    monkeypatch.setattr(jobs, "async_session_factory", Session)
+    monkeypatch.setattr(jobs, "add_scan", fake_add_scan)
+    with pytest.raises(jobs.LeaseLost):
+        asyncio.run(jobs._store_result(failing_job(attempts=1), {}, status="succeeded"))
+    assert calls == ["add_scan", "update", "rollback"]
@@ -0,0 +1,90 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+from core.config import settings
+from services import ai_pipeline, jobs
+from services.lifecycle import InflightTracker
+
+def test_drain_waits_for_inflight_work():
+    tracker = InflightTracker()
+
+    async def scenario():
+        async def work():
+            with tracker.track():
+                await asyncio.sleep(0.05)
+
+        task = asyncio.create_task(work())
+        await asyncio.sleep(0)
+        assert tracker.count == 1
+        drained = await tracker.drain(timeout=1)
+        await task
+        return drained
+
+    assert asyncio.run(scenario()) is True
+    assert tracker.count == 0
+
+def test_drain_times_out_while_work_is_running():
+    tracker = InflightTracker()
+
+    async def scenario():
+        with tracker.track():
+            return await tracker.drain(timeout=0.01)
+
+    assert asyncio.run(scenario()) is False
+
+def test_page_scan_is_counted_until_it_finishes(monkeypatch):
+    seen = []
+
+    async def body(*args):
+        seen.append(ai_pipeline.scans_in_flight.count)
+        yield {"event": "result", "data": {}}
+
+    monkeypatch.setattr(ai_pipeline, "_stream_page_scan", body)
+    asyncio.run(ai_pipeline.collect_page_scan(["text"]))
+    assert seen == [1]
+    assert ai_pipeline.scans_in_flight.count == 0
+
+def test_job_pool_stop_lets_running_job_finish(monkeypatch):
+    finished = []
+    claims = iter([object()])
+
+    async def claim():
+        return next(claims, None)
+
+    async def run(job):
+        await asyncio.sleep(0.05)
+        finished.append(job)
+
+    monkeypatch.setattr(jobs, "claim_next_job", claim)
+    monkeypatch.setattr(jobs, "run_job", run)
+
+    async def scenario():
+        pool = jobs.JobWorkerPool(workers=1, poll_interval=0.01)
+        pool.start()
+        await asyncio.sleep(0.01)
+        await pool.stop(timeout=1)
+
+    asyncio.run(scenario())
+    assert len(finished) == 1
+
+def test_lifespan_warms_up_and_releases_resources(monkeypatch):
+    calls = []
+
+    async def warm_pool(connections):
+        calls.append("warm_pool")
+
+    async def dispose_engine():
+        calls.append("dispose_engine")
+
+    monkeypatch.setattr(main, "warm_pool", warm_pool)
+    monkeypatch.setattr(main, "dispose_engine", dispose_engine)
+    monkeypatch.setattr(settings, "JOB_WORKERS", 0)
+    monkeypatch.setattr(settings, "LLM_BACKEND", "fake")
+    monkeypatch.setattr(ai_pipeline, "llm", None)
+
+    with TestClient(main.app) as client:
+        assert client.get("/").status_code == 200
+        assert ai_pipeline.llm is not None
+    assert calls == ["warm_pool", "dispose_engine"]
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from langchain_core.messages import SystemMessage, HumanMessage
+from core.config import settings
+from services import ai_pipeline
+from services.llm_backends import FakeLLM, FakeLLMError, create_llm
+from services.llm_scheduler import LLMScheduler
+from services.metrics import stage_timer
+
+PAGE = [
+    "Our miracle pill cures arthritis in 3 days. Doctors hate it.",
+    "Guaranteed profit of 20% per week. Limited spots available.",
+]
+
+def test_fake_is_deterministic():
+    messages = [SystemMessage(content="system"), HumanMessage(content="TEXT CHUNK:\nThis cures everything.")]
+
+    async def run(llm):
+        with stage_timer("identify"):
+            return [(await llm.ainvoke(messages)).content for _ in range(3)]
+
+    first = asyncio.run(run(FakeLLM(latency_ms=1, latency_distribution="lognormal", seed=7)))
+    second = asyncio.run(run(FakeLLM(latency_ms=1, latency_distribution="lognormal", seed=7)))
+    assert first == second
+    assert '"This cures everything."' in first[0]
+
+def test_fake_injects_errors():
+    llm = FakeLLM(error_rate=1.0)
+    with pytest.raises(FakeLLMError):
+        asyncio.run(llm.ainvoke([HumanMessage(content="x")]))
+
+def test_scheduler_retries_injected_rate_limits():
+    llm = FakeLLM(rate_limit_rate=0.5, seed=3)
+    scheduler = LLMScheduler(max_retries=10, backoff_base=0.001, backoff_max=0.001)
+
+    async def run():
+        return await asyncio.gather(*[
+            scheduler.run(lambda i=i: llm.ainvoke([HumanMessage(content=f"prompt {i}")])) for i in range(10)
+        ])
+
+    assert len(asyncio.run(run())) == 10
+    assert scheduler.stats["rate_limited"] > 0
+
+def test_canned_responses_override_stage():
+    llm = FakeLLM(responses={"summary": {"summary": "Canned."}})
+
+    async def run():
+        with stage_timer("summary"):
+            return await llm.ainvoke([HumanMessage(content="x")])
+
+    assert asyncio.run(run()).content == '{"summary": "Canned."}'
+
+def test_offline_page_scan(monkeypatch):
+    monkeypatch.setattr(ai_pipeline, "llm", FakeLLM())
+    monkeypatch.setattr(settings, "CLAIM_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "EXTRACTION_MODE", "llm")
+    monkeypatch.setattr(settings, "PIPELINE_MODE", "two_stage")
+
+    result = asyncio.run(ai_pipeline.run_page_scan(PAGE))
+    texts = {claim.text for claim in result.claims}
+    assert "Our miracle pill cures arthritis in 3 days." in texts
+    assert "Guaranteed profit of 20% per week." in texts
+    assert result.page_risk == "high"
+
+def test_create_llm_rejects_unknown_backend():
+    assert isinstance(create_llm("fake"), FakeLLM)
+    with pytest.raises(ValueError):
+        create_llm("nope")
+
+def test_openai_client_leaves_retries_to_the_scheduler():
+    # services.llm_scheduler retries 429s; the client must not retry on its own
+    assert create_llm("openai").max_retries == 0
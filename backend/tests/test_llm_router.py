@@ -0,0 +1,188 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from core.config import settings
+from services import ai_pipeline
+from services.llm_backends import FakeLLM
+from services.llm_router import LLMClientPool, RouteStats, call_cost, route_chain
+from services.metrics import stage_timer
+
+ROUTES = {
+    "identify": {"model": "cheap", "timeout": 5, "fallbacks": ["backup", {"model": "other", "base_url": "https://other"}]},
+}
+
+def test_route_chain_defaults_and_fallbacks(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MODEL", "strong")
+    monkeypatch.setattr(settings, "LLM_BASE_URL", "https://default")
+    assert route_chain("verify", ROUTES) == [{"model": "strong", "base_url": "https://default", "timeout": settings.LLM_TIMEOUT_SECONDS}]
+    chain = route_chain("identify", ROUTES)
+    assert [(target["model"], target["base_url"], target["timeout"]) for target in chain] == [
+        ("cheap", "https://default", 5.0), ("backup", "https://default", 5.0), ("other", "https://other", 5.0)]
+
+def test_pool_builds_one_client_per_model_and_endpoint():
+    built = []
+    pool = LLMClientPool(lambda **target: built.append(target) or object())
+    target = {"model": "cheap", "base_url": "https://a", "timeout": 5.0}
+    assert pool.get(target) is pool.get(dict(target, timeout=9.0))
+    pool.get(dict(target, base_url="https://b"))
+    assert len(built) == 2 and len(pool) == 2
+
+def test_cost_and_route_stats(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PRICES", {"cheap": [1.0, 2.0]})
+    assert call_cost("cheap", 1_000_000, 500_000) == 2.0
+    assert call_cost("unknown", 1000, 1000) == 0.0
+    stats = RouteStats()
+    stats.record("identify", "cheap", "ok", 0.5, 1_000_000, 0)
+    stats.record("identify", "cheap", "error", 1.5)
+    entry = stats.snapshot()["identify/cheap"]
+    assert entry["calls"] == 2 and entry["errors"] == 1 and entry["cost_usd"] == 1.0 and entry["avg_seconds"] == 1.0
+
+def test_stage_uses_its_route_and_falls_back(monkeypatch):
+    used = []
+
+    class Client:
+        def __init__(self, model, fail):
+            self.model, self.fail = model, fail
+
+        async def ainvoke(self, messages, **kwargs):
+            used.append(self.model)
+            if self.fail:
+                raise RuntimeError("model overloaded")
+            return SimpleNamespace(content="{}", usage_metadata={"input_tokens": 10, "output_tokens": 2})
+
+    pool = LLMClientPool(lambda model, base_url, timeout: Client(model, fail=model == "cheap"))
+    monkeypatch.setattr(ai_pipeline, "llm_pool", pool)
+    monkeypatch.setattr(ai_pipeline, "llm", Client("default", fail=False))
+    monkeypatch.setattr(settings, "LLM_ROUTES", ROUTES)
+
+    async def run():
+        with stage_timer("identify"):
+            await ai_pipeline.invoke_with_retry([])
+        with stage_timer("verify"):
+            await ai_pipeline.invoke_with_retry([])
+
+    asyncio.run(run())
+    assert used == ["cheap", "backup", "default"]
+
+def test_low_confidence_claims_escalate(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_ESCALATION_CONFIDENCE", 0.6)
+    monkeypatch.setattr(settings, "LLM_ROUTES", {"escalation": {"model": "strong"}})
+    strong = FakeLLM(model_name="strong", responses={"verify": {"verified_claims": [
+        {"text": "Cures cancer", "category": "Health", "risk_level": "high", "explanation": "", "confidence": 0.95}]}})
+    monkeypatch.setattr(ai_pipeline, "llm_pool", LLMClientPool(lambda **target: strong))
+
+    verified = [
+        {"text": "Cures cancer", "category": "Health", "risk_level": "low", "explanation": "", "confidence": 0.3},
+        {"text": "Free shipping", "category": "Trust", "risk_level": "low", "explanation": "", "confidence": 0.9},
+    ]
+    result = asyncio.run(ai_pipeline.escalate_low_confidence("Cures cancer. Free shipping.", verified))
+    assert strong.calls == 1
+    assert {claim["text"]: claim["risk_level"] for claim in result} == {"Cures cancer": "high", "Free shipping": "low"}
+
+def test_slow_call_is_hedged():
+    from services.llm_router import hedged
+    calls, winners = [], []
+
+    async def call(on_admit):
+        calls.append(len(calls))
+        on_admit(time.monotonic())
+        await asyncio.sleep(1 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    result = asyncio.run(asyncio.wait_for(hedged(call, 0.02, winners.append), timeout=0.5))
+    assert result == 2 and winners == ["hedge"]
+    assert asyncio.run(hedged(call, None)) == 3
+
+def test_hedge_delay_starts_at_admission():
+    from services.llm_router import hedged
+    calls = []
+
+    async def call(on_admit):
+        calls.append(len(calls))
+        if len(calls) == 1:
+            # Queued, admitted, then rate limited and backing off: never hedged
+            await asyncio.sleep(0.05)
+            on_admit(time.monotonic())
+            await asyncio.sleep(0.01)
+            on_admit(None)
+            await asyncio.sleep(0.05)
+            return "primary"
+        return "hedge"
+
+    assert asyncio.run(hedged(call, 0.02)) == "primary"
+    assert calls == [0]
+
+def test_cancelled_hedged_call_cancels_the_request():
+    from services.llm_router import hedged
+    finished = []
+
+    async def call(on_admit):
+        on_admit(time.monotonic())
+        await asyncio.sleep(0.2)
+        finished.append(True)
+
+    async def scenario():
+        try:
+            await asyncio.wait_for(hedged(call, 5), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        await asyncio.sleep(0.3)
+
+    asyncio.run(scenario())
+    assert finished == []
+
+def test_route_latency_excludes_scheduler_queueing(monkeypatch):
+    recorded = []
+
+    async def invoke_target(target, messages, schema=None, on_admit=None):
+        await asyncio.sleep(0.1)  # waiting for rate budget
+        on_admit(time.monotonic())
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(content="ok")
+
+    monkeypatch.setattr(ai_pipeline, "invoke_target", invoke_target)
+    monkeypatch.setattr(ai_pipeline.route_stats, "record",
+                        lambda route, model, outcome, seconds, *tokens: recorded.append(seconds))
+    asyncio.run(ai_pipeline.invoke_with_retry([]))
+    assert len(recorded) == 1 and recorded[0] < 0.08
+
+def test_hedge_delay_follows_route_percentile(monkeypatch):
+    monkeypatch.setattr(settings, "HEDGE_MIN_SAMPLES", 10)
+    monkeypatch.setattr(settings, "HEDGE_MIN_DELAY_SECONDS", 0.1)
+    stats = RouteStats()
+    for i in range(1, 21):
+        stats.record("identify", "cheap", "ok", i / 10)
+    assert stats.hedge_delay("identify", "cheap") == 1.9
+    assert stats.hedge_delay("aggregation", "cheap") is None
+    monkeypatch.setattr(settings, "HEDGE_MAX_RATIO", 0.0)
+    assert stats.hedge_delay("identify", "cheap") is None
+
+def test_chunk_fingerprint_follows_routed_models(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_ROUTES", {})
+    base = ai_pipeline.chunk_fingerprint("Our tea cures cancer.", "two_stage")
+    monkeypatch.setattr(settings, "LLM_ROUTES", {"verify": {"model": "other"}})
+    assert ai_pipeline.chunk_fingerprint("Our tea cures cancer.", "two_stage") != base
+    monkeypatch.setattr(settings, "LLM_ROUTES", {"verify": {"base_url": "https://other"}})
+    assert ai_pipeline.chunk_fingerprint("Our tea cures cancer.", "two_stage") != base
+
+def test_fallback_model_is_tracked_as_the_answer(monkeypatch):
+    from services.llm_router import track_answers
+
+    class Client:
+        def __init__(self, model):
+            self.model = model
+
+        async def ainvoke(self, messages, **kwargs):
+            if self.model == "cheap":
+                raise RuntimeError("model overloaded")
+            return SimpleNamespace(content="{}", usage_metadata={})
+
+    monkeypatch.setattr(ai_pipeline, "llm_pool", LLMClientPool(lambda model, base_url, timeout: Client(model)))
+    monkeypatch.setattr(settings, "LLM_ROUTES", ROUTES)
+
+    async def run():
+        with track_answers() as answered, stage_timer("identify"):
+            await ai_pipeline.invoke_with_retry([])
+        return answered
+
+    assert asyncio.run(run()) == {"backup"}
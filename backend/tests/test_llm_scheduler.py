@@ -0,0 +1,95 @@
+import asyncio
+from services.llm_scheduler import LLMScheduler, Priority, TokenBucket, per_worker, retry_after_seconds
+
+class FakeResponse:
+    def __init__(self, status_code=429, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class FakeRateLimitError(Exception):
+    def __init__(self, headers=None):
+        super().__init__("Error code: 429")
+        self.response = FakeResponse(headers=headers)
+
+def test_token_bucket_delay():
+    bucket = TokenBucket(60)  # one per second
+    bucket.consume(60)
+    assert 0.9 < bucket.delay_for(1) <= 1.0
+    assert TokenBucket(0).delay_for(10 ** 6) == 0
+
+def test_retry_after_header():
+    assert retry_after_seconds(FakeRateLimitError({"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(FakeRateLimitError({"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(Exception("boom")) is None
+
+def test_max_in_flight_and_priority_order():
+    scheduler = LLMScheduler(max_in_flight=1)
+    order = []
+
+    async def call(name):
+        order.append(name)
+        await asyncio.sleep(0.01)
+        return name
+
+    async def run():
+        first = asyncio.create_task(scheduler.run(lambda: call("first")))
+        await asyncio.sleep(0)
+        batch = asyncio.create_task(scheduler.run(lambda: call("batch"), priority=Priority.BATCH))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(scheduler.run(lambda: call("interactive"), priority=Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        assert scheduler.snapshot()["queue_depth"] == 2
+        await asyncio.gather(first, batch, interactive)
+
+    asyncio.run(run())
+    assert order == ["first", "interactive", "batch"]
+    assert scheduler.snapshot()["in_flight"] == 0
+
+def test_rate_limit_retry_honours_retry_after():
+    scheduler = LLMScheduler(max_retries=3, backoff_base=0.01)
+    attempts = []
+
+    async def call():
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) == 1:
+            raise FakeRateLimitError({"retry-after-ms": "50"})
+        return "ok"
+
+    assert asyncio.run(scheduler.run(call)) == "ok"
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.05
+    assert scheduler.stats["rate_limited"] == 1
+
+def test_on_admit_reports_each_attempt_and_backoff():
+    scheduler = LLMScheduler(max_retries=3, backoff_base=0.01)
+    admissions, attempts = [], []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise FakeRateLimitError()
+        return "ok"
+
+    assert asyncio.run(scheduler.run(call, on_admit=admissions.append)) == "ok"
+    assert [admitted is None for admitted in admissions] == [False, True, False]
+
+def test_non_rate_limit_errors_are_not_retried():
+    scheduler = LLMScheduler(max_retries=3)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    try:
+        asyncio.run(scheduler.run(call))
+    except ValueError:
+        pass
+    assert len(attempts) == 1
+    assert scheduler.stats["failures"] == 1
+
+def test_per_minute_budgets_are_split_across_workers():
+    assert per_worker(50, 1) == 50
+    assert per_worker(50, 4) == 12
+    assert per_worker(3, 8) == 1
+    assert per_worker(0, 4) == 0
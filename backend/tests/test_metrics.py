@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from api.middleware import TimingHeadersMiddleware
+from main import app
+from services.llm_scheduler import LLMScheduler
+from services.metrics import MetricsRegistry, ScanTrace, current_trace, stage_timer, LLM_TOKENS
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="identify")
+    histogram.observe(0.5, stage="identify")
+    text = registry.render()
+    assert 'test_seconds_bucket{stage="identify",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="identify",le="1.0"} 2' in text
+    assert 'test_seconds_bucket{stage="identify",le="+Inf"} 2' in text
+    assert 'test_seconds_count{stage="identify"} 2' in text
+
+def test_nested_traces_record_into_parent():
+    request = ScanTrace()
+    scan = ScanTrace(parent=request)
+    scan.add("verify", seconds=0.2, calls=1, prompt_tokens=30)
+    assert request.stages["verify"]["prompt_tokens"] == 30
+    assert scan.total("seconds") == 0.2
+    assert request.server_timing().startswith('verify;dur=200.0;desc="0 llm"')
+
+def test_scheduler_attributes_calls_to_stage():
+    scheduler = LLMScheduler()
+    trace = ScanTrace()
+    before = LLM_TOKENS.value(stage="identify", kind="completion")
+
+    async def call():
+        return SimpleNamespace(usage_metadata={"input_tokens": 120, "output_tokens": 40})
+
+    async def run():
+        current_trace.set(trace)
+        with stage_timer("identify"):
+            await scheduler.run(call)
+
+    asyncio.run(run())
+    stage = trace.stages["identify"]
+    assert stage["calls"] == 1 and stage["llm_calls"] == 1
+    assert stage["prompt_tokens"] == 120 and stage["completion_tokens"] == 40
+    assert LLM_TOKENS.value(stage="identify", kind="completion") == before + 40
+
+def test_metrics_endpoint():
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert "# TYPE liespy_stage_duration_seconds histogram" in response.text
+    assert "liespy_llm_queue_depth" in response.text
+
+def test_timing_headers_middleware():
+    async def endpoint(scope, receive, send):
+        current_trace.get().add("extraction", seconds=0.01, calls=1, prompt_tokens=5, completion_tokens=7)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    response = TestClient(TimingHeadersMiddleware(endpoint)).get("/")
+    assert response.headers["server-timing"].startswith("extraction;dur=10.0")
+    assert response.headers["x-llm-prompt-tokens"] == "5"
+    assert response.headers["x-llm-completion-tokens"] == "7"
@@ -0,0 +1,70 @@
+import asyncio
+from core.config import settings
+from services import ai_pipeline
+from services.claim_cache import ClaimCache
+
+CLAIM = {"text": "Cures cancer", "category": "Health", "risk_level": "high", "explanation": "", "confidence": 0.9}
+
+def use_memory_cache(monkeypatch):
+    monkeypatch.setattr(ai_pipeline, "claim_cache", ClaimCache(db_enabled=False))
+    monkeypatch.setattr(settings, "CLAIM_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "PREFILTER_MODE", "off")
+    monkeypatch.setattr(settings, "CLAIM_MEMORY_ENABLED", False)
+
+def test_single_pass_mode_makes_one_call(monkeypatch):
+    use_memory_cache(monkeypatch)
+    calls = []
+
+    async def fused(chunk, strict=False):
+        calls.append("fused")
+        return [CLAIM]
+
+    async def identify(chunk, strict=False):
+        calls.append("identify")
+        return ["Cures cancer"]
+
+    monkeypatch.setattr(ai_pipeline, "identify_and_verify_chunk", fused)
+    monkeypatch.setattr(ai_pipeline, "identify_claims_in_chunk", identify)
+
+    assert asyncio.run(ai_pipeline.process_chunk("text", mode="single_pass")) == [CLAIM]
+    assert calls == ["fused"]
+
+def test_two_stage_results_are_cached(monkeypatch):
+    use_memory_cache(monkeypatch)
+    calls = []
+
+    async def identify(chunk, strict=False):
+        calls.append("identify")
+        return ["Cures cancer"]
+
+    async def verify(chunk, claims, strict=False):
+        calls.append("verify")
+        return [CLAIM]
+
+    monkeypatch.setattr(ai_pipeline, "identify_claims_in_chunk", identify)
+    monkeypatch.setattr(ai_pipeline, "verify_chunk_claims", verify)
+
+    async def run():
+        first = await ai_pipeline.process_chunk("Same   text", mode="two_stage")
+        second = await ai_pipeline.process_chunk("same text", mode="two_stage")
+        return first, second
+
+    assert asyncio.run(run()) == ([CLAIM], [CLAIM])
+    assert calls == ["identify", "verify"]
+
+def test_failures_are_not_cached(monkeypatch):
+    use_memory_cache(monkeypatch)
+    calls = []
+
+    async def identify(chunk, strict=False):
+        calls.append("identify")
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(ai_pipeline, "identify_claims_in_chunk", identify)
+
+    async def run():
+        await ai_pipeline.process_chunk("text", mode="two_stage")
+        await ai_pipeline.process_chunk("text", mode="two_stage")
+
+    asyncio.run(run())
+    assert calls == ["identify", "identify"]
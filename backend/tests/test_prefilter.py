@@ -0,0 +1,63 @@
+import asyncio
+import json
+import os
+from core.config import settings
+from services import ai_pipeline
+from services.prefilter import PREFILTER_SHADOW_MISSES, prefilter_chunk, score_sentence
+
+LABELED = os.path.join(os.path.dirname(__file__), "fixtures", "claims", "labeled_sentences.json")
+
+def test_recall_on_labeled_sentences():
+    with open(LABELED) as f:
+        sentences = json.load(f)["sentences"]
+    claims = [s for s in sentences if s["claim"]]
+    others = [s for s in sentences if not s["claim"]]
+    kept = sum(score_sentence(s["text"]) >= settings.PREFILTER_THRESHOLD for s in claims)
+    skipped = sum(score_sentence(s["text"]) < settings.PREFILTER_THRESHOLD for s in others)
+    assert kept / len(claims) >= 0.95
+    assert skipped / len(others) >= 0.8
+
+def test_sentence_mode_keeps_context():
+    chunk = ("Preheat the oven. Whisk the eggs. This pill cures cancer. Serve warm. "
+             "Wash the dishes. Dry them. Only 3 spots left! Goodbye.")
+    result = prefilter_chunk(chunk, threshold=0.5, mode="sentences", context=1)
+    assert result["keep"]
+    assert result["text"] == (
+        "Whisk the eggs. This pill cures cancer. Serve warm. [...] Dry them. Only 3 spots left! Goodbye."
+    )
+
+def test_chunk_without_signals_skips_llm(monkeypatch):
+    calls = []
+
+    async def identify(chunk, strict=False):
+        calls.append(chunk)
+        return []
+
+    monkeypatch.setattr(settings, "PREFILTER_MODE", "chunk")
+    monkeypatch.setattr(settings, "CLAIM_CACHE_ENABLED", False)
+    monkeypatch.setattr(ai_pipeline, "identify_claims_in_chunk", identify)
+
+    assert asyncio.run(ai_pipeline.process_chunk("Preheat the oven to 180 degrees. Bake for 25 minutes.")) == []
+    asyncio.run(ai_pipeline.process_chunk("Guaranteed 20% weekly returns."))
+    assert calls == ["Guaranteed 20% weekly returns."]
+
+def test_shadow_mode_sends_every_chunk_and_counts_misses(monkeypatch):
+    calls = []
+
+    async def identify(chunk, strict=False):
+        calls.append(chunk)
+        return ["It has a hidden claim"]
+
+    async def verify(chunk, claims):
+        return [{"text": claims[0], "category": "Health", "risk_level": "high", "explanation": "", "confidence": 0.9}]
+
+    monkeypatch.setattr(settings, "PREFILTER_MODE", "shadow")
+    monkeypatch.setattr(settings, "CLAIM_CACHE_ENABLED", False)
+    monkeypatch.setattr(ai_pipeline, "identify_claims_in_chunk", identify)
+    monkeypatch.setattr(ai_pipeline, "verify_with_memory", verify)
+
+    misses = PREFILTER_SHADOW_MISSES.value()
+    chunk = "Preheat the oven to 180 degrees. Bake for 25 minutes."
+    assert len(asyncio.run(ai_pipeline.process_chunk(chunk))) == 1
+    assert calls == [chunk]
+    assert PREFILTER_SHADOW_MISSES.value() == misses + 1
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+from services.scan_cache import is_fresh, is_partial, candidates_fingerprint
+
+NOW = datetime(2026, 1, 2, 12, 0)
+DAY = timedelta(hours=24)
+
+def test_unchanged_content_is_served_past_age_limit():
+    old = NOW - timedelta(days=30)
+    assert is_fresh(old, "abc", "abc", DAY, now=NOW)
+
+def test_changed_content_invalidates_recent_scan():
+    recent = NOW - timedelta(minutes=5)
+    assert not is_fresh(recent, "abc", "def", DAY, now=NOW)
+
+def test_age_limit_applies_without_fingerprints():
+    assert is_fresh(NOW - timedelta(hours=1), None, "abc", DAY, now=NOW)
+    assert not is_fresh(NOW - timedelta(hours=25), None, "abc", DAY, now=NOW)
+    assert not is_fresh(NOW - timedelta(hours=25), "abc", None, DAY, now=NOW)
+
+def test_no_age_limit():
+    assert is_fresh(NOW - timedelta(days=365), None, None, None, now=NOW)
+
+def test_candidates_fingerprint():
+    assert candidates_fingerprint([]) is None
+    assert candidates_fingerprint(["Buy now"]) == candidates_fingerprint(["buy  now"])
+
+def test_partial_results_are_not_cache_hits():
+    assert is_partial({"partial": True, "missing_chunks": [2]})
+    assert not is_partial({"partial": False})
+    assert not is_partial({})
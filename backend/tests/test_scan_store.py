@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime
+from uuid import uuid4
+from db.models import ClaimRecord, Scan
+from services import scan_store
+
+RESULT = {
+    "page_risk": "high",
+    "trust_score": 12,
+    "summary": "",
+    "claims": [
+        {"text": "Cures cancer", "category": "Health", "risk_level": "High", "explanation": "x", "confidence": 0.9},
+        {"text": "", "category": "Health", "risk_level": "low", "explanation": "", "confidence": 0.1},
+    ],
+}
+
+class RecordingSession:
+    def __init__(self):
+        self.added, self.executed, self.commits = [], [], 0
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def flush(self):
+        pass
+
+    async def execute(self, statement, params=None):
+        self.executed.append((statement.table.name, params))
+
+    async def commit(self):
+        self.commits += 1
+
+    async def refresh(self, obj):
+        pass
+
+def test_claim_rows_normalize_category_and_risk():
+    scan_id, now = uuid4(), datetime(2026, 1, 1)
+    rows = scan_store.claim_rows(scan_id, RESULT, now)
+    assert rows == [dict(scan_id=scan_id, claim_text="Cures cancer", category="health", risk_level="high",
+                         explanation="x", confidence=0.9, created_at=now)]
+
+def test_store_scan_sets_score_and_bulk_inserts_claims():
+    session = RecordingSession()
+    scan = asyncio.run(scan_store.store_scan(session, url="https://example.com", result=RESULT))
+    assert scan.score == 12.0
+    assert session.added == [scan]
+    assert [table for table, _ in session.executed] == [ClaimRecord.__tablename__]
+    assert session.executed[0][1][0]["scan_id"] == scan.id
+    assert session.commits == 1
+
+def test_store_scans_uses_one_insert_per_table():
+    session = RecordingSession()
+    scans = [dict(id=uuid4(), url=f"https://example.com/{i}", result=RESULT, created_at=datetime.utcnow())
+             for i in range(3)]
+    asyncio.run(scan_store.store_scans(session, scans))
+    assert [table for table, _ in session.executed] == [Scan.__tablename__, ClaimRecord.__tablename__]
+    assert len(session.executed[1][1]) == 3
+    assert all(values["score"] == 12.0 for values in scans)
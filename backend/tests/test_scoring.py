@@ -0,0 +1,42 @@
+import asyncio
+from services.scoring import score_claims, claim_penalty
+from services.ai_pipeline import analyze_aggregated_results
+
+def claim(risk, category="Health", confidence=0.9, text="claim"):
+    return {"text": text, "risk_level": risk, "category": category, "explanation": "", "confidence": confidence}
+
+def test_no_claims_is_low_risk():
+    score = score_claims([])
+    assert score["trust_score"] == 100
+    assert score["page_risk"] == "low"
+
+def test_confident_high_risk_claim_makes_page_high_risk():
+    score = score_claims([claim("high")])
+    assert score["page_risk"] == "high"
+    assert 50 < score["trust_score"] < 80
+
+def test_score_decreases_with_more_risky_claims():
+    one = score_claims([claim("high", text="a")])["trust_score"]
+    three = score_claims([claim("high", text=t) for t in "abc"])["trust_score"]
+    assert three < one
+    assert three < 40
+
+def test_category_and_confidence_weights():
+    assert claim_penalty(claim("high", "Health")) > claim_penalty(claim("high", "Urgency"))
+    assert claim_penalty(claim("high", confidence=0.9)) > claim_penalty(claim("high", confidence=0.2))
+    assert claim_penalty(claim("low")) < claim_penalty(claim("medium"))
+
+def test_low_risk_claims_stay_low():
+    score = score_claims([claim("low", "Trust"), claim("low", "Urgency", text="b")])
+    assert score["page_risk"] == "low"
+    assert score["trust_score"] > 90
+
+def test_malformed_values_do_not_raise():
+    score = score_claims([{"text": "x", "confidence": "n/a"}, "not a dict"])
+    assert 0 <= score["trust_score"] <= 100
+
+def test_local_aggregation_makes_no_llm_call():
+    result = asyncio.run(analyze_aggregated_results([claim("high")], "page text", mode="local"))
+    assert result.page_risk == "high"
+    assert len(result.claims) == 1
+    assert "1 notable claim" in result.summary
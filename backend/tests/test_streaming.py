@@ -0,0 +1,61 @@
+import asyncio
+import json
+from api.schemas import ScanResult
+from api.utils import format_sse
+from services import ai_pipeline
+
+def test_format_sse():
+    message = format_sse("chunk", {"index": 0, "claims": []})
+    assert message == 'event: chunk\ndata: {"index": 0, "claims": []}\n\n'
+
+def test_stream_emits_chunks_as_they_finish(monkeypatch):
+    async def fake_extract(candidates, mode=None):
+        return "ignored"
+
+    async def fake_process(chunk, strict=False):
+        # Second chunk finishes first
+        await asyncio.sleep(0.02 if chunk == "slow" else 0)
+        return [{"text": chunk}]
+
+    async def fake_aggregate(all_claims, full_text_summary):
+        return ScanResult(page_risk="low", trust_score=90, summary="ok", claims=[])
+
+    monkeypatch.setattr(ai_pipeline, "extract_content", fake_extract)
+    monkeypatch.setattr(ai_pipeline, "iter_chunks", lambda text: iter(["slow", "fast"]))
+    monkeypatch.setattr(ai_pipeline, "process_chunk", fake_process)
+    monkeypatch.setattr(ai_pipeline, "analyze_aggregated_results", fake_aggregate)
+
+    async def collect():
+        return [e async for e in ai_pipeline.stream_page_scan(["x"])]
+
+    events = asyncio.run(collect())
+    assert [e["event"] for e in events] == ["extraction", "chunk", "chunk", "aggregation", "result"]
+    assert events[1]["data"]["index"] == 1
+    assert events[2]["data"]["index"] == 0
+    assert events[-1]["data"]["result"].trust_score == 90
+    json.dumps(events[1]["data"])
+
+def test_scan_deadline_returns_partial_result(monkeypatch):
+    async def fake_extract(candidates, mode=None):
+        return "ignored"
+
+    async def fake_process(chunk, strict=False):
+        await asyncio.sleep(10 if chunk == "stuck" else 0)
+        return [{"text": chunk}]
+
+    async def fake_aggregate(all_claims, full_text_summary):
+        return ScanResult(page_risk="low", trust_score=90, summary="ok", claims=[])
+
+    monkeypatch.setattr(ai_pipeline, "extract_content", fake_extract)
+    monkeypatch.setattr(ai_pipeline, "iter_chunks", lambda text: iter(["fast", "stuck", "also fast"]))
+    monkeypatch.setattr(ai_pipeline, "process_chunk", fake_process)
+    monkeypatch.setattr(ai_pipeline, "analyze_aggregated_results", fake_aggregate)
+    monkeypatch.setattr(ai_pipeline.settings, "SCAN_DEADLINE_SECONDS", 0.05)
+
+    async def collect():
+        return await asyncio.wait_for(ai_pipeline.collect_page_scan(["x"]), timeout=2)
+
+    data = asyncio.run(collect())
+    assert data["result"].partial is True
+    assert data["result"].missing_chunks == [1]
+    assert [record["fingerprint"] is None for record in data["chunks"]] == [False, True, False]
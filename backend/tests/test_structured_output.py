@@ -0,0 +1,74 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+from api.schemas import Claim
+from services import ai_pipeline
+from services.structured_output import ClaimStreamParser, VerifiedClaims, parse_items, response_format_for
+
+CLAIM = {"text": "Cures cancer", "category": "Health", "risk_level": "high", "explanation": "No evidence.", "confidence": 0.9}
+
+def test_parser_recovers_complete_items_from_truncated_response():
+    content = '{"verified_claims": [%s, %s, {"text": "Only tod' % (json.dumps(CLAIM), json.dumps(CLAIM))
+    valid, failed, found = parse_items(content, "verified_claims", Claim)
+    assert found and len(valid) == 2 and failed == []
+
+def test_parser_isolates_malformed_items():
+    content = '```json\n{"claims": ["one", {bad json}, "three, with comma"]}\n```'
+    valid, failed, found = parse_items(content, "claims", str)
+    assert valid == ["one", "three, with comma"]
+    assert failed == ["{bad json}"]
+
+def test_parser_is_incremental():
+    parser = ClaimStreamParser("claims")
+    assert parser.feed('{"claims": ["a", "b') == ["a"]
+    assert parser.feed('", "c"]}') == ["b", "c"]
+    assert parser.done
+
+def test_validation_failures_are_reported():
+    content = json.dumps({"verified_claims": [CLAIM, {"text": "missing fields"}]})
+    valid, failed, _ = parse_items(content, "verified_claims", Claim)
+    assert valid == [CLAIM]
+    assert json.loads(failed[0]) == {"text": "missing fields"}
+
+def test_response_format_modes():
+    assert response_format_for(VerifiedClaims, "json_schema")["json_schema"]["name"] == "VerifiedClaims"
+    assert response_format_for(VerifiedClaims, "json_object") == {"type": "json_object"}
+    assert response_format_for(VerifiedClaims, "off") is None
+
+def test_repair_only_sends_broken_items(monkeypatch):
+    sent = []
+
+    async def invoke(messages, schema=None):
+        sent.append(messages[1].content)
+        return SimpleNamespace(content=json.dumps({"verified_claims": [dict(CLAIM, text="Repaired")]}))
+
+    monkeypatch.setattr(ai_pipeline, "invoke_with_retry", invoke)
+    content = '{"verified_claims": [%s, {"text": "Broken" "confidence": 1}]}' % json.dumps(CLAIM)
+    claims = asyncio.run(ai_pipeline.parse_with_repair(content, "verified_claims", Claim, VerifiedClaims))
+    assert [c["text"] for c in claims] == ["Cures cancer", "Repaired"]
+    assert sent == ['{"text": "Broken" "confidence": 1}']
+
+def test_unrepairable_response_raises(monkeypatch):
+    async def invoke(messages, schema=None):
+        return SimpleNamespace(content="Sorry, I can't help with that.")
+
+    monkeypatch.setattr(ai_pipeline, "invoke_with_retry", invoke)
+    with pytest.raises(ValueError):
+        asyncio.run(ai_pipeline.parse_with_repair("no json here", "claims", str, VerifiedClaims))
+
+def test_rejected_response_format_falls_back(monkeypatch):
+    calls = []
+
+    class Provider:
+        async def ainvoke(self, messages, **kwargs):
+            calls.append(kwargs)
+            if "response_format" in kwargs:
+                raise Exception("Error code: 400 - response_format is not supported")
+            return SimpleNamespace(content="{}")
+
+    monkeypatch.setattr(ai_pipeline, "llm", Provider())
+    monkeypatch.setattr(ai_pipeline, "structured_output_rejected", False)
+    asyncio.run(ai_pipeline.invoke_with_retry([], VerifiedClaims))
+    asyncio.run(ai_pipeline.invoke_with_retry([], VerifiedClaims))
+    assert [bool(kwargs) for kwargs in calls] == [True, False, False]
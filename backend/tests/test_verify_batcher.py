@@ -0,0 +1,138 @@
+import asyncio
+from services import ai_pipeline
+from services.chunking import count_tokens
+from services.verify_batcher import VerifyBatcher, claim_context
+
+CHUNK = ("Welcome to our shop. We sell teas. Our tea cures cancer in days. "
+         "Shipping is free. Returns are easy. Contact us anytime. Doctors recommend it daily.")
+
+def claim(text):
+    return {"text": text, "category": "Health", "risk_level": "high", "explanation": "", "confidence": 0.9}
+
+def test_claim_context_keeps_neighbouring_sentences():
+    context = claim_context(CHUNK, ["Our tea cures cancer in days."], radius=1)
+    assert context == "[...] We sell teas. Our tea cures cancer in days. Shipping is free. [...]"
+    assert claim_context(CHUNK, ["not in the text"], radius=1) == CHUNK
+
+def test_concurrent_verifies_share_one_call():
+    sent = []
+
+    async def send(items):
+        sent.append([item["claims"] for item in items])
+        return [[claim(c) for c in item["claims"]] for item in items]
+
+    async def run():
+        batcher = VerifyBatcher(send, max_wait=0.01)
+        return await asyncio.gather(
+            batcher.verify(CHUNK, ["Our tea cures cancer in days."]),
+            batcher.verify("Bitcoin doubles every week.", ["Bitcoin doubles every week."]),
+        ), batcher
+
+    (first, second), batcher = asyncio.run(run())
+    assert sent == [[["Our tea cures cancer in days."], ["Bitcoin doubles every week."]]]
+    assert first[0]["text"] == "Our tea cures cancer in days."
+    assert second[0]["text"] == "Bitcoin doubles every week."
+    assert batcher.snapshot()["flushed_deadline"] == 1
+
+def test_token_budget_flushes_early():
+    sizes = []
+
+    async def send(items):
+        sizes.append(len(items))
+        return [[] for _ in items]
+
+    text = "This pill cures every disease known to science."
+    tokens = count_tokens(text) * 2  # context + claim
+
+    async def run():
+        batcher = VerifyBatcher(send, max_tokens=tokens * 2, max_wait=10)
+        await asyncio.wait_for(asyncio.gather(*[batcher.verify(text, [text]) for _ in range(4)]), timeout=1)
+        return batcher
+
+    batcher = asyncio.run(run())
+    assert sizes == [2, 2]
+    assert batcher.snapshot()["flushed_deadline"] == 0
+
+def test_send_error_fails_every_item():
+    async def send(items):
+        raise RuntimeError("boom")
+
+    async def run():
+        batcher = VerifyBatcher(send, max_wait=0.01)
+        return await asyncio.gather(batcher.verify(CHUNK, ["a"]), batcher.verify(CHUNK, ["b"]), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+
+def test_grouped_verify_maps_claims_back(monkeypatch):
+    class Response:
+        content = ('{"verified_claims": ['
+                   '{"id": "2.1", "text": "B", "risk_level": "high", "category": "Financial", "explanation": "", "confidence": 0.8},'
+                   '{"id": "1.1", "text": "A", "risk_level": "low", "category": "Health", "explanation": "", "confidence": 0.5}]}')
+
+    async def invoke(messages, schema=None):
+        assert "GROUP 2" in messages[1].content
+        return Response()
+
+    monkeypatch.setattr(ai_pipeline, "invoke_with_retry", invoke)
+    items = [{"context": "a", "claims": ["A"]}, {"context": "b", "claims": ["B"]}]
+    first, second = asyncio.run(ai_pipeline.verify_claims_batch(items))
+    assert [c["text"] for c in first] == ["A"] and "id" not in first[0]
+    assert [c["text"] for c in second] == ["B"]
+
+def grouped_verify(monkeypatch, batch_content):
+    prompts = []
+
+    class Response:
+        def __init__(self, content):
+            self.content = content
+
+    async def invoke(messages, schema=None):
+        prompts.append(messages[1].content)
+        if "GROUP 2" in messages[1].content:
+            return Response(batch_content)
+        claims = messages[1].content.split("CLAIMS TO VERIFY:")[1]
+        return Response('{"verified_claims": [%s]}' % ",".join(
+            '{"text": "%s", "risk_level": "high", "category": "Health", "explanation": "", "confidence": 0.9}' % text
+            for text in ("A", "B", "C") if text in claims))
+
+    monkeypatch.setattr(ai_pipeline, "invoke_with_retry", invoke)
+    monkeypatch.setattr(ai_pipeline.settings, "JSON_REPAIR_ENABLED", False)
+    items = [{"context": "a", "claims": ["A", "C"]}, {"context": "b", "claims": ["B"]}]
+    return asyncio.run(ai_pipeline.verify_claims_batch(items)), prompts
+
+def test_grouped_verify_without_ids_matches_claim_text(monkeypatch):
+    (first, second), prompts = grouped_verify(monkeypatch, '{"verified_claims": ['
+        '{"text": "a", "risk_level": "low", "category": "Health", "explanation": "", "confidence": 0.5},'
+        '{"text": "C", "risk_level": "low", "category": "Health", "explanation": "", "confidence": 0.5},'
+        '{"text": "B", "risk_level": "high", "category": "Financial", "explanation": "", "confidence": 0.8}]}')
+    assert [c["text"] for c in first] == ["a", "C"]
+    assert [c["text"] for c in second] == ["B"]
+    assert len(prompts) == 1
+
+def test_short_batched_answer_is_final(monkeypatch):
+    (first, second), prompts = grouped_verify(monkeypatch, '{"verified_claims": ['
+        '{"id": "1.1", "text": "A", "risk_level": "low", "category": "Health", "explanation": "", "confidence": 0.5}]}')
+    assert [c["text"] for c in first] == ["A"] and second == []
+    assert len(prompts) == 1
+
+def test_only_unmapped_claims_are_verified_again(monkeypatch):
+    (first, second), prompts = grouped_verify(monkeypatch, '{"verified_claims": ['
+        '{"id": "1.1", "text": "A", "risk_level": "low", "category": "Health", "explanation": "", "confidence": 0.5},'
+        '{"text": "Something else", "risk_level": "high", "category": "Financial", "explanation": "", "confidence": 0.8}]}')
+    assert [c["text"] for c in first] == ["A", "C"]
+    assert [c["text"] for c in second] == ["B"]
+    # One retry per group, each with only its claims left without a verdict
+    assert len(prompts) == 3
+    assert all("A" not in prompt.split("CLAIMS TO VERIFY:")[1] for prompt in prompts[1:])
+
+def test_fake_llm_tags_batched_verdicts_with_ids(monkeypatch):
+    from services.llm_backends import FakeLLM
+
+    fake = FakeLLM()
+    monkeypatch.setattr(ai_pipeline, "invoke_with_retry", lambda messages, schema=None: fake.ainvoke(messages))
+    items = [{"context": CHUNK, "claims": ["Our tea cures cancer in days."]},
+             {"context": "Guaranteed profit.", "claims": ["Guaranteed profit every week."]}]
+    first, second = asyncio.run(ai_pipeline.verify_claims_batch(items))
+    assert [c["text"] for c in first] == ["Our tea cures cancer in days."]
+    assert [c["text"] for c in second] == ["Guaranteed profit every week."]
+    assert fake.calls == 1
@@ -0,0 +1,78 @@
+"""
+Backfills the claims table (migration 0003) from scans stored before it existed,
+and sets the missing scans.score from each result's trust_score.
+
+Scans are read in keyset-paginated batches of --batch-size (by id), so memory
+stays flat however large the table is. Each batch is one transaction: one bulk
+insert for its claims and one bulk score update. Scans that already have claim
+rows are skipped, so the tool can be interrupted and re-run.
+
+Usage (from backend/):
+    python tools/backfill_claims.py
+    python tools/backfill_claims.py --batch-size 200 --dry-run
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import bindparam, exists, insert, select, update
+
+from db.models import ClaimRecord, Scan
+from db.session import async_session_factory
+from services.scan_store import claim_rows, scan_score
+
+
+async def backfill(batch_size, dry_run=False):
+    has_claims = exists().where(ClaimRecord.scan_id == Scan.id)
+    last_id = None
+    totals = {"scans": 0, "claims": 0, "scores": 0}
+    while True:
+        async with async_session_factory() as session:
+            statement = select(Scan.id, Scan.result, Scan.score, Scan.created_at).where(~has_claims)
+            if last_id is not None:
+                statement = statement.where(Scan.id > last_id)
+            rows = (await session.execute(statement.order_by(Scan.id).limit(batch_size))).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            claims, scores = [], []
+            for row in rows:
+                result = row.result or {}
+                claims.extend(claim_rows(row.id, result, row.created_at))
+                score = scan_score(result)
+                if row.score is None and score is not None:
+                    scores.append({"scan_id": row.id, "new_score": score})
+
+            if not dry_run:
+                if claims:
+                    await session.execute(insert(ClaimRecord), claims)
+                if scores:
+                    await session.execute(
+                        update(Scan.__table__)
+                        .where(Scan.__table__.c.id == bindparam("scan_id"))
+                        .values(score=bindparam("new_score")),
+                        scores,
+                    )
+                await session.commit()
+
+        totals["scans"] += len(rows)
+        totals["claims"] += len(claims)
+        totals["scores"] += len(scores)
+        print(f"... {totals['scans']} scans, {totals['claims']} claims, {totals['scores']} scores")
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="count only, write nothing")
+    args = parser.parse_args()
+
+    totals = asyncio.run(backfill(args.batch_size, args.dry_run))
+    print(f"Done{' (dry run)' if args.dry_run else ''}: {totals['scans']} scans, "
+          f"{totals['claims']} claims, {totals['scores']} scores")
@@ -0,0 +1,106 @@
+"""
+Import-time benchmark for the app (`import main`), i.e. the cold start of every
+server worker process and of each test run.
+
+Runs `python -X importtime -c "import main"` --runs times in fresh
+interpreters and reports the median cumulative import time of `main`, the
+slowest top-level imports, and whether any of the heavy modules that must load
+on first use (LAZY_MODULES) was imported eagerly. Exits non-zero when the
+median exceeds --budget-ms (0 = report only) or a lazy module was imported.
+
+Usage (from backend/, with the app's environment variables set):
+    python tools/bench_import.py
+    python tools/bench_import.py --runs 10 --budget-ms 1500 --top 20
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Startup must stay under this on a typical dev machine (~1.1s measured, 1.4s
+# before LangChain and NumPy were deferred); generous so slower CI boxes pass.
+DEFAULT_BUDGET_MS = 2500
+
+# Loaded on first use, never by `import main`
+LAZY_MODULES = ("langchain_core", "langchain_openai", "openai", "supabase", "numpy", "tiktoken")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(stderr):
+    """[(module, cumulative_us, depth)] from -X importtime output."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            entries.append((match.group(4), int(match.group(2)), len(match.group(3)) // 2))
+    return entries
+
+
+def children_of(entries, module):
+    """Direct imports of the last top-level `module` (importtime lists a
+    module after everything it imported)."""
+    index = max(i for i, (name, _, depth) in enumerate(entries) if name == module and depth == 0)
+    children = []
+    for name, us, depth in reversed(entries[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name, us))
+    return children
+
+
+def measure(module="main"):
+    """One cold import of `module` in a fresh interpreter: (cumulative ms,
+    importtime entries, names of LAZY_MODULES that got imported)."""
+    probe = (
+        f"import sys; import {module}; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+    )
+    entries = parse_importtime(completed.stderr)
+    total_us = next(us for name, us, depth in reversed(entries) if name == module and depth == 0)
+    eager = [name for name in completed.stdout.strip().split(",") if name]
+    return total_us / 1000, entries, eager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="0 = no timing check")
+    parser.add_argument("--top", type=int, default=15, help="slowest top-level imports to list")
+    arguments = parser.parse_args()
+
+    timings = []
+    for _ in range(arguments.runs):
+        total_ms, entries, eager = measure(arguments.module)
+        timings.append(total_ms)
+
+    median = statistics.median(timings)
+    print(f"import {arguments.module}: median={median:.0f}ms min={min(timings):.0f}ms "
+          f"max={max(timings):.0f}ms runs={arguments.runs} budget={arguments.budget_ms:.0f}ms")
+    print(f"\nslowest imports under {arguments.module} (last run, cumulative):")
+    children = sorted(children_of(entries, arguments.module), key=lambda child: -child[1])
+    for name, us in children[:arguments.top]:
+        print(f"  {us / 1000:8.1f}ms  {name}")
+
+    failed = False
+    if eager:
+        print(f"\nFAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+    if arguments.budget_ms > 0 and median > arguments.budget_ms:
+        print(f"\nFAIL: median {median:.0f}ms over the {arguments.budget_ms:.0f}ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Throughput and latency benchmark for the scan pipeline, offline by default.
+
+Runs run_page_scan, POST /scan/chunk and POST /scan/aggregate (in-process over
+ASGI, no server needed) at several page sizes and concurrency levels and reports
+throughput and p50/p95/p99 per combination, with the page's size after
+extraction (chars) and its chunk count. The LLM is the FakeLLM backend
+unless --backend openai is given; the claim cache is off so every run does the
+full work.
+
+/scan/aggregate writes a Scan row; without --with-db that write goes to an
+in-memory stand-in session, so the numbers exclude the database.
+
+Usage (from backend/):
+    python tools/bench_pipeline.py --sizes 1,5,20 --concurrency 1,8,32 \\
+        --latency-ms 300 --distribution lognormal --rate-limit-rate 0.02
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from uuid import uuid4
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "pages")
+TARGETS = ("page", "chunk", "aggregate")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--sizes", default="1,5,20", help="page sizes, in (distinct) copies of the fixture pages")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=64, help="operations per combination")
+    parser.add_argument("--backend", default="fake", choices=("fake", "openai"))
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--distribution", default="lognormal", choices=("fixed", "uniform", "lognormal"))
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--aggregation", default="local", choices=("local", "llm"), help="AGGREGATION_MODE")
+    parser.add_argument("--rpm", type=int, default=0, help="scheduler requests/minute (0 = unlimited)")
+    parser.add_argument("--with-db", action="store_true", help="let /scan/aggregate write to DATABASE_URL")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    # Settings are read at import time, so this has to happen before importing the app
+    os.environ["LLM_BACKEND"] = args.backend
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_LLM_LATENCY_DISTRIBUTION"] = args.distribution
+    os.environ["FAKE_LLM_ERROR_RATE"] = str(args.error_rate)
+    os.environ["FAKE_LLM_RATE_LIMIT_RATE"] = str(args.rate_limit_rate)
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = str(args.rpm)
+    os.environ["AGGREGATION_MODE"] = args.aggregation
+    os.environ["CLAIM_CACHE_ENABLED"] = "false"
+    os.environ["JOB_WORKERS"] = "0"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def load_page_texts():
+    texts = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.json"))):
+        with open(path) as f:
+            texts.extend(json.load(f)["candidates"])
+    return texts
+
+
+def page_candidates(base_texts, size):
+    """`size` copies of the fixture pages. Every line of a copy is tagged with the
+    copy number, so local extraction (which drops repeated lines) keeps them all
+    and bigger sizes really mean more text to scan."""
+    candidates = list(base_texts)
+    for copy in range(2, size + 1):
+        for text in base_texts:
+            candidates.append("\n".join(f"{line} ({copy})" if line.strip() else line for line in text.splitlines()))
+    return candidates
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class NullSession:
+    """Accepts the session calls of /scan/aggregate (services.scan_store.store_scan)
+    without a database."""
+
+    def add(self, obj):
+        obj.id = obj.id or uuid4()
+        obj.created_at = obj.created_at or datetime.utcnow()
+
+    async def flush(self):
+        pass
+
+    async def execute(self, statement, params=None):
+        pass
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, obj):
+        pass
+
+
+async def measure(operation, total, concurrency):
+    latencies = []
+    errors = 0
+    first_error = None
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors, first_error
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await operation()
+            except Exception as e:
+                errors += 1
+                first_error = first_error or e
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(total)])
+    wall = time.perf_counter() - started
+    if not latencies:
+        # Latencies of nothing would report a meaningless 0 ms
+        raise RuntimeError(f"All {total} operations failed; first error: {first_error!r}")
+    if errors:
+        print(f"warning: {errors}/{total} operations failed; first error: {first_error!r}", file=sys.stderr)
+    latencies.sort()
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "throughput": total / wall if wall else 0.0,
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+async def run(args):
+    import httpx
+
+    from db.session import get_session
+    from main import app
+    from services.ai_pipeline import extract_content, run_page_scan
+    from services.chunking import iter_chunks
+    from services.llm_scheduler import llm_scheduler
+
+    if not args.with_db:
+        async def null_session():
+            yield NullSession()
+        app.dependency_overrides[get_session] = null_session
+
+    base_texts = load_page_texts()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    targets = [t for t in args.targets.split(",") if t in TARGETS]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for target in targets:
+            for size in sizes:
+                candidates = page_candidates(base_texts, size)
+                # What the pipeline actually scans (EXTRACTION_MODE) and how many chunks it makes
+                page_text = await extract_content(candidates)
+                chunks = sum(1 for _ in iter_chunks(page_text))
+                # /scan/aggregate gets the claims a scan of this page produces
+                claims = [claim.model_dump() for claim in (await run_page_scan(candidates)).claims]
+
+                async def page_op():
+                    await run_page_scan(candidates)
+
+                async def chunk_op():
+                    response = await client.post("/api/v1/scan/chunk", json={"chunk": page_text})
+                    response.raise_for_status()
+
+                async def aggregate_op():
+                    response = await client.post("/api/v1/scan/aggregate", json={
+                        "verified_claims": claims,
+                        "full_text_summary": page_text[:5000],
+                    })
+                    response.raise_for_status()
+
+                operation = {"page": page_op, "chunk": chunk_op, "aggregate": aggregate_op}[target]
+                for concurrency in levels:
+                    calls_before = llm_scheduler.stats["calls"]
+                    result = await measure(operation, args.requests, concurrency)
+                    result.update(
+                        target=target,
+                        size=size,
+                        characters=len(page_text),
+                        chunks=chunks,
+                        concurrency=concurrency,
+                        llm_calls=llm_scheduler.stats["calls"] - calls_before,
+                    )
+                    report(result, args.json)
+
+
+def report(result, as_json):
+    if as_json:
+        print(json.dumps(result))
+        return
+    print(
+        f"{result['target']:<9} size={result['size']:<3} chars={result['characters']:<7} chunks={result['chunks']:<4} "
+        f"conc={result['concurrency']:<3} ok={result['ok']:<4} err={result['errors']:<3} "
+        f"llm_calls={result['llm_calls']:<5} {result['throughput']:8.1f} op/s  "
+        f"p50={result['p50_ms']:8.1f} p95={result['p95_ms']:8.1f} p99={result['p99_ms']:8.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    configure_environment(arguments)
+    asyncio.run(run(arguments))
@@ -0,0 +1,92 @@
+"""
+Compares the two-stage (identify -> verify) and single-pass chunk pipelines.
+
+For every fixture page the text is extracted locally and chunked, then each
+chunk goes through process_chunk in both modes with the claim cache disabled.
+Reports wall time, prompt/completion tokens and how well the claim sets agree.
+
+Usage (from backend/, needs the configured LLM provider):
+    python tools/bench_pipeline_modes.py [--pages sales_supplement,crypto_scheme]
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from core.config import settings
+from services.ai_pipeline import process_chunk
+from services.chunking import iter_chunks, claim_key
+from services.extraction import extract_main_text
+from services.llm_scheduler import llm_scheduler
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "pages")
+MODES = ("two_stage", "single_pass")
+
+
+async def run_mode(chunks, mode):
+    before = dict(llm_scheduler.stats)
+    started = time.perf_counter()
+    results = await asyncio.gather(*[process_chunk(chunk, mode=mode) for chunk in chunks])
+    elapsed = time.perf_counter() - started
+    claims = [claim for res in results for claim in res if isinstance(claim, dict)]
+    return {
+        "seconds": elapsed,
+        "calls": llm_scheduler.stats["calls"] - before["calls"],
+        "prompt_tokens": llm_scheduler.stats["prompt_tokens"] - before["prompt_tokens"],
+        "completion_tokens": llm_scheduler.stats["completion_tokens"] - before["completion_tokens"],
+        "claims": {claim_key(c): c for c in claims},
+    }
+
+
+def agreement(a, b):
+    """Jaccard overlap of claim texts, and share of shared claims with the same risk level."""
+    keys_a, keys_b = set(a), set(b)
+    union = keys_a | keys_b
+    shared = keys_a & keys_b
+    jaccard = len(shared) / len(union) if union else 1.0
+    same_risk = sum(1 for k in shared if str(a[k].get("risk_level")).lower() == str(b[k].get("risk_level")).lower())
+    return jaccard, (same_risk / len(shared) if shared else 1.0)
+
+
+async def run(pages):
+    settings.CLAIM_CACHE_ENABLED = False
+    paths = sorted(glob.glob(os.path.join(FIXTURES, "*.json")))
+    if pages:
+        paths = [p for p in paths if os.path.splitext(os.path.basename(p))[0] in pages]
+
+    totals = {mode: {"seconds": 0.0, "calls": 0, "prompt_tokens": 0, "completion_tokens": 0} for mode in MODES}
+    print(f"{'page':<20} {'mode':<12} {'sec':>7} {'calls':>6} {'in tok':>8} {'out tok':>8} {'claims':>7}")
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        text = extract_main_text(json.load(open(path))["candidates"])["text"]
+        chunks = list(iter_chunks(text))
+
+        runs = {}
+        for mode in MODES:
+            runs[mode] = await run_mode(chunks, mode)
+            r = runs[mode]
+            for key in totals[mode]:
+                totals[mode][key] += r[key]
+            print(f"{name:<20} {mode:<12} {r['seconds']:>7.2f} {r['calls']:>6} {r['prompt_tokens']:>8} "
+                  f"{r['completion_tokens']:>8} {len(r['claims']):>7}")
+
+        jaccard, same_risk = agreement(runs["two_stage"]["claims"], runs["single_pass"]["claims"])
+        print(f"{'':<20} agreement: claims jaccard={jaccard:.2f}, same risk on shared={same_risk:.2f}")
+
+    print("\nTotals")
+    for mode in MODES:
+        t = totals[mode]
+        print(f"  {mode:<12} {t['seconds']:.2f}s  {t['calls']} calls  {t['prompt_tokens']} in / {t['completion_tokens']} out tokens")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="", help="comma-separated fixture names (default: all)")
+    args = parser.parse_args()
+    asyncio.run(run([p for p in args.pages.split(",") if p]))
@@ -0,0 +1,106 @@
+"""
+Measures the local pre-filter (services/prefilter.py) against labeled data, to
+choose PREFILTER_THRESHOLD.
+
+Sentence level: tests/fixtures/claims/labeled_sentences.json, where claim=true
+marks sentences the identify step should extract. For each threshold it reports
+recall (claims that reach the LLM), precision, and the share of non-claim
+sentences kept away from the LLM.
+
+Chunk level: the fixture pages are extracted and chunked, and each chunk is
+checked against the threshold.
+
+With --llm the labels come from the full-LLM path instead: every fixture chunk
+goes through identify_claims_in_chunk (prefilter off), and recall is the share of
+chunks with at least one LLM-identified claim that the pre-filter keeps.
+
+Usage (from backend/):
+    python tools/eval_prefilter.py
+    python tools/eval_prefilter.py --llm --thresholds 0.3,0.5
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from core.config import settings
+from services.chunking import iter_chunks
+from services.extraction import extract_main_text
+from services.prefilter import prefilter_chunk, score_sentence
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures")
+THRESHOLDS = "0.1,0.2,0.3,0.4,0.5,0.6,0.7"
+
+
+def load_sentences():
+    with open(os.path.join(FIXTURES, "claims", "labeled_sentences.json")) as f:
+        return json.load(f)["sentences"]
+
+
+def load_chunks():
+    chunks = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "pages", "*.json"))):
+        with open(path) as f:
+            candidates = json.load(f)["candidates"]
+        name = os.path.splitext(os.path.basename(path))[0]
+        text = extract_main_text(candidates)["text"]
+        chunks.extend((name, chunk) for chunk in iter_chunks(text))
+    return chunks
+
+
+def sentence_report(sentences, thresholds):
+    scores = [(score_sentence(s["text"]), s["claim"]) for s in sentences]
+    positives = sum(1 for _, label in scores if label)
+    negatives = len(scores) - positives
+    print(f"Sentences: {positives} claims, {negatives} non-claims")
+    print(f"{'threshold':>9} {'recall':>7} {'precision':>9} {'negatives skipped':>18}")
+    for threshold in thresholds:
+        kept_pos = sum(1 for score, label in scores if label and score >= threshold)
+        kept_neg = sum(1 for score, label in scores if not label and score >= threshold)
+        recall = kept_pos / positives if positives else 1.0
+        precision = kept_pos / (kept_pos + kept_neg) if kept_pos + kept_neg else 1.0
+        skipped = (negatives - kept_neg) / negatives if negatives else 0.0
+        print(f"{threshold:>9.2f} {recall:>7.3f} {precision:>9.3f} {skipped:>18.3f}")
+
+    threshold = settings.PREFILTER_THRESHOLD
+    missed = [s["text"] for s in sentences if s["claim"] and score_sentence(s["text"]) < threshold]
+    if missed:
+        print(f"\nMissed at the configured threshold ({threshold:.2f}):")
+        for text in missed:
+            print(f"  - {text}")
+
+
+async def llm_labels(chunks):
+    from services.ai_pipeline import identify_claims_in_chunk
+    return [bool(await identify_claims_in_chunk(chunk)) for _, chunk in chunks]
+
+
+def chunk_report(chunks, thresholds, labels=None):
+    print(f"\nChunks: {len(chunks)} from fixture pages" + (" (labels from the LLM path)" if labels else ""))
+    header = f"{'threshold':>9} {'kept':>5} {'skipped':>8}"
+    print(header + (f" {'recall':>7}" if labels else ""))
+    for threshold in thresholds:
+        kept = [prefilter_chunk(chunk, threshold=threshold, mode="chunk")["keep"] for _, chunk in chunks]
+        line = f"{threshold:>9.2f} {sum(kept):>5} {len(kept) - sum(kept):>8}"
+        if labels:
+            positives = sum(labels)
+            hit = sum(1 for keep, label in zip(kept, labels) if keep and label)
+            line += f" {hit / positives if positives else 1.0:>7.3f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--thresholds", default=THRESHOLDS)
+    parser.add_argument("--llm", action="store_true", help="label chunks with the configured LLM")
+    args = parser.parse_args()
+
+    thresholds = [float(t) for t in args.thresholds.split(",")]
+    sentence_report(load_sentences(), thresholds)
+    chunks = load_chunks()
+    chunk_report(chunks, thresholds, asyncio.run(llm_labels(chunks)) if args.llm else None)
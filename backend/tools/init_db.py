@@ -7,7 +7,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 from db.session import engine
 from sqlmodel import SQLModel
-from db.models import User, Scan
+from db.models import User, Scan, ClaimRecord, ClaimCacheEntry, ScanJob
 
 async def init_db():
     print("Creating tables...")
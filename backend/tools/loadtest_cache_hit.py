@@ -0,0 +1,84 @@
+"""
+Load test for the cache-hit path of /scan/page.
+
+Seeds one scan for --url (a normal /scan/page call, which runs the pipeline
+once), then fires --requests cache-hit requests at --concurrency and reports
+latency percentiles. Run it against the server before and after a DB/pool
+change (e.g. DB_ECHO, DB_POOL_SIZE, DB_PGBOUNCER_MODE) to compare p99.
+
+Usage (server running):
+    python tools/loadtest_cache_hit.py --base-url http://localhost:8000 \\
+        --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(base_url, url, total, concurrency):
+    endpoint = f"{base_url.rstrip('/')}/api/v1/scan/page"
+    payload = {"url": url, "candidates": ["This pill cures cancer.", "Buy now for 50% off."]}
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        seed = await client.post(endpoint, json=payload)
+        seed.raise_for_status()
+
+        latencies = []
+        errors = 0
+        queue = asyncio.Queue()
+        for _ in range(total):
+            queue.put_nowait(None)
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    response = await client.post(endpoint, json=payload)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                elapsed = (time.perf_counter() - started) * 1000
+                if response.status_code != 200 or not response.json().get("is_cached"):
+                    errors += 1
+                else:
+                    latencies.append(elapsed)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"requests={total} concurrency={concurrency} errors={errors} throughput={total / wall:.1f} req/s")
+    if not latencies:
+        print("no successful cache-hit responses; nothing to report")
+        return False
+    print(
+        f"latency ms: mean={statistics.mean(latencies):.1f} p50={percentile(latencies, 50):.1f} "
+        f"p95={percentile(latencies, 95):.1f} p99={percentile(latencies, 99):.1f} max={latencies[-1]:.1f}"
+    )
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--url", default="https://loadtest.example/cache-hit")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    if not asyncio.run(run(args.base_url, args.url, args.requests, args.concurrency)):
+        sys.exit(1)
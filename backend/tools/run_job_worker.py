@@ -0,0 +1,25 @@
+import asyncio
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from core.config import settings
+from services.jobs import JobWorkerPool
+
+# Standalone scan-job workers, for deployments that run the API with
+# JOB_WORKERS=0 and scale workers as separate processes.
+
+async def main():
+    workers = max(1, settings.JOB_WORKERS)
+    pool = JobWorkerPool(workers=workers, poll_interval=settings.JOB_POLL_INTERVAL_SECONDS)
+    print(f"Starting {workers} scan job workers...")
+    pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())